@@ -18,7 +18,7 @@ if _ext_dir not in sys.path:
 
 from core.logging import agent_log, debug_log, update_activity_state, start_watchdog_thread, init_logging
 from core.async_stream import run_stream_completion_async, run_stream_drain_loop
-from core.uno_ui_helpers import get_optional as get_optional_control, get_checkbox_state, set_checkbox_state
+from core.uno_ui_helpers import get_optional as get_optional_control, get_checkbox_state, set_checkbox_state, ResponseTranscript
 
 from com.sun.star.ui import XUIElementFactory, XUIElement, XToolPanel, XSidebarPanel
 from com.sun.star.ui.UIElementType import TOOLPANEL
@@ -138,7 +138,7 @@ class ChatSession:
 class SendButtonListener(unohelper.Base, XActionListener):
     """Listener for the Send button - runs chat with document, supports tool-calling."""
 
-    def __init__(self, ctx, frame, send_control, stop_control, query_control, response_control, image_model_selector, model_selector, status_control, session, direct_image_checkbox=None, aspect_ratio_selector=None, base_size_input=None, web_search_checkbox=None):
+    def __init__(self, ctx, frame, send_control, stop_control, query_control, response_control, image_model_selector, model_selector, status_control, session, direct_image_checkbox=None, aspect_ratio_selector=None, base_size_input=None, web_search_checkbox=None, transcript=None):
         self.ctx = ctx
         self.frame = frame
         self.send_control = send_control
@@ -153,6 +153,9 @@ class SendButtonListener(unohelper.Base, XActionListener):
         self.aspect_ratio_selector = aspect_ratio_selector
         self.base_size_input = base_size_input
         self.web_search_checkbox = web_search_checkbox
+        if transcript is None and response_control:
+            transcript = ResponseTranscript(response_control)
+        self.transcript = transcript
         self.initial_doc_type = None # Set by _wireControls
         self.stop_requested = False
         self._terminal_status = "Ready"
@@ -178,37 +181,30 @@ class SendButtonListener(unohelper.Base, XActionListener):
         except Exception as e:
             debug_log("_set_status('%s') EXCEPTION: %s" % (text, e), context="Chat")
 
-    def _scroll_response_to_bottom(self):
-        """Scroll the response area to show the bottom (newest content).
-        Uses XTextComponent.setSelection to place caret at end, which scrolls the view."""
+    def _append_response(self, text, flush=True):
+        """Append text to the response area (inserted at the end, then scrolled into view).
+        Streaming passes flush=False; the drain loop calls _flush_response once per batch."""
         try:
-            if self.response_control:
-                model = self.response_control.getModel()
-                if model and hasattr(self.response_control, "setSelection"):
-                    text = model.Text or ""
-                    length = len(text)
-                    self.response_control.setSelection(
-                        uno.createUnoStruct("com.sun.star.awt.Selection", length, length))
+            if self.transcript:
+                self.transcript.append(text, flush=flush)
         except Exception:
             pass
 
-    def _append_response(self, text):
-        """Append text to the response area."""
+    def _flush_response(self):
+        """Write text buffered by _append_response(..., flush=False) to the response area."""
         try:
-            if self.response_control and self.response_control.getModel():
-                current = self.response_control.getModel().Text or ""
-                self.response_control.getModel().Text = current + text
-                self._scroll_response_to_bottom()
+            if self.transcript:
+                self.transcript.flush()
         except Exception:
             pass
 
     def _on_mcp_event(self, event_type, data):
         """Handle MCP events from the bus (background thread)."""
         from core.mcp_thread import post_to_main_thread
-        from core.config import get_config
-        
+        from core.config import get_config_bool
+
         # Default to show if key is missing
-        if not get_config(self.ctx, "show_mcp_activity", True):
+        if not get_config_bool(self.ctx, "show_mcp_activity", True):
             return
 
         def _update_ui():
@@ -470,7 +466,7 @@ class SendButtonListener(unohelper.Base, XActionListener):
                     return
 
                 def apply_chunk(chunk_text, is_thinking=False):
-                    self._append_response(chunk_text)
+                    self._append_response(chunk_text, flush=False)
 
                 def on_stream_done(response):
                     job_done[0] = True
@@ -493,6 +489,7 @@ class SendButtonListener(unohelper.Base, XActionListener):
                     on_error=on_error,
                     on_status_fn=self._set_status,
                     ctx=self.ctx,
+                    on_tick_fn=self._flush_response,
                 )
                 if self._terminal_status != "Error":
                     self._terminal_status = "Ready"
@@ -536,28 +533,29 @@ class SendButtonListener(unohelper.Base, XActionListener):
             return
 
         # System prompt: extra_instructions from config only (not in sidebar)
-        from core.config import set_config, update_lru_history, set_image_model, get_config, get_current_endpoint
+        from core.config import set_config, update_lru_history, set_image_model, get_config, get_config_int, get_current_endpoint, config_batch
         extra_instructions = get_config(self.ctx, "additional_instructions", "") or ""
         from core.constants import get_chat_system_prompt_for_document
         self.session.messages[0]["content"] = get_chat_system_prompt_for_document(model, extra_instructions)
 
-        # Update text model and image model from selectors
-        if self.model_selector:
-            selected_model = self.model_selector.getText()
-            if selected_model:
-                set_config(self.ctx, "text_model", selected_model)
-                current_endpoint = get_current_endpoint(self.ctx)
-                update_lru_history(self.ctx, selected_model, "model_lru", current_endpoint)
-                debug_log("_do_send: text model updated to %s" % selected_model, context="Chat")
-        if self.image_model_selector:
-            selected_image_model = self.image_model_selector.getText()
-            if selected_image_model:
-                set_image_model(self.ctx, selected_image_model)
-                debug_log("_do_send: image model updated to %s" % selected_image_model, context="Chat")
+        # Update text model and image model from selectors (one config write at most)
+        with config_batch(self.ctx):
+            if self.model_selector:
+                selected_model = self.model_selector.getText()
+                if selected_model:
+                    set_config(self.ctx, "text_model", selected_model)
+                    current_endpoint = get_current_endpoint(self.ctx)
+                    update_lru_history(self.ctx, selected_model, "model_lru", current_endpoint)
+                    debug_log("_do_send: text model updated to %s" % selected_model, context="Chat")
+            if self.image_model_selector:
+                selected_image_model = self.image_model_selector.getText()
+                if selected_image_model:
+                    set_image_model(self.ctx, selected_image_model)
+                    debug_log("_do_send: image model updated to %s" % selected_image_model, context="Chat")
 
         # 3. Set up config and LlmClient
-        max_context = int(get_config(self.ctx, "chat_context_length", 8000))
-        max_tokens = int(get_config(self.ctx, "chat_max_tokens", 16384))
+        max_context = get_config_int(self.ctx, "chat_context_length", 8000)
+        max_tokens = get_config_int(self.ctx, "chat_max_tokens", 16384)
         api_type = str(get_config(self.ctx, "api_type", "chat")).lower()
         debug_log("_do_send: config loaded: api_type=%s, max_tokens=%d, max_context=%d" %
                     (api_type, max_tokens, max_context), context="Chat")
@@ -688,7 +686,7 @@ class SendButtonListener(unohelper.Base, XActionListener):
             # active, but we only display them if the setting is on.
             if is_thinking and not show_thinking:
                 return
-            self._append_response(chunk_text)
+            self._append_response(chunk_text, flush=False)
 
         def on_stream_done(response):
             job_done[0] = True
@@ -715,6 +713,7 @@ class SendButtonListener(unohelper.Base, XActionListener):
             on_error=on_error,
             on_status_fn=self._set_status,
             ctx=self.ctx,
+            on_tick_fn=self._flush_response,
         )
 
 
@@ -899,7 +898,7 @@ class SendButtonListener(unohelper.Base, XActionListener):
         start_worker()
 
         def apply_chunk(chunk_text, is_thinking=False):
-            self._append_response(chunk_text)
+            self._append_response(chunk_text, flush=False)
 
         def on_stream_done(response):
             return process_stream_done(response)
@@ -922,6 +921,7 @@ class SendButtonListener(unohelper.Base, XActionListener):
             on_stopped=on_stopped,
             on_error=on_error,
             ctx=self.ctx,
+            on_tick_fn=self._flush_response,
         )
 
     def _start_simple_stream_async(self, client, max_tokens, api_type):
@@ -947,7 +947,7 @@ class SendButtonListener(unohelper.Base, XActionListener):
         collected = []
 
         def apply_chunk(chunk_text, is_thinking=False):
-            self._append_response(chunk_text)
+            self._append_response(chunk_text, flush=False)
             if not is_thinking:
                 collected.append(chunk_text)
 
@@ -971,6 +971,7 @@ class SendButtonListener(unohelper.Base, XActionListener):
             self.ctx, client, prompt, system_prompt, max_tokens, api_type,
             apply_chunk, on_done, on_error, on_status_fn=self._set_status,
             stop_checker=lambda: self.stop_requested,
+            on_tick_fn=self._flush_response,
         )
 
     def disposing(self, evt):
@@ -1008,14 +1009,17 @@ class StopButtonListener(unohelper.Base, XActionListener):
 class ClearButtonListener(unohelper.Base, XActionListener):
     """Listener for the Clear button - resets conversation history."""
 
-    def __init__(self, session, response_control, status_control):
+    def __init__(self, session, response_control, status_control, transcript=None):
         self.session = session
         self.response_control = response_control
         self.status_control = status_control
+        self.transcript = transcript
 
     def actionPerformed(self, evt):
         self.session.clear()
-        if self.response_control and self.response_control.getModel():
+        if self.transcript:
+            self.transcript.clear()
+        elif self.response_control and self.response_control.getModel():
             self.response_control.getModel().Text = ""
         if self.status_control:
             self.status_control.setText("")
@@ -1177,6 +1181,7 @@ class ChatPanelElement(unohelper.Base, XUIElement):
         send_btn = root_window.getControl("send")
         query_ctrl = root_window.getControl("query")
         response_ctrl = root_window.getControl("response")
+        transcript = ResponseTranscript(response_ctrl) if response_ctrl else None
 
         def get_optional(name):
             return get_optional_control(root_window, name)
@@ -1201,9 +1206,8 @@ class ChatPanelElement(unohelper.Base, XUIElement):
         def _show_init_error(msg):
             debug_log("_wireControls ERROR: %s" % msg, context="Chat")
             try:
-                if response_ctrl and response_ctrl.getModel():
-                    current = response_ctrl.getModel().Text or ""
-                    response_ctrl.getModel().Text = current + "[Init error: %s]\n" % msg
+                if transcript:
+                    transcript.append("[Init error: %s]\n" % msg)
             except Exception:
                 pass
 
@@ -1421,7 +1425,8 @@ class ChatPanelElement(unohelper.Base, XUIElement):
                 direct_image_checkbox=direct_image_check,
                 aspect_ratio_selector=aspect_ratio_selector,
                 base_size_input=base_size_input,
-                web_search_checkbox=web_search_check)
+                web_search_checkbox=web_search_check,
+                transcript=transcript)
 
             # Detect and store initial document type for strict verification
             if model:
@@ -1450,10 +1455,11 @@ class ChatPanelElement(unohelper.Base, XUIElement):
 
         # Show ready message
         try:
-            if response_ctrl and response_ctrl.getModel():
+            if transcript:
                 from core.constants import get_greeting_for_document
                 greeting = get_greeting_for_document(model)
-                response_ctrl.getModel().Text = "%s\n" % greeting
+                transcript.clear()
+                transcript.append("%s\n" % greeting)
         except Exception:
             pass
 
@@ -1462,7 +1468,7 @@ class ChatPanelElement(unohelper.Base, XUIElement):
             clear_btn = root_window.getControl("clear")
             if clear_btn:
                 clear_btn.addActionListener(ClearButtonListener(
-                    self.session, response_ctrl, status_ctrl))
+                    self.session, response_ctrl, status_ctrl, transcript=transcript))
                 debug_log("Clear button wired", context="Chat")
         except Exception:
             pass
@@ -1481,6 +1487,13 @@ class ChatPanelElement(unohelper.Base, XUIElement):
         except Exception as e:
             debug_log("try_ensure_mcp_timer: %s" % e, context="Chat")
 
+        # Pre-create the hidden documents used for selection/range export and markup rendering
+        try:
+            from core.doc_pool import schedule_warmup
+            schedule_warmup(self.ctx)
+        except Exception as e:
+            debug_log("doc_pool warm-up: %s" % e, context="Chat")
+
         # FIXME: Wire PanelResizeListener here once dynamic resizing is fixed.
         # See FIXME comment above the commented-out PanelResizeListener class.
 
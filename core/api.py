@@ -4,7 +4,6 @@ Takes a config dict (from core.config.get_api_config) and UNO ctx.
 """
 import collections
 import json
-import ssl
 import urllib.request
 import urllib.parse
 import http.client
@@ -14,11 +13,13 @@ import socket
 REPEATED_STREAMING_CHUNK_LIMIT = 20
 from collections import deque
 
-# accumulate_delta is required for tool-calling: it merges streaming deltas into message_snapshot so full tool_calls (with function.arguments) are available.
-from .streaming_deltas import accumulate_delta
+# DeltaAccumulator is required for tool-calling: it merges streaming deltas into message_snapshot so full tool_calls (with function.arguments) are available.
+from .streaming_deltas import DeltaAccumulator
 from .constants import APP_REFERER, APP_TITLE, USER_AGENT
+from .http_pool import get_connection_pool, get_unverified_ssl_context, pool_key
+from .sse import iter_sse_data
 
-from core.logging import debug_log, update_activity_state, init_logging
+from core.logging import debug_log, update_activity_state, init_logging, DEBUG
 
 
 def format_error_message(e):
@@ -81,12 +82,77 @@ def format_error_for_display(e):
     return "Error: %s" % format_error_message(e)
 
 
-def get_unverified_ssl_context():
-    """Create an SSL context that doesn't verify certificates. Shared by API and aihordeclient."""
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-    return ssl_context
+SYNC_REQUEST_MAX_REDIRECTS = 5
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError,
+                            ConnectionAbortedError, BrokenPipeError)
+
+
+def _proxy_for(url):
+    """Proxy URL configured for url (HTTP(S)_PROXY etc., honouring no_proxy), or None."""
+    parsed = urllib.parse.urlsplit(url)
+    proxy = urllib.request.getproxies().get(parsed.scheme.lower())
+    if not proxy or urllib.request.proxy_bypass(parsed.netloc):
+        return None
+    return proxy
+
+
+def _urlopen_request(method, url, body, headers, timeout):
+    """Same result as _pooled_http_request, via urlopen (which handles proxies)."""
+    import urllib.error
+    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout, context=get_unverified_ssl_context()) as resp:
+            return resp.status, resp.reason, resp.read(), resp.geturl()
+    except urllib.error.HTTPError as e:
+        try:
+            raw = e.read()
+        except Exception:
+            raw = b""
+        return e.code, e.reason, raw, url
+
+
+def _pooled_http_request(method, url, body, headers, timeout):
+    """One request on a pooled connection, following redirects like urlopen.
+    Requests that must go through a proxy are handed to urlopen instead.
+    Returns (status, reason, raw_body, final_url)."""
+    pool = get_connection_pool()
+    for _ in range(SYNC_REQUEST_MAX_REDIRECTS + 1):
+        if _proxy_for(url):
+            debug_log("Proxy configured for %s, using urlopen" % url, context="API")
+            return _urlopen_request(method, url, body, headers, timeout)
+        parsed = urllib.parse.urlsplit(url)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        key = pool_key(url)
+        for attempt in (0, 1):
+            conn, reused = pool.acquire(key, timeout)
+            reuse = False
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+                reuse = not resp.will_close
+                break
+            except _STALE_CONNECTION_ERRORS:
+                # On a reused connection the server closed an idle keep-alive socket;
+                # the other idle ones are likely stale too, so retry once on a fresh
+                # connection. A fresh connection means the server really dropped the
+                # request: resending could repeat a non-idempotent POST.
+                pool.discard_idle(key)
+                if attempt or not reused:
+                    raise
+            finally:
+                pool.release(key, conn, reuse=reuse)
+        location = resp.getheader("Location")
+        if resp.status in (301, 302, 303, 307, 308) and location:
+            url = urllib.parse.urljoin(url, location)
+            if resp.status == 303 or (resp.status in (301, 302) and method == "POST"):
+                method, body = "GET", None
+                headers = {k: v for k, v in headers.items() if k.lower() not in ("content-type", "content-length")}
+            continue
+        return resp.status, resp.reason, raw, url
+    raise Exception("Too many redirects for %s" % url)
 
 
 def sync_request(url, data=None, headers=None, timeout=10, parse_json=True):
@@ -125,32 +191,69 @@ def sync_request(url, data=None, headers=None, timeout=10, parse_json=True):
     except Exception:
         pass
 
-    ctx = get_unverified_ssl_context()
+    full_url = req.full_url
+    method = req.get_method()
+    body = req.data
+    req_headers = dict(req.header_items())
+    if body is not None and not any(k.lower() == "content-type" for k in req_headers):
+        req_headers["Content-Type"] = "application/x-www-form-urlencoded"
     try:
-        debug_log(f"About to open URL: {getattr(req, 'full_url', url)}", context="API")
-        with urllib.request.urlopen(req, timeout=timeout, context=ctx) as resp:
-            debug_log(f"URL opened, status={resp.getcode()}. Heading to read...", context="API")
-            raw = resp.read()
-            debug_log(f"Read {len(raw)} bytes", context="API")
-            if parse_json:
-                return json.loads(raw.decode("utf-8"))
-            return raw
-    except urllib.error.HTTPError as e:
-        status = e.code
-        reason = e.reason
+        debug_log(f"About to open URL: {full_url}", context="API")
         try:
-            err_body = e.read().decode("utf-8", errors="replace")
-        except Exception:
-            err_body = ""
-        
-        msg = _format_http_error_response(status, reason, err_body)
-        debug_log(f"HTTP Error: {msg}", context="API")
-        raise Exception(msg) from e
+            status, reason, raw, _ = _pooled_http_request(method, full_url, body, req_headers, timeout)
+        except (socket.timeout, urllib.error.URLError):
+            raise
+        except (http.client.HTTPException, OSError) as e:
+            # Same exception type urlopen raised, so callers' URLError handlers still apply
+            raise urllib.error.URLError(e) from e
+        debug_log(f"URL opened, status={status}. Read {len(raw)} bytes", context="API")
+        if status >= 400:
+            err_body = raw.decode("utf-8", errors="replace")
+            msg = _format_http_error_response(status, reason, err_body)
+            debug_log(f"HTTP Error: {msg}", context="API")
+            raise Exception(msg)
+        if parse_json:
+            return json.loads(raw.decode("utf-8"))
+        return raw
     except Exception as e:
         debug_log(f"Request failed: {format_error_message(e)}", context="API")
         raise
 
 
+_SSE_DONE = object()
+# Reused decoder: skips json.loads' per-call argument handling on the hot path
+_decode_json = json.JSONDecoder().decode
+
+
+def _iter_sse_chunks(response):
+    """Yield the decoded JSON chunks of a streaming response, or _SSE_DONE for [DONE]."""
+    for payload in iter_sse_data(response):
+        if payload.startswith(b"[DONE]"):
+            yield _SSE_DONE
+            continue
+        try:
+            chunk = _decode_json(payload.decode("utf-8"))
+        except ValueError:
+            chunk = None
+            if b"\n" in payload:
+                # No blank line between events, so several data lines were joined:
+                # treat each line as its own chunk as line-based clients do.
+                for part in payload.split(b"\n"):
+                    if part.startswith(b"[DONE]"):
+                        yield _SSE_DONE
+                        continue
+                    try:
+                        part_chunk = _decode_json(part.decode("utf-8"))
+                    except ValueError:
+                        debug_log("streaming_loop: JSON decode error in payload: %r" % part[:200], context="API")
+                        continue
+                    yield part_chunk
+            else:
+                debug_log("streaming_loop: JSON decode error in payload: %r" % payload[:200], context="API")
+        if chunk is not None:
+            yield chunk
+
+
 def _extract_thinking_from_delta(chunk_delta):
     """Extract reasoning/thinking text from a stream delta for display in UI."""
     # Try direct fields first
@@ -209,7 +312,7 @@ def _is_openai_compatible(config):
 
 
 def _normalize_delta(delta):
-    """Normalize delta for Mistral/Azure compat before accumulate_delta.
+    """Normalize delta for Mistral/Azure compat before DeltaAccumulator.add.
     LiteLLM: streaming_handler.py ~L847 (role), ~L853 (type), ~L820 (arguments).
     """
     if not isinstance(delta, dict):
@@ -229,55 +332,57 @@ def _normalize_delta(delta):
             fn["arguments"] = ""
 
 
+_pool_settings = None  # (max_per_host, idle_timeout) last applied to the shared pool
+
+
+def _apply_pool_settings(config):
+    """Configure the shared connection pool from config, only when the settings changed."""
+    global _pool_settings
+    settings = (config.get("http_max_connections_per_host"), config.get("http_idle_timeout"))
+    if settings == _pool_settings:
+        return
+    _pool_settings = settings
+    get_connection_pool().configure(max_per_host=settings[0], idle_timeout=settings[1])
+
+
 class LlmClient:
     """LLM API client. Takes config dict from get_api_config(ctx) and UNO ctx."""
 
     def __init__(self, config, ctx):
         self.config = config
         self.ctx = ctx
-        self._persistent_conn = None
+        self._persistent_conn = None  # connection checked out of the shared pool
         self._conn_key = None  # (scheme, host, port)
+        _apply_pool_settings(config)
 
     def _get_connection(self):
-        """Get or create a persistent http.client connection."""
-        endpoint = self._endpoint()
-        parsed = urllib.parse.urlparse(endpoint)
-        scheme = parsed.scheme.lower()
-        host = parsed.hostname
-        port = parsed.port
-        
-        # Default ports if not specified
-        if not port:
-            port = 443 if scheme == "https" else 80
-            
-        new_key = (scheme, host, port)
-        
+        """Check out a keep-alive connection for the endpoint from the shared pool."""
         if self._persistent_conn:
-            if self._conn_key != new_key:
-                debug_log("Closing old connection to %s, opening new to %s" % (self._conn_key, new_key), context="API")
-                self._persistent_conn.close()
-                self._persistent_conn = None
-            else:
-                return self._persistent_conn
-
-        debug_log("Opening new connection to %s://%s:%s" % (scheme, host, port), context="API")
-        self._conn_key = new_key
-        timeout = self._timeout()
-        
-        if scheme == "https":
-            ssl_context = get_unverified_ssl_context()
-            self._persistent_conn = http.client.HTTPSConnection(host, port, context=ssl_context, timeout=timeout)
-        else:
-            self._persistent_conn = http.client.HTTPConnection(host, port, timeout=timeout)
-            
+            # Previous request did not hand its connection back; it may be mid-response
+            self._close_connection()
+        key = pool_key(self._endpoint())
+        self._persistent_conn, _ = get_connection_pool().acquire(key, self._timeout())
+        self._conn_key = key
         return self._persistent_conn
 
-    def _close_connection(self):
+    def _release_connection(self):
+        """Return the connection to the pool for reuse (response fully read)."""
+        if self._persistent_conn:
+            get_connection_pool().release(self._conn_key, self._persistent_conn, reuse=True)
+            self._persistent_conn = None
+            self._conn_key = None
+
+    def _close_connection(self, stale=False):
+        """Close the checked-out connection. stale=True (after a connection error)
+        also drops the pool's idle connections to the same host before a retry."""
         if self._persistent_conn:
+            pool = get_connection_pool()
             try:
-                self._persistent_conn.close()
-            except:
+                pool.release(self._conn_key, self._persistent_conn, reuse=False)
+            except Exception:
                 pass
+            if stale:
+                pool.discard_idle(self._conn_key)
             self._persistent_conn = None
             self._conn_key = None
 
@@ -367,7 +472,7 @@ class LlmClient:
         if parsed.query:
             path += "?" + parsed.query
             
-        debug_log("Request data: %s" % json.dumps(data, indent=2), context="API")
+        debug_log(lambda: "Request data: %s" % json.dumps(data, indent=2), context="API", level=DEBUG)
         return "POST", path, json_data, self._headers()
 
     def extract_content_from_response(self, chunk, api_type="completions"):
@@ -428,7 +533,7 @@ class LlmClient:
             context="API",
         )
         debug_log("URL: %s" % url, context="API")
-        debug_log("Messages: %s" % json.dumps(messages, indent=2), context="API")
+        debug_log(lambda: "Messages: %s" % json.dumps(messages, indent=2), context="API", level=DEBUG)
         
         parsed = urllib.parse.urlparse(url)
         path = parsed.path
@@ -457,7 +562,7 @@ class LlmClient:
         init_logging(self.ctx)
         debug_log("=== Image Request ===", context="API")
         debug_log("URL: %s" % url, context="API")
-        debug_log("Data: %s" % json.dumps(data, indent=2), context="API")
+        debug_log(lambda: "Data: %s" % json.dumps(data, indent=2), context="API", level=DEBUG)
         
         parsed = urllib.parse.urlparse(url)
         path = parsed.path
@@ -526,32 +631,11 @@ class LlmClient:
                 content_finished = False
                 # LiteLLM: streaming_handler.py ~L198 safety_checker(), issue #5158
                 last_contents = collections.deque(maxlen=REPEATED_STREAMING_CHUNK_LIMIT)
-                for line in response:
-                    line_str = line.strip()
-                    if not line_str:
-                        continue
-
-                    # SSE comments (like : OPENROUTER PROCESSING) or heartbeats
-                    if line_str.startswith(b":"):
-                        continue
-
-                    if not line_str.startswith(b"data:"):
-                        continue
-                    
-                    # Payload is everything after "data:" (with or without space)
-                    idx = line_str.find(b":") + 1
-                    payload = line_str[idx:].decode("utf-8").strip()
-                    
-                    if payload == "[DONE]":
+                for chunk in _iter_sse_chunks(response):
+                    if chunk is _SSE_DONE:
                         debug_log("streaming_loop: [DONE] received", context="API")
                         content_finished = True
                         continue
-                    
-                    try:
-                        chunk = json.loads(payload)
-                    except json.JSONDecodeError:
-                        debug_log("streaming_loop: JSON decode error in payload: %s" % payload, context="API")
-                        continue
                     if chunk is None:
                         continue
 
@@ -617,10 +701,12 @@ class LlmClient:
                 conn_hdr = (response.getheader("Connection") or "").strip().lower()
                 if conn_hdr == "close":
                     self._close_connection()
+                else:
+                    self._release_connection()
 
         except (http.client.HTTPException, socket.error, OSError) as e:
             debug_log("Connection error, closing: %s" % e, context="API")
-            self._close_connection()
+            self._close_connection(stale=True)
             err_msg = format_error_message(e)
             if _retry:
                 debug_log("Retrying streaming request once on fresh connection", context="API")
@@ -705,21 +791,23 @@ class LlmClient:
                     self._close_connection()
                     raise Exception(_format_http_error_response(response.status, response.reason, err_body))
                 result = json.loads(response.read().decode("utf-8"))
+                self._release_connection()
                 break
             except (http.client.HTTPException, socket.error, OSError) as e:
                 debug_log("Connection error, closing: %s" % e, context="API")
-                self._close_connection()
+                self._close_connection(stale=True)
                 if attempt == 0:
                     debug_log("Retrying request_with_tools once on fresh connection", context="API")
                     continue
                 debug_log("Connection retry failed: %s" % format_error_message(e), context="API")
                 raise Exception(format_error_message(e))
             except Exception as e:
+                self._close_connection()
                 err_msg = format_error_message(e)
                 debug_log("request_with_tools ERROR: %s -> %s" % (e, err_msg), context="API")
                 raise Exception(err_msg)
 
-        debug_log("=== Tool response: %s" % json.dumps(result, indent=2), context="API")
+        debug_log(lambda: "=== Tool response: %s" % json.dumps(result, indent=2), context="API", level=DEBUG)
 
         choice = result.get("choices", [{}])[0] if result.get("choices") else {}
         message = choice.get("message") or result.get("message") or {}
@@ -756,7 +844,7 @@ class LlmClient:
             messages, max_tokens, tools=tools, stream=True
         )
 
-        message_snapshot = {}
+        accumulator = DeltaAccumulator()
         last_finish_reason = None
 
         append_callback = append_callback or (lambda t: None)
@@ -771,7 +859,7 @@ class LlmClient:
                 "chat",
                 on_content=append_callback,
                 on_thinking=append_thinking_callback,
-                on_delta=lambda d: accumulate_delta(message_snapshot, d),
+                on_delta=accumulator.add,
                 stop_checker=stop_checker,
             )
         except Exception as e:
@@ -779,6 +867,7 @@ class LlmClient:
             debug_log("stream_request_with_tools ERROR: %s -> %s" % (e, err_msg), context="API")
             raise Exception(err_msg)
 
+        message_snapshot = accumulator.snapshot()
         # LiteLLM: streaming_handler.py ~L970 finish_reason_handler() "## if tool use"
         if last_finish_reason == "stop" and message_snapshot.get("tool_calls"):
             last_finish_reason = "tool_calls"
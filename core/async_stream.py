@@ -5,6 +5,7 @@ Shared drain loop used by both simple streaming and tool-calling (chat_panel).
 """
 import queue
 import threading
+import time
 
 from core.logging import debug_log
 
@@ -21,6 +22,7 @@ def run_stream_drain_loop(
     on_error,
     on_status_fn=None,
     ctx=None,
+    on_tick_fn=None,
 ):
     """
     Main-thread drain loop: batch items from queue, maintain thinking/chunk buffers,
@@ -29,6 +31,8 @@ def run_stream_drain_loop(
     and on_error(exception) are called when stopped or error; job_done is set and loop exits.
     When ctx is provided and MCP is enabled in config, we also drain the MCP queue each
     iteration so MCP requests are serviced during streaming without a separate Timer.
+    on_tick_fn() is called once after each batch, before the UI repaints, so callers
+    can buffer what apply_chunk_fn receives and write it to the UI in one update.
     """
     thinking_open = [False]
     while not job_done[0]:
@@ -118,6 +122,11 @@ def run_stream_drain_loop(
             except Exception as e2:
                 debug_log("run_stream_drain_loop: on_error failed: %s" % e2, context="API")
 
+        if on_tick_fn:
+            try:
+                on_tick_fn()
+            except Exception as e:
+                debug_log("run_stream_drain_loop: on_tick_fn failed: %s" % e, context="API")
         toolkit.processEventsToIdle()
 
 
@@ -133,11 +142,13 @@ def run_stream_completion_async(
     on_error_fn,
     on_status_fn=None,
     stop_checker=None,
+    on_tick_fn=None,
 ):
     """
     Run client.stream_completion on a worker thread; drain (chunk, thinking) via a
     queue and a main-thread loop with processEventsToIdle. apply_chunk_fn(chunk_text, is_thinking)
-    and on_done_fn() / on_error_fn(exception) are called on the main thread.
+    and on_done_fn() / on_error_fn(exception) are called on the main thread; on_tick_fn()
+    as in run_stream_drain_loop.
     Blocks until stream finishes (pure Python queue, no UNO Timer).
     """
     q = queue.Queue()
@@ -183,5 +194,107 @@ def run_stream_completion_async(
         on_error=on_error_fn,
         on_status_fn=on_status_fn,
         ctx=ctx,
+        on_tick_fn=on_tick_fn,
     )
 
+
+
+def run_completion_batch_async(
+    ctx,
+    make_client,
+    jobs,
+    concurrency,
+    api_type,
+    on_result_fn,
+    on_error_fn,
+    on_progress_fn=None,
+):
+    """
+    Run many independent completions with at most `concurrency` in flight.
+    jobs: list of (prompt, system_prompt, max_tokens). Each worker thread gets its own
+    client from make_client() (LlmClient keeps one connection and is not thread-safe).
+    on_result_fn(index, text) is called on the main thread as each job finishes, in
+    completion order; on_error_fn(index, exception) likewise for failed jobs. After the
+    first error no new jobs are started (in-flight ones still finish). on_progress_fn(done,
+    total, elapsed_seconds) is called after each finished job.
+    Blocks (pumping UI events) until all started jobs are finished. Returns the number
+    of jobs that were never started.
+    """
+    total = len(jobs)
+    if not total:
+        return 0
+    q = queue.Queue()
+    pending = queue.Queue()
+    for i in range(total):
+        pending.put(i)
+    stop = threading.Event()
+    n_workers = max(1, min(int(concurrency or 1), total))
+
+    def worker():
+        try:
+            client = make_client()
+        except Exception as e:
+            stop.set()
+            q.put(("error", None, e))
+            q.put(("worker_done", None, None))
+            return
+        while not stop.is_set():
+            try:
+                i = pending.get_nowait()
+            except queue.Empty:
+                break
+            prompt, system_prompt, max_tokens = jobs[i]
+            parts = []
+            try:
+                client.stream_completion(
+                    prompt,
+                    system_prompt,
+                    max_tokens,
+                    api_type,
+                    append_callback=parts.append,
+                    append_thinking_callback=lambda t: None,
+                )
+                q.put(("result", i, "".join(parts)))
+            except Exception as e:
+                stop.set()
+                q.put(("error", i, e))
+        q.put(("worker_done", None, None))
+
+    try:
+        toolkit = ctx.getServiceManager().createInstanceWithContext(
+            "com.sun.star.awt.Toolkit", ctx)
+    except Exception as e:
+        on_error_fn(None, e)
+        return total
+
+    started = time.monotonic()
+    for _ in range(n_workers):
+        threading.Thread(target=worker, daemon=True).start()
+
+    done = 0
+    workers_left = n_workers
+    while workers_left:
+        try:
+            kind, i, payload = q.get(timeout=0.1)
+        except queue.Empty:
+            toolkit.processEventsToIdle()
+            continue
+        if kind == "worker_done":
+            workers_left -= 1
+            continue
+        try:
+            if kind == "result":
+                on_result_fn(i, payload)
+            else:
+                on_error_fn(i, payload)
+        except Exception as e:
+            debug_log("run_completion_batch_async: callback failed: %s" % e, context="API")
+        if i is not None:
+            done += 1
+            if on_progress_fn:
+                try:
+                    on_progress_fn(done, total, time.monotonic() - started)
+                except Exception as e:
+                    debug_log("run_completion_batch_async: on_progress_fn failed: %s" % e, context="API")
+        toolkit.processEventsToIdle()
+    return pending.qsize()
@@ -11,6 +11,11 @@ except ImportError:
     EMPTY, VALUE, TEXT, FORMULA = 0, 1, 2, 3
     UNO_AVAILABLE = False
 
+try:
+    from com.sun.star.sheet.FormulaResult import ERROR as FORMULA_RESULT_ERROR
+except ImportError:
+    FORMULA_RESULT_ERROR = 4
+
 logger = logging.getLogger(__name__)
 
 # LibreOffice Calc error types and descriptions
@@ -183,25 +188,13 @@ class ErrorDetector:
                 end_col = addr.EndColumn
                 end_row = addr.EndRow
 
-            errors = []
-
-            for row in range(start_row, end_row + 1):
-                for col in range(start_col, end_col + 1):
-                    cell = sheet.getCellByPosition(col, row)
-
-                    # Only check formula cells
-                    if cell.getType() != FORMULA:
-                        continue
-
-                    error_info = self.get_error_type(cell)
-                    if error_info:
-                        col_str = self.bridge._index_to_column(col)
-                        address = f"{col_str}{row + 1}"
-                        errors.append({
-                            "address": address,
-                            "formula": cell.getFormula(),
-                            "error": error_info,
-                        })
+            try:
+                errors = self._detect_errors_by_query(
+                    sheet, start_col, start_row, end_col, end_row)
+            except Exception as e:
+                logger.debug("Formula error query unavailable (%s), scanning cells.", str(e))
+                errors = self._detect_errors_by_scan(
+                    sheet, start_col, start_row, end_col, end_row)
 
             logger.info(
                 "%d errors detected (range: %s).",
@@ -213,6 +206,61 @@ class ErrorDetector:
             logger.error("Error detection failure: %s", str(e))
             raise
 
+    def _error_entry(self, cell, col: int, row: int, formula: str = None):
+        error_info = self.get_error_type(cell)
+        if not error_info:
+            return None
+        col_str = self.bridge._index_to_column(col)
+        return {
+            "address": f"{col_str}{row + 1}",
+            "formula": formula if formula is not None else cell.getFormula(),
+            "error": error_info,
+        }
+
+    def _detect_errors_by_query(
+        self, sheet, start_col: int, start_row: int, end_col: int, end_row: int
+    ) -> list:
+        """
+        Finds error cells with queryFormulaCells(FormulaResult.ERROR), so only
+        formula cells with an error result are visited; their formulas are read
+        with one getFormulaArray per block.
+
+        Returns:
+            List of error info dictionaries in row-major order.
+        """
+        area = sheet.getCellRangeByPosition(start_col, start_row, end_col, end_row)
+        found = []
+        for addr in area.queryFormulaCells(FORMULA_RESULT_ERROR).getRangeAddresses():
+            block = sheet.getCellRangeByPosition(
+                addr.StartColumn, addr.StartRow, addr.EndColumn, addr.EndRow)
+            for r, formula_row in enumerate(block.getFormulaArray()):
+                for c, formula in enumerate(formula_row):
+                    entry = self._error_entry(
+                        block.getCellByPosition(c, r),
+                        addr.StartColumn + c, addr.StartRow + r, formula)
+                    if entry:
+                        found.append((addr.StartRow + r, addr.StartColumn + c, entry))
+        found.sort(key=lambda item: (item[0], item[1]))
+        return [entry for _, _, entry in found]
+
+    def _detect_errors_by_scan(
+        self, sheet, start_col: int, start_row: int, end_col: int, end_row: int
+    ) -> list:
+        """Cell-by-cell fallback for detect_errors."""
+        errors = []
+        for row in range(start_row, end_row + 1):
+            for col in range(start_col, end_col + 1):
+                cell = sheet.getCellByPosition(col, row)
+
+                # Only check formula cells
+                if cell.getType() != FORMULA:
+                    continue
+
+                entry = self._error_entry(cell, col, row)
+                if entry:
+                    errors.append(entry)
+        return errors
+
     def explain_error(self, address: str) -> dict:
         """
         Explains the error in the specified cell in detail.
@@ -0,0 +1,308 @@
+"""Formula dependency graph - Precedent/dependent index for the formulas of a Calc sheet."""
+
+import logging
+import re
+from collections import deque
+from core.calc_address_utils import column_to_index, format_address
+
+try:
+    from com.sun.star.sheet.CellFlags import FORMULA as FORMULA_FLAG
+except ImportError:
+    FORMULA_FLAG = 16
+
+logger = logging.getLogger(__name__)
+
+# A1 reference in API formula syntax, optionally sheet-qualified ($Sheet2.A1,
+# 'My Sheet'.A1) and optionally a range (A1:B5, Sheet2.A1:Sheet2.B5). Function
+# names such as LOG10( and identifiers are excluded by the look-arounds.
+_SHEET = r"(?:\$?(?:'(?:[^']|'')+'|[A-Za-z_][\w]*)\.)"
+_CELL = r"\$?([A-Za-z]{1,3})\$?(\d+)"
+_REF_RE = re.compile(
+    rf"(?<![\w.$'])({_SHEET})?{_CELL}(?::({_SHEET})?{_CELL})?(?![\w(])"
+)
+_STRING_RE = re.compile(r'"(?:[^"]|"")*"')
+
+
+def _sheet_name(prefix: str):
+    """Returns the sheet name from a "$Sheet." / "'My Sheet'." prefix, or None."""
+    if not prefix:
+        return None
+    name = prefix[:-1].lstrip("$")
+    if name.startswith("'"):
+        name = name[1:-1].replace("''", "'")
+    return name
+
+
+def parse_references(formula: str, own_sheet: str) -> list:
+    """
+    Extracts the cell and range references of a formula.
+
+    Args:
+        formula: Formula text as returned by getFormula() (e.g. "=SUM(A1:B3)*Sheet2.C1").
+        own_sheet: Name of the sheet holding the formula (for unqualified references).
+
+    Returns:
+        List of (sheet, start_col, start_row, end_col, end_row) tuples, in order of
+        appearance, duplicates removed. A single cell has start == end.
+    """
+    # References never occur inside string literals
+    text = _STRING_RE.sub('""', formula or "")
+    refs = []
+    seen = set()
+    for m in _REF_RE.finditer(text):
+        sheet = _sheet_name(m.group(1)) or own_sheet
+        c0, r0 = column_to_index(m.group(2).upper()), int(m.group(3)) - 1
+        if m.group(5):
+            c1, r1 = column_to_index(m.group(5).upper()), int(m.group(6)) - 1
+        else:
+            c1, r1 = c0, r0
+        ref = (sheet, min(c0, c1), min(r0, r1), max(c0, c1), max(r0, r1))
+        if ref not in seen:
+            seen.add(ref)
+            refs.append(ref)
+    return refs
+
+
+class FormulaGraph:
+    """Forward and reverse formula dependencies of one sheet.
+
+    Nodes are (sheet, col, row) tuples. Single-cell references are indexed
+    directly; range references are kept as intervals and expanded into a
+    per-column interval index on the first dependents query, so a lookup
+    costs O(degree) instead of a scan of every formula."""
+
+    def __init__(self, sheet_name: str, formulas: dict, results: dict = None):
+        """
+        FormulaGraph initializer.
+
+        Args:
+            sheet_name: Name of the sheet the formulas belong to.
+            formulas: {(col, row): formula} for every formula cell of the sheet.
+            results: Optional {(col, row): value} of the formula results.
+        """
+        self.sheet_name = sheet_name
+        self.formulas = dict(sorted(formulas.items(), key=lambda kv: (kv[0][1], kv[0][0])))
+        self.results = results or {}
+        self.precedents = {}        # (col, row) -> [ref, ...]
+        self._cell_dependents = {}  # (sheet, col, row) -> [(col, row), ...]
+        self._range_refs = []       # (ref, (col, row)) for multi-cell references
+        self._column_index = None   # (sheet, col) -> [(start_row, end_row, (col, row)), ...]
+
+        for cell, formula in self.formulas.items():
+            refs = parse_references(formula, sheet_name)
+            self.precedents[cell] = refs
+            for ref in refs:
+                sheet, c0, r0, c1, r1 = ref
+                if c0 == c1 and r0 == r1:
+                    self._cell_dependents.setdefault((sheet, c0, r0), []).append(cell)
+                else:
+                    self._range_refs.append((ref, cell))
+
+    @classmethod
+    def from_sheet(cls, sheet):
+        """
+        Builds the graph of a sheet from its formula cells (queryContentCells),
+        reading each block of formula cells with one getFormulaArray/getDataArray.
+
+        Args:
+            sheet: Worksheet.
+
+        Returns:
+            FormulaGraph instance.
+        """
+        formulas = {}
+        results = {}
+        zero_results = []
+        ranges = sheet.queryContentCells(FORMULA_FLAG)
+        for addr in ranges.getRangeAddresses():
+            block = sheet.getCellRangeByPosition(
+                addr.StartColumn, addr.StartRow, addr.EndColumn, addr.EndRow)
+            data = block.getDataArray()
+            for r, (formula_row, data_row) in enumerate(zip(block.getFormulaArray(), data)):
+                for c, (formula, datum) in enumerate(zip(formula_row, data_row)):
+                    cell = (addr.StartColumn + c, addr.StartRow + r)
+                    formulas[cell] = formula
+                    if isinstance(datum, float) and datum == 0:
+                        zero_results.append(cell)
+                    results[cell] = datum
+        # Same value rule as CellInspector.read_cell: zero results use the display string
+        for col, row in zero_results:
+            results[(col, row)] = sheet.getCellByPosition(col, row).getString()
+        return cls(sheet.getName(), formulas, results)
+
+    def _ensure_column_index(self):
+        if self._column_index is None:
+            index = {}
+            for (sheet, c0, r0, c1, r1), cell in self._range_refs:
+                for col in range(c0, c1 + 1):
+                    index.setdefault((sheet, col), []).append((r0, r1, cell))
+            self._column_index = index
+        return self._column_index
+
+    def dependents_of(self, col: int, row: int, sheet: str = None) -> list:
+        """
+        Returns the formula cells of this sheet that reference a cell, directly or
+        through a range.
+
+        Args:
+            col: 0-based column index.
+            row: 0-based row index.
+            sheet: Sheet of the referenced cell (default: this graph's sheet).
+
+        Returns:
+            List of (col, row) tuples in row-major order.
+        """
+        sheet = sheet or self.sheet_name
+        found = set(self._cell_dependents.get((sheet, col, row), ()))
+        for r0, r1, cell in self._ensure_column_index().get((sheet, col), ()):
+            if r0 <= row <= r1:
+                found.add(cell)
+        return sorted(found, key=lambda cell: (cell[1], cell[0]))
+
+    def precedent_cells(self, col: int, row: int) -> list:
+        """Returns the formula cells of this sheet that the formula at (col, row) reads."""
+        cells = []
+        for sheet, c0, r0, c1, r1 in self.precedents.get((col, row), ()):
+            if sheet != self.sheet_name:
+                continue
+            for f_col, f_row in self.formulas_in(c0, r0, c1, r1):
+                cells.append((f_col, f_row))
+        return cells
+
+    def formulas_in(self, c0: int, r0: int, c1: int, r1: int) -> list:
+        """Returns the formula cells inside a rectangle."""
+        if (c1 - c0 + 1) * (r1 - r0 + 1) <= len(self.formulas):
+            return [(c, r) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)
+                    if (c, r) in self.formulas]
+        return [(c, r) for c, r in self.formulas if c0 <= c <= c1 and r0 <= r <= r1]
+
+    def topological_order(self) -> list:
+        """
+        Returns the formula cells ordered so that every formula comes after the
+        formulas it reads (Kahn's algorithm). Cells on a circular reference are
+        appended at the end in sheet order.
+        """
+        reads = {cell: set(self.precedent_cells(*cell)) - {cell} for cell in self.formulas}
+        readers = {}
+        for cell, sources in reads.items():
+            for source in sources:
+                readers.setdefault(source, []).append(cell)
+        pending = {cell: len(sources) for cell, sources in reads.items()}
+        ready = deque(cell for cell in self.formulas if pending[cell] == 0)
+        order = []
+        while ready:
+            cell = ready.popleft()
+            order.append(cell)
+            for reader in readers.get(cell, ()):
+                pending[reader] -= 1
+                if pending[reader] == 0:
+                    ready.append(reader)
+        if len(order) < len(self.formulas):
+            placed = set(order)
+            order.extend(cell for cell in self.formulas if cell not in placed)
+        return order
+
+    def ref_endpoints(self, col: int, row: int) -> list:
+        """
+        Returns the addresses a formula names: each single cell, and the first and
+        last cell of each range ("A1", or "Sheet2.A1" for other sheets).
+        """
+        addresses = []
+        for sheet, c0, r0, c1, r1 in self.precedents.get((col, row), ()):
+            prefix = "" if sheet == self.sheet_name else f"{sheet}."
+            for c, r in ((c0, r0), (c1, r1)):
+                address = prefix + format_address(c, r)
+                if address not in addresses:
+                    addresses.append(address)
+        return addresses
+
+
+def watch_sheet(sheet, on_modified):
+    """
+    Calls on_modified() whenever the sheet's contents change (XModifyListener).
+
+    Args:
+        sheet: Worksheet.
+        on_modified: Callable without arguments.
+
+    Returns:
+        The attached listener (pass it to unwatch_sheet), or None if no listener
+        could be attached.
+    """
+    if not hasattr(sheet, "addModifyListener"):
+        return None
+    try:
+        import unohelper
+        from com.sun.star.util import XModifyListener
+    except ImportError:
+        return None
+
+    class _SheetModifyListener(unohelper.Base, XModifyListener):
+        def modified(self, event):
+            on_modified()
+
+        def disposing(self, event):
+            on_modified()
+
+    listener = _SheetModifyListener()
+    try:
+        sheet.addModifyListener(listener)
+    except Exception:
+        return None
+    return listener
+
+
+def unwatch_sheet(sheet, listener) -> None:
+    """Removes a listener returned by watch_sheet (ignored if the sheet is gone)."""
+    try:
+        sheet.removeModifyListener(listener)
+    except Exception:
+        pass
+
+
+class SheetCache:
+    """
+    Per-sheet values (formula graphs, snapshots) kept until the sheet is modified.
+
+    Sheets are matched by UNO object identity (==), not by name, so renaming,
+    deleting or swapping sheets never serves another sheet's value; a value is
+    also rebuilt if its sheet was renamed since. Sheets that cannot be watched
+    are rebuilt on every call. close() removes the listeners.
+    """
+
+    def __init__(self):
+        self._entries = []  # [sheet, listener, sheet name, value or None]
+
+    def get(self, sheet, build):
+        """
+        Returns the cached value for sheet, calling build(sheet) if there is none.
+
+        Args:
+            sheet: Worksheet.
+            build: Callable taking the sheet and returning the value.
+        """
+        name = sheet.getName()
+        entry = next((e for e in self._entries if e[0] == sheet), None)
+        if entry is not None and entry[3] is not None and entry[2] == name:
+            return entry[3]
+        value = build(sheet)
+        if entry is None:
+            entry = [sheet, None, name, None]
+            # The listener clears this entry, whatever the sheet is called by then
+            entry[1] = watch_sheet(sheet, lambda: entry.__setitem__(3, None))
+            if entry[1] is None:
+                return value
+            self._entries.append(entry)
+        entry[2], entry[3] = name, value
+        return value
+
+    def invalidate(self) -> None:
+        """Drops all cached values; listeners stay attached."""
+        for entry in self._entries:
+            entry[3] = None
+
+    def close(self) -> None:
+        """Drops all cached values and removes the modify listeners."""
+        for sheet, listener, _, _ in self._entries:
+            unwatch_sheet(sheet, listener)
+        self._entries = []
@@ -1,8 +1,8 @@
 """Cell inspector - Reads detailed information of LibreOffice Calc cells."""
 
 import logging
-import re
-from core.calc_address_utils import parse_address
+from core.calc_address_utils import format_address, parse_address
+from core.calc_formula_graph import FormulaGraph, SheetCache
 
 try:
     from com.sun.star.table.CellContentType import EMPTY, VALUE, TEXT, FORMULA
@@ -11,8 +11,16 @@ except ImportError:
     EMPTY, VALUE, TEXT, FORMULA = 0, 1, 2, 3
     UNO_AVAILABLE = False
 
+try:
+    from com.sun.star.sheet.CellFlags import FORMULA as FORMULA_FLAG
+except ImportError:
+    FORMULA_FLAG = 16
+
 logger = logging.getLogger(__name__)
 
+# Ranges read by formulas are expanded into single input cells up to this size
+MAX_EXPANDED_INPUT_CELLS = 10000
+
 
 class CellInspector:
     """Class that examines cell contents and properties."""
@@ -25,6 +33,7 @@ class CellInspector:
             bridge: CalcBridge instance.
         """
         self.bridge = bridge
+        self._formula_graphs = SheetCache()
 
     @staticmethod
     def _cell_type_name(cell_type) -> str:
@@ -155,35 +164,50 @@ class CellInspector:
             logger.error("Cell detailed reading error (%s): %s", address, str(e))
             raise
 
+    def _get_sheet(self, sheet_name: str = None):
+        if sheet_name:
+            return self.bridge.get_active_document().getSheets().getByName(sheet_name)
+        return self.bridge.get_active_sheet()
+
+    def get_formula_graph(self, sheet_name: str = None) -> FormulaGraph:
+        """
+        Returns the formula dependency graph of a sheet.
+
+        The graph is built once and kept until the sheet is modified (a modify
+        listener drops it); sheets that cannot be watched are rebuilt per call.
+
+        Args:
+            sheet_name: Sheet name (active sheet if None).
+
+        Returns:
+            FormulaGraph instance.
+        """
+        return self._formula_graphs.get(self._get_sheet(sheet_name), FormulaGraph.from_sheet)
+
+    def invalidate_formula_graph(self):
+        """Drops all cached formula graphs."""
+        self._formula_graphs.invalidate()
+
+    def close(self):
+        """Drops the cached formula graphs and detaches their sheet listeners."""
+        self._formula_graphs.close()
+
     def get_cell_precedents(self, address: str) -> list:
         """
         Returns cells that the cell depends on (precedents).
 
-        Finds other cells referenced in the formula.
+        Finds other cells referenced in the formula (for ranges, their first
+        and last cell).
 
         Args:
             address: Cell address (e.g. "B2").
 
         Returns:
-            List of precedent cell addresses.
+            List of precedent cell addresses ("Sheet2.A1" for other sheets).
         """
         try:
-            cell = self._get_cell(address)
-            formula = cell.getFormula()
-
-            if not formula:
-                return []
-
-            # Find cell references in the formula
-            references = re.findall(
-                r'\$?([A-Z]+)\$?(\d+)', formula.upper()
-            )
-
-            precedents = []
-            for col_str, row_str in references:
-                ref_address = f"{col_str}{row_str}"
-                if ref_address not in precedents:
-                    precedents.append(ref_address)
+            col, row = parse_address(address)
+            precedents = self.get_formula_graph().ref_endpoints(col, row)
 
             return precedents
 
@@ -197,8 +221,8 @@ class CellInspector:
         """
         Returns cells that depend on this cell (dependents).
 
-        Scans formulas in the used area of the active sheet to find
-        cells referencing this cell.
+        Looks up the formulas of the active sheet that reference this cell,
+        directly or through a range, in the formula dependency graph.
 
         Args:
             address: Cell address (e.g. "A1").
@@ -207,35 +231,11 @@ class CellInspector:
             List of dependent cell addresses.
         """
         try:
-            sheet = self.bridge.get_active_sheet()
-            target = address.strip().upper()
-
-            # Determine the used area of the sheet
-            cursor = sheet.createCursor()
-            cursor.gotoStartOfUsedArea(False)
-            cursor.gotoEndOfUsedArea(True)
-
-            addr = cursor.getRangeAddress()
-            end_col = addr.EndColumn
-            end_row = addr.EndRow
-
-            dependents = []
-
-            # More efficient search: try to find the row/col strings
-            col_target = re.match(r'^([A-Z]+)', target).group(1)
-            row_target = re.match(r'^[A-Z]+(\d+)$', target).group(1)
-            # Pattern matches common A1 references with or without $
-            pattern = rf'\$?{re.escape(col_target)}\$?{re.escape(row_target)}(?![0-9A-Z])'
-
-            for row in range(addr.StartRow, end_row + 1):
-                for col in range(addr.StartColumn, end_col + 1):
-                    cell = sheet.getCellByPosition(col, row)
-                    if cell.getType() == FORMULA:
-                        formula = cell.getFormula().upper()
-                        if re.search(pattern, formula):
-                            dep_col = self.bridge._index_to_column(col)
-                            dep_address = f"{dep_col}{row + 1}"
-                            dependents.append(dep_address)
+            col, row = parse_address(address.strip().upper())
+            dependents = [
+                f"{self.bridge._index_to_column(dep_col)}{dep_row + 1}"
+                for dep_col, dep_row in self.get_formula_graph().dependents_of(col, row)
+            ]
 
             return dependents
 
@@ -245,56 +245,99 @@ class CellInspector:
             )
             raise
 
-    def read_range(self, range_name: str) -> list[list[dict]]:
+    def read_range(self, range_name: str, compact: bool = False):
         """
         Reads values and formulas in a cell range.
 
+        The block is read in bulk with getDataArray()/getFormulaArray() instead
+        of per-cell getters; formula cells are identified with one
+        queryContentCells(FORMULA) call, since getFormula() of a text cell such
+        as "'=== Totals ===" also starts with "=".
+
         Args:
             range_name: Cell range (e.g. "A1:D10", "B2").
+            compact: Return address-free 2D arrays instead of per-cell dicts.
 
         Returns:
             2D list: dict containing {address, value, formula, type} for each cell.
+            With compact=True, a dict {range, values, formulas?}: values is a 2D
+            list (None for empty cells); formulas is a 2D list (None for
+            non-formula cells), present only if the range contains formulas.
         """
         try:
             sheet = self.bridge.get_active_sheet()
 
             # Check if it's a single cell
-            if ":" not in range_name:
+            if ":" not in range_name and not compact:
                 cell_info = self.read_cell(range_name)
                 return [[cell_info]]
 
             cell_range = self.bridge.get_cell_range(sheet, range_name)
             addr = cell_range.getRangeAddress()
-
-            result = []
-            for row in range(addr.StartRow, addr.EndRow + 1):
-                row_data = []
-                for col in range(addr.StartColumn, addr.EndColumn + 1):
-                    cell = sheet.getCellByPosition(col, row)
-                    cell_type = cell.getType()
-
-                    if cell_type == EMPTY:
-                        value = None
-                    elif cell_type == VALUE:
-                        value = cell.getValue()
-                    elif cell_type == TEXT:
-                        value = cell.getString()
-                    elif cell_type == FORMULA:
-                        value = cell.getValue() if cell.getValue() != 0 else cell.getString()
+            data = cell_range.getDataArray()
+            formulas = cell_range.getFormulaArray()
+            formula_cells = set()
+            for block in cell_range.queryContentCells(FORMULA_FLAG).getRangeAddresses():
+                for col in range(block.StartColumn, block.EndColumn + 1):
+                    for row in range(block.StartRow, block.EndRow + 1):
+                        formula_cells.add((col - addr.StartColumn, row - addr.StartRow))
+
+            values = []
+            cell_formulas = []
+            types = []
+            for r, (data_row, formula_row) in enumerate(zip(data, formulas)):
+                value_row, fr_row, type_row = [], [], []
+                for c, (datum, formula) in enumerate(zip(data_row, formula_row)):
+                    if (c, r) in formula_cells:
+                        cell_type = FORMULA
+                        # Same rule as read_cell: numeric result unless 0, else display string
+                        if isinstance(datum, float) and datum != 0:
+                            value = datum
+                        elif isinstance(datum, str):
+                            value = datum
+                        else:
+                            value = sheet.getCellByPosition(
+                                addr.StartColumn + c, addr.StartRow + r).getString()
+                        fr_row.append(formula)
                     else:
-                        value = cell.getString()
-
-                    col_letter = self.bridge._index_to_column(col)
-                    address = f"{col_letter}{row + 1}"
-                    formula = cell.getFormula() if cell_type == FORMULA else None
+                        if isinstance(datum, float):
+                            cell_type, value = VALUE, datum
+                        elif datum == "" and formula == "":
+                            cell_type, value = EMPTY, None
+                        else:
+                            cell_type, value = TEXT, datum
+                        fr_row.append(None)
+                    value_row.append(value)
+                    type_row.append(cell_type)
+                values.append(value_row)
+                cell_formulas.append(fr_row)
+                types.append(type_row)
+
+            if compact:
+                start_col = self.bridge._index_to_column(addr.StartColumn)
+                end_col = self.bridge._index_to_column(addr.EndColumn)
+                result = {
+                    "range": f"{start_col}{addr.StartRow + 1}:{end_col}{addr.EndRow + 1}",
+                    "values": values,
+                }
+                if any(f is not None for row in cell_formulas for f in row):
+                    result["formulas"] = cell_formulas
+                return result
 
-                    row_data.append({
-                        "address": address,
+            col_letters = [self.bridge._index_to_column(col)
+                           for col in range(addr.StartColumn, addr.EndColumn + 1)]
+            result = []
+            for r, (value_row, fr_row, type_row) in enumerate(zip(values, cell_formulas, types)):
+                row_number = addr.StartRow + r + 1
+                result.append([
+                    {
+                        "address": f"{col_letters[c]}{row_number}",
                         "value": value,
                         "formula": formula,
                         "type": self._cell_type_name(cell_type),
-                    })
-                result.append(row_data)
+                    }
+                    for c, (value, formula, cell_type) in enumerate(zip(value_row, fr_row, type_row))
+                ])
 
             return result
 
@@ -313,40 +356,17 @@ class CellInspector:
             Formula list: [{address, formula, value, precedents}, ...]
         """
         try:
-            if sheet_name:
-                doc = self.bridge.get_active_document()
-                sheets = doc.getSheets()
-                sheet = sheets.getByName(sheet_name)
-            else:
-                sheet = self.bridge.get_active_sheet()
-
-            # Find used area
-            cursor = sheet.createCursor()
-            cursor.gotoStartOfUsedArea(False)
-            cursor.gotoEndOfUsedArea(True)
-
-            addr = cursor.getRangeAddress()
+            graph = self.get_formula_graph(sheet_name)
             formulas = []
 
-            for row in range(addr.StartRow, addr.EndRow + 1):
-                for col in range(addr.StartColumn, addr.EndColumn + 1):
-                    cell = sheet.getCellByPosition(col, row)
-                    if cell.getType() == FORMULA:
-                        col_letter = self.bridge._index_to_column(col)
-                        address = f"{col_letter}{row + 1}"
-                        formula = cell.getFormula()
-                        value = cell.getValue() if cell.getValue() != 0 else cell.getString()
-
-                        # Find referenced cells
-                        refs = re.findall(r'\$?([A-Z]+)\$?(\d+)', formula.upper())
-                        precedents = list(set([f"{c}{r}" for c, r in refs]))
-
-                        formulas.append({
-                            "address": address,
-                            "formula": formula,
-                            "value": value,
-                            "precedents": precedents,
-                        })
+            for (col, row), formula in graph.formulas.items():
+                col_letter = self.bridge._index_to_column(col)
+                formulas.append({
+                    "address": f"{col_letter}{row + 1}",
+                    "formula": formula,
+                    "value": graph.results.get((col, row)),
+                    "precedents": graph.ref_endpoints(col, row),
+                })
 
             return formulas
 
@@ -363,10 +383,10 @@ class CellInspector:
 
         Returns:
             Structure analysis: {
-                input_cells: Cells where data is entered (without formulas),
-                output_cells: Result cells (with formulas but not used by another formula),
+                input_cells: Non-formula cells read by formulas (ranges expanded),
+                output_cells: Formula cells no other formula reads (from the graph),
                 intermediate_cells: Intermediate calculation cells,
-                formula_chain: Formula chain (dependency order),
+                formula_chain: Formula chain (topological dependency order),
             }
         """
         try:
@@ -381,30 +401,38 @@ class CellInspector:
                     "summary": "No formulas found on this sheet."
                 }
 
-            # Collect all formula cells and their references
-            formula_cells = {f["address"] for f in formulas}
-            all_precedents = set()
-            for f in formulas:
-                all_precedents.update(f["precedents"])
-
-            # Input cells: Cells referenced by formulas but that don't contains formulas themselves
-            input_cells = list(all_precedents - formula_cells)
-
-            # Output cells: Contain formulas but are not referenced by any other formula
-            referenced_formulas = set()
+            graph = self.get_formula_graph(sheet_name)
+            by_cell = {}
             for f in formulas:
-                for p in f["precedents"]:
-                    if p in formula_cells:
-                        referenced_formulas.add(p)
-
-            output_cells = [f["address"] for f in formulas if f["address"] not in referenced_formulas]
-
-            # Intermediate cells
-            intermediate_cells = list(formula_cells - set(output_cells))
-
-            # Create formula chain
+                col, row = parse_address(f["address"])
+                by_cell[(col, row)] = f
+
+            # Input cells: non-formula cells the formulas read, ranges expanded cell by cell
+            # (a range too large to expand is listed as the range itself)
+            input_cells = set()
+            for sheet, c0, r0, c1, r1 in {ref for refs in graph.precedents.values() for ref in refs}:
+                prefix = "" if sheet == graph.sheet_name else f"{sheet}."
+                if (c1 - c0 + 1) * (r1 - r0 + 1) > MAX_EXPANDED_INPUT_CELLS:
+                    input_cells.add(f"{prefix}{format_address(c0, r0)}:{format_address(c1, r1)}")
+                    continue
+                for row in range(r0, r1 + 1):
+                    for col in range(c0, c1 + 1):
+                        if prefix or (col, row) not in graph.formulas:
+                            input_cells.add(prefix + format_address(col, row))
+
+            # Output cells: formulas no other formula of the sheet reads, directly or through a range
+            output_cells = []
+            intermediate_cells = []
+            for cell, f in by_cell.items():
+                if any(dep != cell for dep in graph.dependents_of(*cell)):
+                    intermediate_cells.append(f["address"])
+                else:
+                    output_cells.append(f["address"])
+
+            # Create formula chain in dependency order (precedent formulas first)
             formula_chain = []
-            for f in formulas:
+            for cell in graph.topological_order():
+                f = by_cell[cell]
                 formula_chain.append({
                     "cell": f["address"],
                     "formula": f["formula"],
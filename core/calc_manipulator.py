@@ -87,6 +87,93 @@ def _parse_formula_or_values_string(s: str):
     return None
 
 
+def _cell_input(value, formulas: bool = True):
+    """
+    Classify a value for writing, with the same rules as per-cell writes.
+
+    Args:
+        value: Value to write.
+        formulas: Treat strings starting with "=" as formulas.
+
+    Returns:
+        ("formula", str) for formulas, else ("data", float or str):
+        numbers and numeric strings become floats, everything else text.
+    """
+    if isinstance(value, str):
+        if formulas and value.startswith("="):
+            return "formula", value
+        try:
+            return "data", float(value)
+        except ValueError:
+            return "data", value
+    if isinstance(value, (int, float)):
+        return "data", float(value)
+    return "data", str(value)
+
+
+def _write_cell(cell, value):
+    """Write one value to one cell (setFormula/setValue/setString)."""
+    kind, content = _cell_input(value)
+    if kind == "formula":
+        cell.setFormula(content)
+    elif isinstance(content, float):
+        cell.setValue(content)
+    else:
+        cell.setString(content)
+
+
+def _write_blocks(sheet, start_col: int, start_row: int, rows, formulas: bool = True) -> int:
+    """
+    Write rows of values (row-major, rows may differ in length) starting at
+    (start_col, start_row) with one setDataArray/setFormulaArray per rectangular
+    block instead of one UNO call per cell.
+
+    Each row is split into runs of formula and non-formula cells; consecutive
+    rows with the same run layout are written together. setDataArray keeps
+    text literal (no number/date guessing), so only formulas go through
+    setFormulaArray. With formulas=False every string is written as text.
+
+    Returns:
+        Number of UNO write calls made.
+    """
+    calls = 0
+    pending = []  # rows of (kind, content) sharing `layout`
+    layout = None
+    block_row = start_row
+
+    def flush():
+        nonlocal calls
+        if not pending:
+            return
+        for kind, c0, c1 in layout:
+            block = tuple(tuple(content for _, content in row[c0:c1]) for row in pending)
+            cell_range = sheet.getCellRangeByPosition(
+                start_col + c0, block_row, start_col + c1 - 1, block_row + len(pending) - 1)
+            if kind == "formula":
+                cell_range.setFormulaArray(block)
+            else:
+                cell_range.setDataArray(block)
+            calls += 1
+
+    for r, values in enumerate(rows):
+        row = [_cell_input(v, formulas) for v in values]
+        runs = []
+        for c, (kind, _) in enumerate(row):
+            if runs and runs[-1][0] == kind:
+                runs[-1][2] = c + 1
+            else:
+                runs.append([kind, c, c + 1])
+        row_layout = [tuple(run) for run in runs]
+        if row_layout != layout:
+            flush()
+            pending = []
+            layout = row_layout
+            block_row = start_row + r
+        pending.append(row)
+    flush()
+    return calls
+
+
 class CellManipulator:
     """Class that manages data writing and style application to cells."""
 
@@ -881,32 +968,12 @@ class CellManipulator:
                 # Single value repeated for all cells
                 values = [formula_or_values] * total_cells
 
-            # Write to each cell in the range
-            cell_idx = 0
-            for row in range(start[1], end[1] + 1):
-                for col in range(start[0], end[0] + 1):
-                    cell = sheet.getCellByPosition(col, row)
-                    value = values[cell_idx]
-
-                    if isinstance(value, str):
-                        if value.startswith("="):
-                            # Write as formula
-                            cell.setFormula(value)
-                        else:
-                            # Try to convert to number, otherwise text
-                            try:
-                                num = float(value)
-                                cell.setValue(num)
-                            except ValueError:
-                                cell.setString(value)
-                    elif isinstance(value, (int, float)):
-                        # Write as number
-                        cell.setValue(value)
-                    else:
-                        # Write as text
-                        cell.setString(str(value))
-
-                    cell_idx += 1
+            if total_cells == 1:
+                _write_cell(sheet.getCellByPosition(start[0], start[1]), values[0])
+            else:
+                # Row-major rows, written as a few rectangular blocks
+                rows = [values[r * num_cols:(r + 1) * num_cols] for r in range(num_rows)]
+                _write_blocks(sheet, start[0], start[1], rows)
 
             logger.info("Range %s filled with %d values.", range_str.upper(), len(values))
             return f"Range {range_str} filled with {len(values)} values."
@@ -950,17 +1017,9 @@ class CellManipulator:
             total_rows = len(rows)
             total_cols = max(len(r) for r in rows) if rows else 0
 
-            for r_idx, row in enumerate(rows):
-                for c_idx, cell_value in enumerate(row):
-                    col = col_start + c_idx
-                    row = row_start + r_idx
-                    cell = sheet.getCellByPosition(col, row)
-                    # Try to convert to number, otherwise treat as string
-                    try:
-                        num = float(cell_value)
-                        cell.setValue(num)
-                    except ValueError:
-                        cell.setString(cell_value)
+            # Bulk write: one setDataArray per run of equal-length rows. CSV fields
+            # are numbers or text, never formulas.
+            _write_blocks(sheet, col_start, row_start, rows, formulas=False)
 
             range_imported = f"{target_cell}:{self.bridge._index_to_column(col_start + total_cols - 1)}{row_start + total_rows}"
             logger.info("CSV imported to range %s.", range_imported)
@@ -11,9 +11,144 @@ except ImportError:
     EMPTY, VALUE, TEXT, FORMULA = 0, 1, 2, 3
     UNO_AVAILABLE = False
 
+try:
+    from com.sun.star.sheet.CellFlags import FORMULA as FORMULA_FLAG
+except ImportError:
+    FORMULA_FLAG = 16
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from core.calc_formula_graph import SheetCache
+
 logger = logging.getLogger(__name__)
 
 
+class SheetSnapshot:
+    """In-memory copy of a sheet's used area (from A1), read with a few bulk calls.
+
+    Holds an occupancy mask and the numeric value of each cell so region
+    detection, empty-cell search and column statistics need no per-cell UNO
+    calls. Uses NumPy arrays when NumPy is importable, nested lists otherwise."""
+
+    def __init__(self, sheet_name: str, data, formulas, formula_cells):
+        """
+        SheetSnapshot initializer.
+
+        Args:
+            sheet_name: Name of the captured sheet.
+            data: 2D tuple from getDataArray() of the used area.
+            formulas: 2D tuple from getFormulaArray() of the same area.
+            formula_cells: Set of (col, row) positions of the formula cells
+                (a text cell entered as "'=x" also has a formula starting with "=").
+        """
+        self.sheet_name = sheet_name
+        self.row_count = len(data)
+        self.col_count = len(data[0]) if data else 0
+
+        filled = []
+        numbers = []
+        for r, (data_row, formula_row) in enumerate(zip(data, formulas)):
+            filled_row = []
+            number_row = []
+            for c, (datum, formula) in enumerate(zip(data_row, formula_row)):
+                is_formula = (c, r) in formula_cells
+                filled_row.append(is_formula or datum != "" or formula != "")
+                if is_formula:
+                    # cell.getValue() of a formula: its numeric result, 0 for text results
+                    number_row.append(datum if isinstance(datum, float) else 0.0)
+                elif isinstance(datum, float):
+                    number_row.append(datum)
+                else:
+                    number_row.append(None)
+            filled.append(filled_row)
+            numbers.append(number_row)
+
+        if np is not None and self.row_count and self.col_count:
+            self._filled = np.array(filled, dtype=bool)
+            self._has_number = np.array([[n is not None for n in row] for row in numbers], dtype=bool)
+            self._numbers = np.array([[n if n is not None else 0.0 for n in row] for row in numbers],
+                                     dtype=float)
+        else:
+            self._filled = filled
+            self._has_number = None
+            self._numbers = numbers
+
+    @classmethod
+    def capture(cls, sheet):
+        """
+        Reads the used area of a sheet (from A1 to the end of the used area).
+
+        Args:
+            sheet: Worksheet.
+
+        Returns:
+            SheetSnapshot instance.
+        """
+        cursor = sheet.createCursor()
+        cursor.gotoStartOfUsedArea(False)
+        cursor.gotoEndOfUsedArea(True)
+        range_addr = cursor.getRangeAddress()
+        area = sheet.getCellRangeByPosition(0, 0, range_addr.EndColumn, range_addr.EndRow)
+        formula_cells = set()
+        for block in area.queryContentCells(FORMULA_FLAG).getRangeAddresses():
+            for col in range(block.StartColumn, block.EndColumn + 1):
+                for row in range(block.StartRow, block.EndRow + 1):
+                    formula_cells.add((col, row))
+        return cls(sheet.getName(), area.getDataArray(), area.getFormulaArray(), formula_cells)
+
+    @property
+    def uses_numpy(self) -> bool:
+        return self._has_number is not None
+
+    def is_filled(self, col: int, row: int) -> bool:
+        """Returns True if the cell is not empty (cells outside the snapshot are empty)."""
+        if not (0 <= row < self.row_count and 0 <= col < self.col_count):
+            return False
+        return bool(self._filled[row][col])
+
+    def filled_rows(self) -> list:
+        """Returns one bool per row: True if the row has any non-empty cell."""
+        if self.uses_numpy:
+            return self._filled.any(axis=1).tolist()
+        return [any(row) for row in self._filled]
+
+    def column_bounds(self, start_row: int, end_row: int):
+        """
+        Returns the first and last non-empty column within rows start_row..end_row.
+
+        Returns:
+            (min_col, max_col) tuple, or None if the rows are empty.
+        """
+        if self.uses_numpy:
+            cols = np.flatnonzero(self._filled[start_row:end_row + 1].any(axis=0))
+            if cols.size == 0:
+                return None
+            return int(cols[0]), int(cols[-1])
+        cols = [c for c in range(self.col_count)
+                if any(self._filled[r][c] for r in range(start_row, end_row + 1))]
+        if not cols:
+            return None
+        return cols[0], cols[-1]
+
+    def empty_cells(self, start_col: int, start_row: int, end_col: int, end_row: int) -> list:
+        """Returns (col, row) of every empty cell in the rectangle, row by row."""
+        return [(col, row)
+                for row in range(start_row, end_row + 1)
+                for col in range(start_col, end_col + 1)
+                if not self.is_filled(col, row)]
+
+    def column_numbers(self, col: int) -> list:
+        """Returns the numeric values of a column (value cells and formula results)."""
+        if not 0 <= col < self.col_count:
+            return []
+        if self.uses_numpy:
+            return self._numbers[self._has_number[:, col], col].tolist()
+        return [row[col] for row in self._numbers if row[col] is not None]
+
+
 class SheetAnalyzer:
     """Class that analyzes the structure and data of a worksheet."""
 
@@ -25,6 +160,33 @@ class SheetAnalyzer:
             bridge: CalcBridge instance.
         """
         self.bridge = bridge
+        self._snapshots = SheetCache()
+
+    def get_snapshot(self, sheet=None) -> SheetSnapshot:
+        """
+        Returns a snapshot of the sheet's used area.
+
+        The snapshot is kept until the sheet is modified (a modify listener drops
+        it, whoever made the edit); sheets that cannot be watched are captured
+        per call.
+
+        Args:
+            sheet: Worksheet (default: active sheet).
+
+        Returns:
+            SheetSnapshot instance.
+        """
+        if sheet is None:
+            sheet = self.bridge.get_active_sheet()
+        return self._snapshots.get(sheet, SheetSnapshot.capture)
+
+    def invalidate_snapshot(self):
+        """Drops all cached snapshots."""
+        self._snapshots.invalidate()
+
+    def close(self):
+        """Drops the cached snapshots and detaches their sheet listeners."""
+        self._snapshots.close()
 
     def get_sheet_summary(self, sheet_name=None) -> dict:
         """
@@ -97,48 +259,28 @@ class SheetAnalyzer:
             - col_count: Number of columns
         """
         try:
-            sheet = self.bridge.get_active_sheet()
-            cursor = sheet.createCursor()
-            cursor.gotoStartOfUsedArea(False)
-            cursor.gotoEndOfUsedArea(True)
-
-            range_addr = cursor.getRangeAddress()
-            end_col = range_addr.EndColumn
-            end_row = range_addr.EndRow
-
-            # Check occupancy by row
-            row_empty = []
-            for row in range(end_row + 1):
-                is_empty = True
-                for col in range(end_col + 1):
-                    cell = sheet.getCellByPosition(col, row)
-                    if cell.getType() != EMPTY:
-                        is_empty = False
-                        break
-                row_empty.append(is_empty)
+            snap = self.get_snapshot()
+            row_filled = snap.filled_rows()
+            end_row = len(row_filled) - 1
 
             # Separate regions according to empty rows
             regions = []
             region_start = None
 
-            for row in range(len(row_empty)):
-                if not row_empty[row]:
+            for row in range(len(row_filled)):
+                if row_filled[row]:
                     if region_start is None:
                         region_start = row
                 elif region_start is not None:
                     # End of region - find column boundaries for this region
-                    region = self._find_region_bounds(
-                        sheet, region_start, row - 1, end_col
-                    )
+                    region = self._find_region_bounds(snap, region_start, row - 1)
                     if region:
                         regions.append(region)
                     region_start = None
 
             # Last region
             if region_start is not None:
-                region = self._find_region_bounds(
-                    sheet, region_start, end_row, end_col
-                )
+                region = self._find_region_bounds(snap, region_start, end_row)
                 if region:
                     regions.append(region)
 
@@ -148,33 +290,22 @@ class SheetAnalyzer:
             logger.error("Data region detection error: %s", str(e))
             raise
 
-    def _find_region_bounds(
-        self, sheet, start_row: int, end_row: int, max_col: int
-    ) -> dict:
+    def _find_region_bounds(self, snap, start_row: int, end_row: int) -> dict:
         """
         Determines the column boundaries of a data region.
 
         Args:
-            sheet: Worksheet.
+            snap: SheetSnapshot of the sheet.
             start_row: Start row.
             end_row: End row.
-            max_col: Maximum column index.
 
         Returns:
             Region info dictionary or None.
         """
-        min_col = max_col
-        actual_max_col = 0
-
-        for row in range(start_row, end_row + 1):
-            for col in range(max_col + 1):
-                cell = sheet.getCellByPosition(col, row)
-                if cell.getType() != EMPTY:
-                    min_col = min(min_col, col)
-                    actual_max_col = max(actual_max_col, col)
-
-        if actual_max_col < min_col:
+        bounds = snap.column_bounds(start_row, end_row)
+        if bounds is None:
             return None
+        min_col, actual_max_col = bounds
 
         start_col_str = self.bridge._index_to_column(min_col)
         end_col_str = self.bridge._index_to_column(actual_max_col)
@@ -196,16 +327,13 @@ class SheetAnalyzer:
             List of empty cell addresses.
         """
         try:
-            sheet = self.bridge.get_active_sheet()
             start, end = self.bridge.parse_range_string(range_str)
+            snap = self.get_snapshot()
 
-            empty_cells = []
-            for row in range(start[1], end[1] + 1):
-                for col in range(start[0], end[0] + 1):
-                    cell = sheet.getCellByPosition(col, row)
-                    if cell.getType() == EMPTY:
-                        col_str = self.bridge._index_to_column(col)
-                        empty_cells.append(f"{col_str}{row + 1}")
+            empty_cells = [
+                f"{self.bridge._index_to_column(col)}{row + 1}"
+                for col, row in snap.empty_cells(start[0], start[1], end[0], end[1])
+            ]
 
             return empty_cells
 
@@ -233,28 +361,8 @@ class SheetAnalyzer:
             - std: Standard deviation
         """
         try:
-            sheet = self.bridge.get_active_sheet()
             col_index = self.bridge._column_to_index(col_letter.upper())
-
-            cursor = sheet.createCursor()
-            cursor.gotoStartOfUsedArea(False)
-            cursor.gotoEndOfUsedArea(True)
-            end_row = cursor.getRangeAddress().EndRow
-
-            values = []
-            for row in range(end_row + 1):
-                cell = sheet.getCellByPosition(col_index, row)
-                cell_type = cell.getType()
-                if cell_type == VALUE:
-                    values.append(cell.getValue())
-                elif cell_type == FORMULA:
-                     # For formulas, we can try to get the current value
-                    try:
-                        val = cell.getValue()
-                        # Often Calc returns 0 for non-numeric formulas, but we want to exclude errors if possible
-                        values.append(val)
-                    except Exception:
-                        pass
+            values = self.get_snapshot().column_numbers(col_index)
 
             if not values:
                 return {
@@ -591,3 +591,85 @@ def run_calc_integration_tests(ctx, model=None):
         log.append("CRITICAL (integration): %s" % e)
 
     return passed, failed, log
+
+
+def run_calc_write_benchmark(ctx, model=None, sizes=(1000, 10000, 100000)):
+    """
+    Benchmark cell-by-cell writes against bulk setDataArray/setFormulaArray writes.
+    Each size is written to a fresh sheet both ways (10 columns: numbers, text and
+    one formula column) and the results are compared.
+    ctx: UNO ComponentContext. model: optional XSpreadsheetDocument; if None or not Calc,
+    a new hidden doc is created and closed afterwards.
+    Returns (passed_count, failed_count, list of message strings).
+    """
+    import time
+    import uno
+    from core.calc_manipulator import _write_blocks, _write_cell
+    from core.calc_address_utils import index_to_column
+
+    log = []
+    passed = 0
+    failed = 0
+    cols = 10
+    own_doc = False
+    try:
+        doc = model
+        if doc is None or not hasattr(doc, "getSheets"):
+            smgr = ctx.getServiceManager()
+            desktop = smgr.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+            hidden = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+            hidden.Name = "Hidden"
+            hidden.Value = True
+            doc = desktop.loadComponentFromURL("private:factory/scalc", "_blank", 0, (hidden,))
+            own_doc = True
+        sheets = doc.getSheets()
+
+        for n in sizes:
+            rows = []
+            for r in range(max(1, n // cols)):
+                row = []
+                for c in range(cols - 1):
+                    row.append(r * cols + c if c % 2 == 0 else "t%d_%d" % (r, c))
+                row.append("=%s%d*2" % (index_to_column(0), r + 1))
+                rows.append(row)
+
+            timings = {}
+            arrays = {}
+            for method in ("cell", "bulk"):
+                name = "bench_%s_%d" % (method, n)
+                if sheets.hasByName(name):
+                    sheets.removeByName(name)
+                sheets.insertNewByName(name, sheets.getCount())
+                sheet = sheets.getByName(name)
+                t0 = time.perf_counter()
+                if method == "cell":
+                    for r, row in enumerate(rows):
+                        for c, value in enumerate(row):
+                            _write_cell(sheet.getCellByPosition(c, r), value)
+                else:
+                    _write_blocks(sheet, 0, 0, rows)
+                timings[method] = time.perf_counter() - t0
+                arrays[method] = sheet.getCellRangeByPosition(0, 0, cols - 1, len(rows) - 1).getDataArray()
+                sheets.removeByName(name)
+
+            speedup = timings["cell"] / timings["bulk"] if timings["bulk"] > 0 else float("inf")
+            msg = "%d cells: cell-by-cell %.3fs, bulk %.3fs (x%.1f)" % (
+                len(rows) * cols, timings["cell"], timings["bulk"], speedup)
+            debug_log("write benchmark: " + msg, context="CalcTests")
+            if arrays["cell"] == arrays["bulk"]:
+                passed += 1
+                log.append("OK: " + msg)
+            else:
+                failed += 1
+                log.append("FAIL: %s; bulk result differs from cell-by-cell" % msg)
+    except Exception as e:
+        failed += 1
+        log.append("CRITICAL (benchmark): %s" % e)
+    finally:
+        if own_doc:
+            try:
+                doc.close(True)
+            except Exception:
+                pass
+
+    return passed, failed, log
@@ -24,7 +24,11 @@ CALC_TOOLS = [
                         "type": ["string", "array"],
                         "items": {"type": "string"},
                         "description": "Cell range(s) (e.g. A1:D10, Sheet1.A1:C5) or list of ranges/cells for non-contiguous areas.",
-                    }
+                    },
+                    "compact": {
+                        "type": "boolean",
+                        "description": "Return {range, values, formulas} 2D arrays without per-cell addresses. Use for large ranges.",
+                    },
                 },
                 "required": ["range_name"],
             },
@@ -297,6 +301,9 @@ _error_detector = None
 def _get_tools(doc):
     global _bridge, _inspector, _manipulator, _analyzer, _error_detector
     if _bridge is None or _bridge.doc != doc:
+        if _inspector is not None:
+            _inspector.close()
+            _analyzer.close()
         _bridge = CalcBridge(doc)
         _inspector = CellInspector(_bridge)
         _manipulator = CellManipulator(_bridge)
@@ -327,19 +334,26 @@ def _parse_color(color_str):
             return None
     return None
 
+# Tools that only read the sheet; any other tool drops the cached snapshot and formula graphs.
+_READ_ONLY_TOOLS = ("read_cell_range", "get_sheet_summary", "detect_and_explain_errors", "list_sheets")
+
 def execute_calc_tool(tool_name, arguments, doc, ctx=None):
     """Execute a Calc tool by name. Returns JSON result string."""
     tools = _get_tools(doc)
+    if tool_name not in _READ_ONLY_TOOLS:
+        tools["analyzer"].invalidate_snapshot()
+        tools["inspector"].invalidate_formula_graph()
     agent_log("calc_tools.py:execute_calc_tool", "Tool call", data={"tool": tool_name, "arguments": arguments})
     
     try:
         if tool_name == "read_cell_range":
             rn = arguments["range_name"]
+            compact = bool(arguments.get("compact", False))
             if isinstance(rn, list):
-                results = [tools["inspector"].read_range(r) for r in rn]
+                results = [tools["inspector"].read_range(r, compact=compact) for r in rn]
                 return json.dumps({"status": "ok", "result": results})
             else:
-                result = tools["inspector"].read_range(rn)
+                result = tools["inspector"].read_range(rn, compact=compact)
                 return json.dumps({"status": "ok", "result": result})
             
         elif tool_name == "set_cell_style":
@@ -3,7 +3,12 @@ Configuration logic for LocalWriter.
 Reads/writes localwriter.json in LibreOffice's user config directory.
 """
 import os
+import copy
 import json
+import threading
+import time
+from contextlib import contextmanager
+
 import uno
 from .default_models import DEFAULT_MODELS
 
@@ -33,14 +38,21 @@ ENDPOINT_PRESETS = [
 
 
 def _config_path(ctx):
-    """Return the absolute path to localwriter.json."""
-    sm = ctx.getServiceManager()
-    path_settings = sm.createInstanceWithContext(
-        "com.sun.star.util.PathSettings", ctx)
-    user_config_path = getattr(path_settings, "UserConfig", "")
-    if user_config_path and str(user_config_path).startswith("file://"):
-        user_config_path = str(uno.fileUrlToSystemPath(user_config_path))
-    return os.path.join(user_config_path, CONFIG_FILENAME)
+    """Return the absolute path to localwriter.json. The UserConfig directory
+    does not change while LibreOffice runs, so it is resolved only once."""
+    global _config_path_cached
+    if _config_path_cached is None:
+        sm = ctx.getServiceManager()
+        path_settings = sm.createInstanceWithContext(
+            "com.sun.star.util.PathSettings", ctx)
+        user_config_path = getattr(path_settings, "UserConfig", "")
+        if user_config_path and str(user_config_path).startswith("file://"):
+            user_config_path = str(uno.fileUrlToSystemPath(user_config_path))
+        _config_path_cached = os.path.join(user_config_path, CONFIG_FILENAME)
+    return _config_path_cached
+
+
+_config_path_cached = None
 
 
 def user_config_dir(ctx):
@@ -54,29 +66,156 @@ def user_config_dir(ctx):
         return None
 
 
+class _ConfigStore:
+    """Process-wide in-memory copy of localwriter.json.
+
+    Lookups are dict reads. The file is stat'ed at most every CHECK_INTERVAL
+    seconds and re-parsed only when its mtime or size changed (edited by hand or
+    by another process). Writes go to a temp file that replaces the original
+    (os.replace), so readers never see a half-written file; inside batch()
+    they are deferred to one write when the outermost block exits."""
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._path = None
+        self._data = {}
+        self._stamp = None       # (mtime_ns, size) of the file we last read or wrote
+        self._checked = 0.0      # monotonic time of the last stat
+        self._batch_depth = 0
+        self._dirty = False
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _refresh(self, path):
+        """Reload from disk if the file changed. Caller holds the lock."""
+        now = time.monotonic()
+        if path == self._path and (self._dirty or now - self._checked < self.CHECK_INTERVAL):
+            return
+        self._checked = now
+        stamp = self._stat(path)
+        if path == self._path and stamp == self._stamp:
+            return
+        data = {}
+        if stamp is not None:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (IOError, ValueError):
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+        self._path, self._data, self._stamp = path, data, stamp
+
+    def get(self, path, key, default):
+        with self._lock:
+            self._refresh(path)
+            value = self._data.get(key, default)
+        # Callers may mutate returned lists/dicts (LRU lists, api_keys_by_endpoint)
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def as_dict(self, path):
+        with self._lock:
+            self._refresh(path)
+            return copy.deepcopy(self._data)
+
+    def update(self, path, changes, removals=()):
+        with self._lock:
+            # Pick up external edits before writing so they are not overwritten
+            if not self._dirty:
+                self._checked = 0.0
+            self._refresh(path)
+            changes = {k: v for k, v in changes.items() if k not in self._data or self._data[k] != v}
+            removals = [k for k in removals if k in self._data]
+            if not changes and not removals:
+                return
+            for key, value in changes.items():
+                self._data[key] = copy.deepcopy(value)
+            for key in removals:
+                self._data.pop(key, None)
+            self._dirty = True
+            if self._batch_depth == 0:
+                self._write()
+
+    def _write(self):
+        """Atomically write the cached dict. Caller holds the lock."""
+        path = self._path
+        tmp = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=4)
+            os.replace(tmp, path)
+            self._stamp = self._stat(path)
+            self._checked = time.monotonic()
+            self._dirty = False
+        except (IOError, OSError) as e:
+            from .logging import debug_log
+            debug_log("Error writing to %s: %s" % (path, e), context="Config")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            # Keep the in-memory value; re-read the file on the next lookup
+            self._dirty = False
+            self._checked = 0.0
+
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self._write()
+
+    def invalidate(self):
+        with self._lock:
+            self._path = None
+            self._stamp = None
+            self._data = {}
+            self._dirty = False
+
+
+_store = _ConfigStore()
+
+
 def get_config(ctx, key, default):
     """Get a config value by key. Returns default if missing or on error."""
-    config_file_path = _config_path(ctx)
-    if not os.path.exists(config_file_path):
-        return default
-    try:
-        with open(config_file_path, "r", encoding="utf-8") as f:
-            config_data = json.load(f)
-    except (IOError, json.JSONDecodeError):
-        return default
-    return config_data.get(key, default)
+    return _store.get(_config_path(ctx), key, default)
 
 
 def get_config_dict(ctx):
     """Return the full config as a dict. Returns {} if missing or on error."""
-    config_file_path = _config_path(ctx)
-    if not os.path.exists(config_file_path):
-        return {}
-    try:
-        with open(config_file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (IOError, json.JSONDecodeError):
-        return {}
+    return _store.as_dict(_config_path(ctx))
+
+
+def get_config_bool(ctx, key, default=False):
+    """Get a config value parsed with as_bool."""
+    return as_bool(get_config(ctx, key, default))
+
+
+def get_config_int(ctx, key, default=0):
+    """Get a config value as int; default if missing or not a number."""
+    return _safe_int(get_config(ctx, key, default), default)
+
+
+def get_config_float(ctx, key, default=0.0):
+    """Get a config value as float; default if missing or not a number."""
+    return _safe_float(get_config(ctx, key, default), default)
+
+
+def get_config_str(ctx, key, default=""):
+    """Get a config value as a stripped string."""
+    value = get_config(ctx, key, default)
+    return default if value is None else str(value).strip()
 
 
 def get_current_endpoint(ctx):
@@ -85,42 +224,27 @@ def get_current_endpoint(ctx):
 
 
 def set_config(ctx, key, value):
-    """Set a config key to value. Creates file if needed."""
-    config_file_path = _config_path(ctx)
-    if os.path.exists(config_file_path):
-        try:
-            with open(config_file_path, "r", encoding="utf-8") as f:
-                config_data = json.load(f)
-        except (IOError, json.JSONDecodeError):
-            config_data = {}
-    else:
-        config_data = {}
-    config_data[key] = value
-    try:
-        with open(config_file_path, "w", encoding="utf-8") as f:
-            json.dump(config_data, f, indent=4)
-    except IOError as e:
-        from .logging import debug_log
-        debug_log("Error writing to %s: %s" % (config_file_path, e), context="Config")
+    """Set a config key to value. Creates file if needed; no write if the value
+    is unchanged. Inside config_batch() the file is written once, when the batch ends."""
+    _store.update(_config_path(ctx), {key: value})
 
 
 def remove_config(ctx, key):
     """Remove a config key. Used e.g. to delete legacy api_key after migration."""
-    config_file_path = _config_path(ctx)
-    if not os.path.exists(config_file_path):
-        return
-    try:
-        with open(config_file_path, "r", encoding="utf-8") as f:
-            config_data = json.load(f)
-    except (IOError, json.JSONDecodeError):
-        return
-    config_data.pop(key, None)
-    try:
-        with open(config_file_path, "w", encoding="utf-8") as f:
-            json.dump(config_data, f, indent=4)
-    except IOError as e:
-        from .logging import debug_log
-        debug_log("Error writing to %s: %s" % (config_file_path, e), context="Config")
+    _store.update(_config_path(ctx), {}, removals=(key,))
+
+
+def config_batch(ctx=None):
+    """Context manager: set_config/remove_config calls inside the block are
+    written to localwriter.json in one atomic write when it exits."""
+    return _store.batch()
+
+
+def invalidate_config_cache():
+    """Drop the in-memory config; the next lookup re-reads localwriter.json."""
+    global _config_path_cached
+    _config_path_cached = None
+    _store.invalidate()
 
 
 # Listeners are called when config is changed (e.g. after Settings dialog).
@@ -185,6 +309,36 @@ def get_provider_from_endpoint(endpoint):
     return None
 
 
+# Default number of concurrent requests for Calc Extend/Edit Selection batches.
+# Local servers (Ollama, llama.cpp, ...) usually serve one or two slots; cloud APIs take more.
+BATCH_CONCURRENCY_LOCAL = 2
+BATCH_CONCURRENCY_REMOTE = 6
+
+
+def is_local_endpoint(endpoint):
+    """Return True if endpoint points at this machine (localhost / loopback)."""
+    from urllib.parse import urlparse
+    url = _normalize_endpoint_url(endpoint)
+    if url and "://" not in url:
+        url = "http://" + url
+    try:
+        host = (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return False
+    return host in ("localhost", "::1", "0.0.0.0") or host.startswith("127.")
+
+
+def get_batch_concurrency(ctx, endpoint=None):
+    """Concurrent requests for batched per-cell completions: config calc_batch_concurrency
+    if set (> 0), else a default based on whether the endpoint is local."""
+    configured = _safe_int(get_config(ctx, "calc_batch_concurrency", 0), 0)
+    if configured > 0:
+        return configured
+    if endpoint is None:
+        endpoint = get_current_endpoint(ctx)
+    return BATCH_CONCURRENCY_LOCAL if is_local_endpoint(endpoint) else BATCH_CONCURRENCY_REMOTE
+
+
 def populate_combobox_with_lru(ctx, ctrl, current_val, lru_key, endpoint, strict=False):
     """Helper to populate a combobox with values from an LRU list in config.
     LRU is scoped to the provided endpoint.
@@ -397,7 +551,7 @@ def get_api_config(ctx):
     """Build API config dict from ctx for LlmClient. Pass to LlmClient(config, ctx)."""
     endpoint = str(get_config(ctx, "endpoint", "http://127.0.0.1:5000")).rstrip("/")
     is_openwebui = (
-        as_bool(get_config(ctx, "is_openwebui", False))
+        get_config_bool(ctx, "is_openwebui", False)
         or "open-webui" in endpoint.lower()
         or "openwebui" in endpoint.lower()
     )
@@ -411,11 +565,13 @@ def get_api_config(ctx):
         "api_type": str(get_config(ctx, "api_type", "chat")).lower(),
         "is_openwebui": is_openwebui,
         "is_openrouter": is_openrouter,
-        "openai_compatibility": as_bool(get_config(ctx, "openai_compatibility", True)),
-        "temperature": _safe_float(get_config(ctx, "temperature", 0.5), 0.5),
+        "openai_compatibility": get_config_bool(ctx, "openai_compatibility", True),
+        "temperature": get_config_float(ctx, "temperature", 0.5),
         "seed": get_config(ctx, "seed", ""),
-        "request_timeout": _safe_int(get_config(ctx, "request_timeout", 120), 120),
-        "chat_max_tool_rounds": _safe_int(get_config(ctx, "chat_max_tool_rounds", 5), 5),
+        "request_timeout": get_config_int(ctx, "request_timeout", 120),
+        "chat_max_tool_rounds": get_config_int(ctx, "chat_max_tool_rounds", 5),
+        "http_max_connections_per_host": get_config_int(ctx, "http_max_connections_per_host", 8),
+        "http_idle_timeout": get_config_float(ctx, "http_idle_timeout", 60.0),
     }
 
 
@@ -0,0 +1,241 @@
+"""Pool of reusable hidden Writer documents.
+
+Exporting a selection/range to Markdown/HTML and rendering markup to plain text
+both need a scratch Writer document. Creating one (loadComponentFromURL with
+Hidden=True) and closing it again dominates those calls, so documents are kept
+here, cleared after each use and handed out again. The pool is filled lazily:
+schedule_warmup() creates documents one at a time on the main thread (via
+com.sun.star.awt.AsyncCallback) a few seconds after the sidebar starts, and the
+idle documents are closed when the office terminates.
+"""
+import threading
+import contextlib
+
+from core.logging import debug_log
+
+POOL_SIZE = 2
+WARMUP_DELAY = 5.0
+
+
+def _create_hidden_writer(ctx):
+    from core.format_support import _create_property_value
+    smgr = ctx.getServiceManager()
+    desktop = smgr.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+    load_props = (_create_property_value("Hidden", True),)
+    doc = desktop.loadComponentFromURL("private:factory/swriter", "_default", 0, load_props)
+    if doc is not None and not hasattr(doc, "getText"):
+        _close(doc)
+        return None
+    return doc
+
+
+def _close(doc):
+    try:
+        doc.close(True)
+    except Exception:
+        pass
+
+
+def _dispose_all(container):
+    """Dispose every element of an indexed container (tables, sections, bookmarks)."""
+    while container.getCount():
+        count = container.getCount()
+        container.getByIndex(0).dispose()
+        if container.getCount() >= count:
+            raise RuntimeError("element could not be removed")
+
+
+def _remove_user_styles(doc):
+    # A filter import (insertDocumentFromURL) brings its own styles along
+    families = doc.getStyleFamilies()
+    for family_name in families.getElementNames():
+        family = families.getByName(family_name)
+        for name in family.getElementNames():
+            if family.getByName(name).isUserDefined():
+                family.removeByName(name)
+
+
+def _reset(doc):
+    """Return doc to an empty default state: no tables, sections, bookmarks, shapes/
+    frames, text, footnotes/endnotes, user-defined styles, direct formatting or
+    undo history. Returns False if that could not be verified."""
+    try:
+        _dispose_all(doc.getTextTables())
+        _dispose_all(doc.getTextSections())
+        _dispose_all(doc.getBookmarks())
+        draw_page = doc.getDrawPage()
+        while draw_page.getCount():
+            draw_page.remove(draw_page.getByIndex(0))
+        text = doc.getText()
+        cursor = text.createTextCursor()
+        cursor.gotoStart(False)
+        cursor.gotoEnd(True)
+        cursor.setString("")
+        cursor.setAllPropertiesToDefault()
+        cursor.setPropertyValue("ParaStyleName", "Standard")
+        _remove_user_styles(doc)
+        # Notes are anchored in the text, so clearing it must have removed them
+        if text.getString() or doc.getFootnotes().getCount() or doc.getEndnotes().getCount():
+            return False
+        doc.getUndoManager().clear()
+        doc.setModified(False)
+        return True
+    except Exception as e:
+        debug_log("doc_pool: reset failed, discarding document: %s" % e, context="DocPool")
+        return False
+
+
+class HiddenDocumentPool:
+    """Up to size idle hidden Writer documents. acquire() is used on the main thread;
+    the lock only guards the idle list against warm-up and shutdown."""
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._docs = []  # every document owned by the pool, idle or in use
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    def _new(self, ctx):
+        doc = _create_hidden_writer(ctx)
+        if doc is not None:
+            self.stats["created"] += 1
+            self._docs.append(doc)
+        return doc
+
+    def _forget(self, doc):
+        self._docs = [d for d in self._docs if d is not doc]
+        self.stats["discarded"] += 1
+        _close(doc)
+
+    def owns(self, doc):
+        """True if doc is one of the pool's hidden documents (not a user document).
+        Compared with == (UNO object identity): enumerations return new proxies."""
+        return any(d == doc for d in self._docs)
+
+    @contextlib.contextmanager
+    def acquire(self, ctx):
+        """Yield an empty hidden Writer document (None if one cannot be created); it is
+        cleared and returned to the pool afterwards, or closed if that fails."""
+        doc = None
+        while doc is None:
+            with self._lock:
+                if not self._idle:
+                    break
+                doc = self._idle.pop()
+            try:
+                doc.getText()
+                self.stats["reused"] += 1
+            except Exception:
+                # Closed behind our back (e.g. office shutting down)
+                self._forget(doc)
+                doc = None
+        if doc is None:
+            doc = self._new(ctx)
+        try:
+            yield doc
+        finally:
+            if doc is not None:
+                self.release(doc)
+
+    def release(self, doc):
+        if _reset(doc):
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(doc)
+                    return
+        self._forget(doc)
+
+    def warm(self, ctx):
+        """Create one idle document if the pool is not full. Returns True if more are needed."""
+        with self._lock:
+            if len(self._idle) >= self.size:
+                return False
+        doc = self._new(ctx)
+        if doc is None:
+            return False
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(doc)
+                return len(self._idle) < self.size
+        self._forget(doc)
+        return False
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for doc in idle:
+            self._forget(doc)
+
+
+_pool = HiddenDocumentPool()
+_warmup_started = False
+
+
+def hidden_document(ctx):
+    """Context manager yielding a pooled empty hidden Writer document (or None)."""
+    return _pool.acquire(ctx)
+
+
+def is_pool_document(doc):
+    return _pool.owns(doc)
+
+
+def get_pool_stats():
+    return dict(_pool.stats, idle=len(_pool._idle), size=_pool.size)
+
+
+def _close_on_terminate(ctx):
+    """Close the idle documents when the office shuts down."""
+    try:
+        import unohelper
+        from com.sun.star.frame import XTerminateListener
+        desktop = ctx.getServiceManager().createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+    except Exception as e:
+        debug_log("doc_pool: no terminate listener: %s" % e, context="DocPool")
+        return
+
+    class _TerminateListener(unohelper.Base, XTerminateListener):
+        def queryTermination(self, event):
+            pass
+
+        def notifyTermination(self, event):
+            debug_log("doc_pool: closing idle documents, stats %s" % get_pool_stats(), context="DocPool")
+            _pool.close_all()
+
+        def disposing(self, event):
+            pass
+
+    desktop.addTerminateListener(_TerminateListener())
+
+
+def schedule_warmup(ctx, delay=WARMUP_DELAY):
+    """Fill the pool in the background: after delay seconds, create the documents one
+    per main-thread callback so the UI never blocks for more than one load. Once per process."""
+    global _warmup_started
+    if _warmup_started:
+        return
+    _warmup_started = True
+    _close_on_terminate(ctx)
+    try:
+        import unohelper
+        from com.sun.star.awt import XCallback
+        smgr = ctx.getServiceManager()
+        async_cb = smgr.createInstanceWithContext("com.sun.star.awt.AsyncCallback", ctx)
+    except Exception as e:
+        debug_log("doc_pool: no AsyncCallback, pool fills on demand: %s" % e, context="DocPool")
+        return
+
+    class _WarmCallback(unohelper.Base, XCallback):
+        def notify(self, data):
+            try:
+                if _pool.warm(ctx):
+                    async_cb.addCallback(self, None)
+                else:
+                    debug_log("doc_pool: warm-up done, %d idle" % len(_pool._idle), context="DocPool")
+            except Exception as e:
+                debug_log("doc_pool: warm-up failed: %s" % e, context="DocPool")
+
+    timer = threading.Timer(delay, lambda: async_cb.addCallback(_WarmCallback(), None))
+    timer.daemon = True
+    timer.start()
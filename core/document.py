@@ -1,31 +1,174 @@
 """Document helpers for LocalWriter."""
+import bisect
+import functools
 import time
+from contextlib import contextmanager
+from core.logging import debug_log
 from core.calc_bridge import CalcBridge
 from core.calc_sheet_analyzer import SheetAnalyzer
 
 
 class DocumentCache:
-    """Cache for expensive UNO calls, tied to a document model."""
-    _instances = {}  # {id(model): cache}
-
-    def __init__(self):
+    """Cache for expensive UNO calls, tied to a document model.
+
+    Entries are kept current by a modify listener attached on first use: each
+    document edit bumps ``revision`` and marks the derived data dirty, and the
+    entry is evicted when the document is disposed (closed). Edits made inside
+    ``DocumentCache.editing(model, offset)`` only dirty the text from offset on,
+    so the paragraph offset index keeps its prefix. Models that cannot take a
+    listener are untracked: nothing is cached for them between calls.
+
+    PyUNO hands out a new proxy each time a document is fetched (getCurrentComponent,
+    getComponents), so entries are keyed on the document's RuntimeUID. Only documents
+    with a RuntimeUID and a modify listener are stored (and evicted when they close);
+    any other model gets a fresh, unshared cache on each get()."""
+    _instances = {}  # {document key: cache}
+    stats = {"hits": 0, "misses": 0, "rebuilds": 0}
+
+    def __init__(self, model=None, key=None):
+        self.model = model  # held to detach the listener in invalidate()
+        self.key = key
         self.length = None
+        self.mirror = None  # TextMirror of the document text at .revision
+        self.export = None  # full get_document_content export at .revision (format_support)
         self.para_ranges = None
+        self.para_offsets = None  # ParagraphOffsetIndex
+        self.para_offsets_prefix = None  # still-valid part of para_offsets after an edit
         self.page_cache = {}  # (search_key) -> page_number
         self.last_invalidated = time.time()
+        self.revision = 0
+        self.edit_offset = None  # set by editing(): modify events dirty only from here
+        self.listener = None
+
+    @classmethod
+    def _key(cls, model):
+        """Return the entry key for model's document, or None if it has no RuntimeUID."""
+        try:
+            uid = model.RuntimeUID
+        except Exception:
+            return None
+        if isinstance(uid, str) and uid:
+            return ("uid", uid)
+        return None
+
+    @classmethod
+    def _find(cls, model):
+        """Return (key, cache) for model's document; cache is None if there is no entry."""
+        key = cls._key(model)
+        return key, (cls._instances.get(key) if key is not None else None)
 
     @classmethod
     def get(cls, model):
-        mid = id(model)
-        if mid not in cls._instances:
-            cls._instances[mid] = DocumentCache()
-        return cls._instances[mid]
+        key, cache = cls._find(model)
+        if cache is not None:
+            cls.stats["hits"] += 1
+            return cache
+        cls.stats["misses"] += 1
+        cache = DocumentCache(model, key)
+        if key is not None:
+            cache.listener = _attach_cache_listener(model, key)
+            if cache.listener is not None:
+                cls._instances[key] = cache
+        return cache
 
     @classmethod
     def invalidate(cls, model):
-        mid = id(model)
-        if mid in cls._instances:
-            del cls._instances[mid]
+        key, cache = cls._find(model)
+        if cache is None:
+            return
+        cls._instances.pop(key, None)
+        if cache.listener is not None:
+            try:
+                cache.model.removeModifyListener(cache.listener)
+            except Exception:
+                pass
+
+    @classmethod
+    def evict(cls, model):
+        """Drop the entry for a closing document (listener already released by UNO)."""
+        key, cache = cls._find(model)
+        if cache is not None:
+            cls._instances.pop(key, None)
+
+    @classmethod
+    def is_tracked(cls, model):
+        """True if the cached entry for model is kept current by a modify listener."""
+        cache = cls._find(model)[1]
+        return cache is not None and cache.listener is not None
+
+    @classmethod
+    def note_modified(cls, model, from_offset=None):
+        """Record a document edit: bump revision and drop data derived from the text.
+        from_offset: first character offset the edit touched; paragraph offsets
+        before it stay valid. None means anywhere."""
+        cache = cls._find(model)[1]
+        if cache is not None:
+            cache.mark_dirty(from_offset)
+
+    @classmethod
+    @contextmanager
+    def editing(cls, model, from_offset):
+        """Attribute modify events fired inside the block to edits at/after from_offset."""
+        cache = cls.get(model)
+        cache.edit_offset = from_offset
+        try:
+            yield cache
+        finally:
+            cache.edit_offset = None
+            cache.mark_dirty(from_offset)
+
+    @classmethod
+    def record_rebuild(cls, what, cache):
+        cls.stats["rebuilds"] += 1
+        debug_log("rebuild %s (rev %d); hits=%d misses=%d rebuilds=%d" % (
+            what, cache.revision, cls.stats["hits"], cls.stats["misses"], cls.stats["rebuilds"]),
+            context="DocumentCache")
+
+    def mark_dirty(self, from_offset=None):
+        self.revision += 1
+        self.length = None
+        self.mirror = None
+        self.export = None
+        self.para_ranges = None
+        self.page_cache = {}
+        self.last_invalidated = time.time()
+        index = self.para_offsets or self.para_offsets_prefix
+        self.para_offsets = None
+        self.para_offsets_prefix = None
+        if index is not None and from_offset is not None:
+            self.para_offsets_prefix = index.truncated(from_offset)
+
+
+def _attach_cache_listener(model, key):
+    """Register a modify listener that keeps the DocumentCache entry under key current.
+    Returns the listener, or None if model does not broadcast modify events."""
+    if not hasattr(model, "addModifyListener"):
+        return None
+    try:
+        import unohelper
+        from com.sun.star.util import XModifyListener
+    except ImportError:
+        return None
+
+    class _CacheModifyListener(unohelper.Base, XModifyListener):
+        def __init__(self, key):
+            self.key = key
+
+        def modified(self, event):
+            cache = DocumentCache._instances.get(self.key)
+            if cache is not None:
+                cache.mark_dirty(cache.edit_offset)
+
+        def disposing(self, event):
+            DocumentCache._instances.pop(self.key, None)
+
+    listener = _CacheModifyListener(key)
+    try:
+        model.addModifyListener(listener)
+    except Exception:
+        return None
+    return listener
+
 
 def is_writer(model):
     """Return True if model is a Writer document."""
@@ -98,6 +241,15 @@ def get_document_end(model, max_chars=4000):
 _GO_RIGHT_CHUNK = 8192
 
 
+def go_right(cursor, count, expand=False):
+    """Move cursor count characters right (expanding the selection if expand),
+    in _GO_RIGHT_CHUNK steps so counts above UNO's short limit work."""
+    while count > 0:
+        n = min(count, _GO_RIGHT_CHUNK)
+        cursor.goRight(n, expand)
+        count -= n
+
+
 def get_document_length(model):
     """Return total character length of the document. Returns 0 on error."""
     cache = DocumentCache.get(model)
@@ -110,11 +262,31 @@ def get_document_length(model):
         cursor.gotoEnd(True)
         length = len(cursor.getString())
         cache.length = length
+        DocumentCache.record_rebuild("length", cache)
         return length
     except Exception:
         return 0
 
 
+def get_text_mirror(model):
+    """Return a TextMirror of the whole document text (cursor.getString() from start
+    to end, so mirror offsets are document offsets). Cached per DocumentCache
+    revision; any edit drops it."""
+    from core.text_search import TextMirror
+    cache = DocumentCache.get(model)
+    if cache.mirror is not None:
+        return cache.mirror
+    text = model.getText()
+    cursor = text.createTextCursor()
+    cursor.gotoStart(False)
+    cursor.gotoEnd(True)
+    mirror = TextMirror(cursor.getString() or "", cache.revision)
+    cache.mirror = mirror
+    cache.length = len(mirror.text)
+    DocumentCache.record_rebuild("text mirror", cache)
+    return mirror
+
+
 def get_text_cursor_at_range(model, start_offset, end_offset):
     """Return a text cursor that selects the character range [start_offset, end_offset).
     The cursor is positioned at start and expanded to end so caller can setString('') and insert.
@@ -129,23 +301,161 @@ def get_text_cursor_at_range(model, start_offset, end_offset):
         text = model.getText()
         cursor = text.createTextCursor()
         cursor.gotoStart(False)
-        # Move to start_offset in chunks
-        remaining = start_offset
-        while remaining > 0:
-            n = min(remaining, _GO_RIGHT_CHUNK)
-            cursor.goRight(n, False)
-            remaining -= n
-        # Expand selection by (end_offset - start_offset)
-        remaining = end_offset - start_offset
-        while remaining > 0:
-            n = min(remaining, _GO_RIGHT_CHUNK)
-            cursor.goRight(n, True)
-            remaining -= n
+        go_right(cursor, start_offset)
+        go_right(cursor, end_offset - start_offset, True)
         return cursor
     except Exception:
         return None
 
 
+def get_text_cursors_at_ranges(model, spans):
+    """Return one selecting text cursor per (start, end) in spans (sorted, not
+    overlapping), walking a single cursor forward through the document instead of
+    from the start for each span. Create them all before editing: replacing the
+    spans back to front then leaves the earlier cursors valid."""
+    text = model.getText()
+    walker = text.createTextCursor()
+    walker.gotoStart(False)
+    pos = 0
+    cursors = []
+    for start, end in spans:
+        go_right(walker, start - pos)
+        pos = start
+        cursor = text.createTextCursorByRange(walker)
+        go_right(cursor, end - start, True)
+        cursors.append(cursor)
+    return cursors
+
+
+# ---------------------------------------------------------------------------
+# Paragraph offset index
+# ---------------------------------------------------------------------------
+
+def _measure_prefix(text, position):
+    """Return len() of the text from document start to position (the slow O(N) way).
+    Used to seed/resync the offset index and as a fallback for positions outside the body text."""
+    cursor = text.createTextCursor()
+    cursor.gotoStart(False)
+    cursor.gotoRange(position, True)
+    return len(cursor.getString())
+
+
+class ParagraphOffsetIndex:
+    """Absolute start offsets of top-level paragraphs, built with one enumeration.
+
+    Offsets are in the same coordinate system as cursor.getString() from document
+    start (what find_text, get_document_content and apply_document_content use).
+    Tables are not indexed; the first paragraph after a table (and paragraph 1,
+    to learn the paragraph separator length) is re-measured once so starts stay exact."""
+
+    def __init__(self, paragraphs, starts, para_indices, sep_len=None):
+        self.paragraphs = paragraphs      # paragraph elements, document order
+        self.starts = starts              # absolute start offset of each paragraph
+        self.para_indices = para_indices  # index of each paragraph in get_paragraph_ranges()
+        self.sep_len = sep_len            # length of the paragraph separator, once measured
+
+    @classmethod
+    def build(cls, text, elements, prefix=None):
+        """Index elements (from get_paragraph_ranges). prefix: a truncated() index of the
+        same document whose paragraphs are known unchanged; only the rest is measured."""
+        paragraphs, starts, para_indices = [], [], []
+        pos = 0
+        resync = False
+        sep_len = None
+        prev_len = 0
+        first = 0
+        if prefix is not None and prefix.starts:
+            # Element objects are re-taken from the fresh enumeration; offsets are reused.
+            paragraphs = [elements[i] for i in prefix.para_indices]
+            starts = list(prefix.starts)
+            para_indices = list(prefix.para_indices)
+            sep_len = prefix.sep_len
+            prev_len = len(paragraphs[-1].getString())
+            pos = starts[-1] + prev_len + (sep_len or 0)
+            first = para_indices[-1] + 1
+        for i in range(first, len(elements)):
+            el = elements[i]
+            try:
+                is_para = el.supportsService("com.sun.star.text.Paragraph")
+            except Exception:
+                is_para = False
+            if not is_para:
+                resync = True
+                continue
+            if paragraphs and (resync or sep_len is None):
+                measured = _measure_prefix(text, el.getStart())
+                if sep_len is None and not resync:
+                    sep_len = measured - starts[-1] - prev_len
+                pos = measured
+                resync = False
+            elif resync:
+                # Document starts with a table
+                pos = _measure_prefix(text, el.getStart())
+                resync = False
+            paragraphs.append(el)
+            starts.append(pos)
+            para_indices.append(i)
+            prev_len = len(el.getString())
+            pos += prev_len + (sep_len or 0)
+        return cls(paragraphs, starts, para_indices, sep_len)
+
+    def truncated(self, offset):
+        """Return the prefix of this index an edit at offset cannot have moved: paragraphs
+        that end (separator included) at or before offset. Pass it to build(prefix=...)."""
+        k = bisect.bisect_right(self.starts, offset) - 1
+        if k <= 0 or self.sep_len is None:
+            return None
+        return ParagraphOffsetIndex([], self.starts[:k], self.para_indices[:k], self.sep_len)
+
+    def locate(self, text, position):
+        """Return the index (into self.paragraphs) of the last paragraph starting at or
+        before position, or -1. Binary search: O(log N) compareRegionStarts calls.
+        compareRegionStarts(a, b) is 1 if a starts before b, 0 if equal, -1 if after."""
+        lo, hi = 0, len(self.paragraphs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text.compareRegionStarts(position, self.paragraphs[mid].getStart()) > 0:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo - 1
+
+    def offset_of(self, text, position):
+        """Return the absolute offset of position: paragraph start + intra-paragraph length."""
+        i = self.locate(text, position)
+        if i < 0:
+            raise ValueError("position precedes the first indexed paragraph")
+        cursor = text.createTextCursorByRange(self.paragraphs[i].getStart())
+        cursor.gotoRange(position, True)
+        return self.starts[i] + len(cursor.getString())
+
+
+def get_paragraph_offsets(model):
+    """Return the ParagraphOffsetIndex for model. Uses DocumentCache."""
+    cache = DocumentCache.get(model)
+    if cache.para_offsets is not None:
+        return cache.para_offsets
+    # After a localized edit only the paragraphs past the edit are re-measured
+    index = ParagraphOffsetIndex.build(model.getText(), get_paragraph_ranges(model),
+                                       prefix=cache.para_offsets_prefix)
+    cache.para_offsets_prefix = None
+    DocumentCache.record_rebuild("paragraph offsets", cache)
+    cache.para_offsets = index
+    return index
+
+
+def get_position_offset(model, position, text=None):
+    """Return the absolute character offset of position (an XTextRange; its start is used).
+    Resolved via the cached paragraph offset index; positions the index cannot place
+    (table cells, frames, before the first paragraph) fall back to measuring the prefix
+    in text (default: the document body text)."""
+    body = model.getText()
+    try:
+        return get_paragraph_offsets(model).offset_of(body, position)
+    except Exception:
+        return _measure_prefix(text if text is not None else body, position)
+
+
 def get_selection_range(model):
     """Return (start_offset, end_offset) character positions into the document.
     Cursor (no selection) = same start and end. Returns (0, 0) on error or no text range."""
@@ -159,19 +469,85 @@ def get_selection_range(model):
             rng = sel.getByIndex(0)
         if not rng or not hasattr(rng, "getStart") or not hasattr(rng, "getEnd"):
             return (0, 0)
-        text = model.getText()
-        cursor = text.createTextCursor()
-        cursor.gotoStart(False)
-        cursor.gotoRange(rng.getStart(), True)
-        start_offset = len(cursor.getString())
-        cursor.gotoStart(False)
-        cursor.gotoRange(rng.getEnd(), True)
-        end_offset = len(cursor.getString())
+        start_offset = get_position_offset(model, rng.getStart())
+        end_offset = get_position_offset(model, rng.getEnd())
         return (start_offset, end_offset)
     except Exception:
         return (0, 0)
 
 
+class TextRangeAppender:
+    """Streams text onto the end of a Writer text range.
+
+    append() buffers chunks; flush() writes them with one insertString at a
+    cursor anchored at the end of the range, which then sits after the inserted
+    text. Each flush costs the length of the new text, unlike
+    range.setString(range.getString() + chunk), which rewrites everything
+    generated so far.
+
+    With undo_title, each flush is its own undo action on model, so no undo
+    context stays open (and swallows the user's typing) while the stream runs."""
+
+    def __init__(self, text_range, model=None, undo_title=None):
+        self._text = text_range.getText()
+        self._cursor = self._text.createTextCursorByRange(text_range.getEnd())
+        self._pending = []
+        self._model = model
+        self._undo_title = undo_title
+        self.inserted = 0  # characters written to the document so far
+
+    def append(self, chunk, is_thinking=False):
+        if chunk and not is_thinking:
+            self._pending.append(chunk)
+
+    def flush(self):
+        if not self._pending:
+            return
+        chunk = "".join(self._pending)
+        self._pending = []
+        if self._undo_title is None:
+            self._text.insertString(self._cursor, chunk, False)
+        else:
+            with undo_group(self._model, self._undo_title):
+                self._text.insertString(self._cursor, chunk, False)
+        self.inserted += len(chunk)
+
+    def replace_written(self, text):
+        """Replace everything written so far with text (e.g. the original selection
+        after a failed edit), selecting back from the end anchor. Edits the user made
+        elsewhere in the meantime are left alone."""
+        cursor = self._text.createTextCursorByRange(self._cursor)
+        count = self.inserted
+        while count > 0:
+            n = min(count, _GO_RIGHT_CHUNK)
+            cursor.goLeft(n, True)
+            count -= n
+        cursor.setString(text)
+        self.inserted = len(text)
+
+
+@contextmanager
+def undo_group(model, title):
+    """Record the document edits made in the block as one undo action.
+    Yields True if grouping is active. Failing to enter or leave the context
+    (seen in some environments) is logged, never raised."""
+    manager = None
+    try:
+        manager = model.getUndoManager()
+        manager.enterUndoContext(title)
+    except Exception as e:
+        debug_log("undo_group: enterUndoContext failed: %s" % e, context="Document")
+        manager = None
+    try:
+        yield manager is not None
+    finally:
+        if manager is not None:
+            try:
+                manager.leaveUndoContext()
+            except Exception as e:
+                debug_log("undo_group: leaveUndoContext failed: %s" % e, context="Document")
+
+
 def get_document_context_for_chat(model, max_context=8000, include_end=True, include_selection=True, ctx=None):
     """Build a single context string for chat. Handles Writer and Calc.
     ctx: component context (required for Calc and Draw documents)."""
@@ -182,6 +558,10 @@ def get_document_context_for_chat(model, max_context=8000, include_end=True, inc
         return get_draw_context_for_chat(model, max_context, ctx)
     
     # Original Writer logic
+    # Without a modify listener we cannot tell whether the user edited the document
+    # since the last turn; drop cached length/paragraph offsets to be safe.
+    if not DocumentCache.is_tracked(model):
+        DocumentCache.invalidate(model)
     try:
         text = model.getText()
         # ... (rest of the function)
@@ -372,29 +752,106 @@ def get_paragraph_ranges(model):
     while enum.hasMoreElements():
         ranges.append(enum.nextElement())
     cache.para_ranges = ranges
+    DocumentCache.record_rebuild("paragraph ranges", cache)
     return ranges
 
 
+def _compare_to_element(text_obj, position, para_ranges, i):
+    """compareRegionStarts(position, start of para_ranges[i]), stepping back over elements
+    without a text range (tables). Returns (index actually compared, result); index -1
+    if no comparable element precedes i. Raises if position is in another text."""
+    while i >= 0:
+        try:
+            start = para_ranges[i].getStart()
+        except Exception:
+            i -= 1
+            continue
+        return i, text_obj.compareRegionStarts(position, start)
+    return -1, -1
+
+
+def _bisect_paragraph(text_obj, position, para_ranges, lo=0):
+    """Return the index of the last element in para_ranges[lo:] starting at or before
+    position (-1 if none). O(log N) compareRegionStarts calls.
+    compareRegionStarts(a, b) is 1 if a starts before b, 0 if equal, -1 if after."""
+    hi = len(para_ranges)
+    floor = lo - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        j, cmp = _compare_to_element(text_obj, position, para_ranges, mid)
+        if j <= floor:
+            # Only tables between floor and mid: search the upper half
+            lo = mid + 1
+        elif cmp > 0:
+            hi = j
+        else:
+            floor = j
+            lo = mid + 1
+    return floor
+
+
+def _paragraph_containing(text_obj, position, para_ranges, lo=0):
+    i = _bisect_paragraph(text_obj, position, para_ranges, lo)
+    if i < 0:
+        return None
+    # Starts at/before paragraph i; must also start at/before its end
+    if text_obj.compareRegionStarts(position, para_ranges[i].getEnd()) < 0:
+        return None
+    return i
+
+
 def find_paragraph_for_range(match_range, para_ranges, text_obj=None):
     """Return the 0-based paragraph index that contains match_range."""
     try:
         if text_obj is None:
             text_obj = match_range.getText()
-        match_start = match_range.getStart()
-        for i, para in enumerate(para_ranges):
-            try:
-                # compareRegionStarts: 1 if first is after second, -1 if before, 0 if equal
-                cmp_start = text_obj.compareRegionStarts(match_start, para.getStart())
-                cmp_end = text_obj.compareRegionStarts(match_start, para.getEnd())
-                if cmp_start <= 0 and cmp_end >= 0:
-                    return i
-            except Exception:
-                continue
+        i = _paragraph_containing(text_obj, match_range.getStart(), para_ranges)
+        if i is not None:
+            return i
     except Exception:
         pass
     return 0
 
 
+def find_paragraphs_for_ranges(ranges, para_ranges, text_obj=None):
+    """Batch find_paragraph_for_range: return the paragraph index for each range in ranges
+    (same order; 0 when not found). Ranges are sorted by position once, then located in a
+    single forward sweep where each search starts at the previous hit."""
+    result = [0] * len(ranges)
+    if not ranges or not para_ranges:
+        return result
+    starts = []
+    for k, rng in enumerate(ranges):
+        try:
+            starts.append((k, rng.getStart()))
+        except Exception:
+            pass
+    if text_obj is None:
+        text_obj = ranges[0].getText()
+
+    def _cmp(a, b):
+        # compareRegionStarts is 1 when a comes first; sort ascending by position
+        return -text_obj.compareRegionStarts(a[1], b[1])
+
+    try:
+        starts.sort(key=functools.cmp_to_key(_cmp))
+    except Exception:
+        # Some anchor is not comparable with the rest (e.g. in another text): no sweep
+        for k, pos in starts:
+            result[k] = find_paragraph_for_range(ranges[k], para_ranges, text_obj)
+        return result
+    lo = 0
+    for k, pos in starts:
+        try:
+            i = _paragraph_containing(text_obj, pos, para_ranges, lo)
+        except Exception:
+            i = None
+        if i is not None:
+            result[k] = i
+            lo = i
+    return result
+
+
 def build_heading_tree(model):
     """Build a hierarchical heading tree. Single pass enumeration."""
     text = model.getText()
@@ -443,11 +900,10 @@ def ensure_heading_bookmarks(model):
     existing_map = {}
     if hasattr(model, "getBookmarks"):
         bookmarks = model.getBookmarks()
-        for name in bookmarks.getElementNames():
-            if name.startswith("_mcp_"):
-                bm = bookmarks.getByName(name)
-                idx = find_paragraph_for_range(bm.getAnchor(), para_ranges, text)
-                existing_map[idx] = name
+        names = [n for n in bookmarks.getElementNames() if n.startswith("_mcp_")]
+        anchors = [bookmarks.getByName(n).getAnchor() for n in names]
+        for name, idx in zip(names, find_paragraphs_for_ranges(anchors, para_ranges, text)):
+            existing_map[idx] = name
     
     # 2. Scanthe document for headings
     enum = text.createEnumeration()
@@ -339,9 +339,10 @@ def _truncate_for_log(obj, max_len=200):
 def execute_tool(tool_name, arguments, doc, ctx, status_callback=None, append_thinking_callback=None):
     """Execute a tool by name. Returns JSON result string."""
     # If the tool is a writer operation, it might mutate the document.
-    # Invalidate cache if it's not a 'get' or 'read' or 'list' tool.
+    # Tracked documents are kept current by their modify listener; otherwise
+    # invalidate cache if it's not a 'get' or 'read' or 'list' tool.
     is_mutation = not (tool_name.startswith("get_") or tool_name.startswith("read_") or tool_name.startswith("list_"))
-    if is_mutation:
+    if is_mutation and not DocumentCache.is_tracked(doc):
         DocumentCache.invalidate(doc)
 
     func = TOOL_DISPATCH.get(tool_name)
@@ -2,6 +2,7 @@
 # Converts document to/from Markdown/HTML; uses system temp dir (cross-platform) and
 # insertDocumentFromURL for inserting formatted content.
 
+import collections
 import contextlib
 import json
 import os
@@ -11,8 +12,9 @@ import time
 import urllib.parse
 import urllib.request
 
-from core.logging import debug_log
+from core.logging import debug_log, log_enabled, DEBUG
 from core.constants import DOCUMENT_FORMAT
+from core.markup_plain import markup_to_plain
 
 
 # Map internal format name to LibreOffice filter name and file extension
@@ -28,8 +30,17 @@ def _get_format_props():
     return cfg["filter"], cfg["extension"]
 
 
-# System temp dir: /tmp on Linux, /var/folders/... on macOS, %TEMP% on Windows
-TEMP_DIR = tempfile.gettempdir()
+def _pick_temp_dir():
+    """Directory for filter round-trip files: RAM-backed /dev/shm (tmpfs) where it is
+    writable, else the system temp dir (/tmp on Linux, /var/folders/... on macOS,
+    %TEMP% on Windows). The files live for one import/export, so they never need disk."""
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK | os.X_OK):
+        return shm
+    return tempfile.gettempdir()
+
+
+TEMP_DIR = _pick_temp_dir()
 
 
 
@@ -110,74 +121,60 @@ def _strip_html_boilerplate(html_string):
 
 
 def _range_to_markdown_via_temp_doc(model, ctx, selection_start, selection_end, max_chars=None):
-    """Copy the character range [selection_start, selection_end) into a temporary Writer document
+    """Copy the character range [selection_start, selection_end) into a pooled hidden Writer document
     (preserving paragraph styles), then export it to Markdown via storeToURL. Returns markdown string or \"\" on failure."""
-    temp_doc = None
+    from core.doc_pool import hidden_document
     try:
-        smgr = ctx.getServiceManager()
-        desktop = smgr.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
-        load_props = (_create_property_value("Hidden", True),)
-        temp_doc = desktop.loadComponentFromURL("private:factory/swriter", "_default", 0, load_props)
-        if not temp_doc or not hasattr(temp_doc, "getText"):
-            if temp_doc:
-                temp_doc.close(True)
-            debug_log("markdown_support: _range_to_markdown_via_temp_doc could not create temp document", context="Markdown")
-            return ""
-        temp_text = temp_doc.getText()
-        temp_cursor = temp_text.createTextCursor()
-        text = model.getText()
-        enum = text.createEnumeration()
-        current_offset = 0
-        first_para = True
-        added_any = False
-        while enum.hasMoreElements():
-            el = enum.nextElement()
-            if not hasattr(el, "getString"):
-                continue
-            try:
-                style = el.getPropertyValue("ParaStyleName") if hasattr(el, "getPropertyValue") else ""
-            except Exception:
-                style = ""
-            style = style or ""
-            para_text = el.getString()
-            # Compute paragraph start offset using a cursor to match find_text coordinate system
-            start_cursor = model.getText().createTextCursor()
-            start_cursor.gotoStart(False)
-            start_cursor.gotoRange(el.getStart(), True)
-            para_start = len(start_cursor.getString())
-            # End offset is start offset plus the length of the paragraph text
-            para_end = para_start + len(para_text)
-            # Update current_offset for consistency (not used for offsets now)
-            current_offset = para_end
-
-            if para_end <= selection_start or para_start >= selection_end:
-                continue
-            if para_start < selection_start or para_end > selection_end:
-                trim_start = max(0, selection_start - para_start)
-                trim_end = len(para_text) - max(0, para_end - selection_end)
-                para_text = para_text[trim_start:trim_end]
-
-            if first_para:
-                temp_cursor.gotoStart(False)
-                temp_cursor.setString(para_text)
-                temp_cursor.setPropertyValue("ParaStyleName", style)
-                first_para = False
-            else:
-                temp_cursor.gotoEnd(False)
-                temp_text.insertControlCharacter(temp_cursor, _PARAGRAPH_BREAK, False)
-                temp_cursor.setPropertyValue("ParaStyleName", style)
-                temp_cursor.setString(para_text)
-            added_any = True
-
-        if not added_any:
-            return ""
+        with hidden_document(ctx) as temp_doc:
+            if temp_doc is None:
+                debug_log("markdown_support: _range_to_markdown_via_temp_doc could not create temp document", context="Markdown")
+                return ""
+            temp_text = temp_doc.getText()
+            temp_cursor = temp_text.createTextCursor()
+            from core.document import get_paragraph_offsets
+            # Paragraph start offsets come from the cached offset index (same coordinate
+            # system as find_text) instead of measuring the document prefix per paragraph.
+            index = get_paragraph_offsets(model)
+            first_para = True
+            added_any = False
+            for el, para_start in zip(index.paragraphs, index.starts):
+                if para_start >= selection_end:
+                    break
+                para_text = el.getString()
+                para_end = para_start + len(para_text)
+                if para_end <= selection_start:
+                    continue
+                try:
+                    style = el.getPropertyValue("ParaStyleName") if hasattr(el, "getPropertyValue") else ""
+                except Exception:
+                    style = ""
+                style = style or ""
+                if para_start < selection_start or para_end > selection_end:
+                    trim_start = max(0, selection_start - para_start)
+                    trim_end = len(para_text) - max(0, para_end - selection_end)
+                    para_text = para_text[trim_start:trim_end]
+
+                if first_para:
+                    temp_cursor.gotoStart(False)
+                    temp_cursor.setString(para_text)
+                    temp_cursor.setPropertyValue("ParaStyleName", style)
+                    first_para = False
+                else:
+                    temp_cursor.gotoEnd(False)
+                    temp_text.insertControlCharacter(temp_cursor, _PARAGRAPH_BREAK, False)
+                    temp_cursor.setPropertyValue("ParaStyleName", style)
+                    temp_cursor.setString(para_text)
+                added_any = True
+
+            if not added_any:
+                return ""
 
-        filter_name, _ = _get_format_props()
-        with _with_temp_buffer(None) as (path, file_url):
-            props = (_create_property_value("FilterName", filter_name),)
-            temp_doc.storeToURL(file_url, props)
-            with open(path, "r", encoding="utf-8", errors="replace") as f:
-                content = f.read()
+            filter_name, _ = _get_format_props()
+            with _with_temp_buffer(None) as (path, file_url):
+                props = (_create_property_value("FilterName", filter_name),)
+                temp_doc.storeToURL(file_url, props)
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    content = f.read()
         if DOCUMENT_FORMAT == "html":
             content = _strip_html_boilerplate(content)
         if max_chars and len(content) > max_chars:
@@ -186,16 +183,117 @@ def _range_to_markdown_via_temp_doc(model, ctx, selection_start, selection_end,
     except Exception as e:
         debug_log("markdown_support: _range_to_markdown_via_temp_doc failed: %s" % e, context="Markdown")
         return ""
-    finally:
-        if temp_doc is not None:
-            try:
-                temp_doc.close(True)
-            except Exception:
-                pass
+
+
+# Full-document exports: how many ran, how many were served from the cache, how many
+# selection/range requests were cut from a cached export instead of a temp document
+_export_stats = {"exports": 0, "cache_hits": 0, "slices": 0}
+
+
+def get_export_cache_stats():
+    return dict(_export_stats)
+
+
+def _log_export_stats(what, cache):
+    debug_log("get_document_content: %s (rev %d); exports=%d cache_hits=%d slices=%d" % (
+        what, cache.revision, _export_stats["exports"], _export_stats["cache_hits"], _export_stats["slices"]),
+        context="Markdown")
+
+
+def _full_export(model):
+    """Return the whole document exported in DOCUMENT_FORMAT (body only for HTML).
+    Cached on the DocumentCache entry until the next edit: repeated get_document_content
+    calls within a tool loop skip storeToURL. Untracked models (no modify listener) are
+    exported every time."""
+    from core.document import DocumentCache
+    cache = DocumentCache.get(model)
+    tracked = DocumentCache.is_tracked(model)
+    entry = cache.export
+    if tracked and entry is not None and entry["format"] == DOCUMENT_FORMAT:
+        _export_stats["cache_hits"] += 1
+        _log_export_stats("export served from cache", cache)
+        return entry
+    filter_name, _ = _get_format_props()
+    with _with_temp_buffer(None) as (path, file_url):
+        props = (_create_property_value("FilterName", filter_name),)
+        model.storeToURL(file_url, props)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            content = f.read()
+    if DOCUMENT_FORMAT == "html":
+        content = _strip_html_boilerplate(content)
+    _export_stats["exports"] += 1
+    entry = {"format": DOCUMENT_FORMAT, "content": content, "units": None}
+    if tracked:
+        cache.export = entry
+    _log_export_stats("exported document", cache)
+    return entry
+
+
+_HTML_BLOCK_RE = re.compile(r"<(p|h[1-6])\b[^>]*>.*?</\1\s*>", re.DOTALL | re.IGNORECASE)
+
+
+def _export_units(model, content):
+    """Pair each non-empty document paragraph with the export block it became.
+    Returns [(doc_start, doc_end, export_start, export_end), ...], or None when the
+    export does not map cleanly (a block whose rendered text is not exactly the next
+    paragraph: tables, line breaks, unsupported markup, ...)."""
+    from core.document import get_text_mirror
+    paragraphs = [m for m in re.finditer(r"[^\r\n]+", get_text_mirror(model).text) if m.group().strip()]
+    if DOCUMENT_FORMAT == "html":
+        blocks = list(_HTML_BLOCK_RE.finditer(content))
+    else:
+        blocks = [m for m in re.finditer(r"[^\n]+", content) if m.group().strip()]
+    rendered = []
+    for block in blocks:
+        plain = markup_to_plain(block.group(), DOCUMENT_FORMAT)
+        if plain is None:
+            return None
+        if plain.strip():  # empty paragraphs are skipped on both sides
+            rendered.append((block, plain.strip()))
+    if not rendered or len(rendered) != len(paragraphs):
+        return None
+    units = []
+    for para, (block, plain) in zip(paragraphs, rendered):
+        if plain != para.group().strip():
+            return None
+        units.append((para.start(), para.end(), block.start(), block.end()))
+    return units
+
+
+def _slice_cached_export(model, start, end):
+    """Export of [start, end) cut from the cached full export, or None if there is no
+    cached export, it does not map cleanly, or the range splits a paragraph."""
+    from core.document import DocumentCache
+    cache = DocumentCache.get(model)
+    entry = cache.export
+    if entry is None or entry["format"] != DOCUMENT_FORMAT or end <= start:
+        return None
+    if entry["units"] is None:
+        entry["units"] = _export_units(model, entry["content"]) or False
+    units = entry["units"]
+    if not units:
+        return None
+    inside = [i for i, u in enumerate(units) if u[1] > start and u[0] < end]
+    if not inside:
+        return None
+    first, last = units[inside[0]], units[inside[-1]]
+    if start > first[0] or end < last[1]:
+        return None
+    content = entry["content"]
+    if DOCUMENT_FORMAT == "html":
+        # Whole block elements only, so list/div wrappers are never left half-open
+        sliced = "\n".join(content[units[i][2]:units[i][3]] for i in inside)
+    else:
+        sliced = content[first[2]:last[3]]
+    _export_stats["slices"] += 1
+    _log_export_stats("range [%d, %d) cut from cached export" % (start, end), cache)
+    return sliced
 
 
 def document_to_markdown(model, ctx, max_chars=None, scope="full", range_start=None, range_end=None):
-    """Get document (or selection/range) as Markdown. Uses storeToURL for full scope; for selection/range uses temp document + storeToURL."""
+    """Get document (or selection/range) as Markdown. Uses storeToURL for full scope (cached until the
+    next edit); selection/range is cut from that cached export when paragraphs map cleanly, else
+    exported through a temp document."""
     selection_start, selection_end = 0, 0
     if scope == "selection":
         try:
@@ -217,22 +315,24 @@ def document_to_markdown(model, ctx, max_chars=None, scope="full", range_start=N
 
     if scope not in ("selection", "range"):
         try:
-            storable = model
-            if hasattr(storable, "storeToURL"):
-                filter_name, _ = _get_format_props()
-                with _with_temp_buffer(None) as (path, file_url):
-                    props = (_create_property_value("FilterName", filter_name),)
-                    storable.storeToURL(file_url, props)
-                    with open(path, "r", encoding="utf-8", errors="replace") as f:
-                        content = f.read()
-                    if DOCUMENT_FORMAT == "html":
-                        content = _strip_html_boilerplate(content)
-                    if max_chars and len(content) > max_chars:
-                        content = content[:max_chars] + "\n\n[... truncated ...]"
-                    return content
+            if hasattr(model, "storeToURL"):
+                content = _full_export(model)["content"]
+                if max_chars and len(content) > max_chars:
+                    content = content[:max_chars] + "\n\n[... truncated ...]"
+                return content
         except Exception as e:
             debug_log("markdown_support: storeToURL failed (%s)" % e, context="Markdown")
             return ""
+    else:
+        try:
+            content = _slice_cached_export(model, selection_start, selection_end)
+        except Exception as e:
+            debug_log("markdown_support: slicing cached export failed (%s)" % e, context="Markdown")
+            content = None
+        if content is not None:
+            if max_chars and len(content) > max_chars:
+                content = content[:max_chars] + "\n\n[... truncated ...]"
+            return content
     return _range_to_markdown_via_temp_doc(model, ctx, selection_start, selection_end, max_chars)
 
 
@@ -341,34 +441,25 @@ def _apply_markdown_at_range(model, ctx, markdown_string, start_offset, end_offs
 
 
 def _markdown_to_plain_via_document(ctx, markdown_string):
-    """Load content into a temporary Writer document via LO's filter, return plain text.
+    """Render content into a pooled hidden Writer document via LO's filter, return plain text.
     Returns None on any failure so callers can fall back to the original string."""
+    from core.doc_pool import hidden_document
     t0 = time.time()
     if markdown_string is None:
         return None
     try:
-        with _with_temp_buffer(markdown_string) as (path, file_url):
-            smgr = ctx.getServiceManager()
-            desktop = smgr.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
-            filter_name, _ = _get_format_props()
-            load_props = (
-                _create_property_value("FilterName", filter_name),
-                _create_property_value("Hidden", True),
-            )
-            debug_log("markdown_support: _markdown_to_plain_via_document loading url=%s with FilterName=Markdown Hidden=True" % file_url, context="Markdown")
-            doc = desktop.loadComponentFromURL(file_url, "_default", 0, load_props)
-            if not doc:
-                debug_log("markdown_support: _markdown_to_plain_via_document load returned None (took %.3fs)" % (time.time() - t0), context="Markdown")
-                return None
-            if not hasattr(doc, "getText"):
-                debug_log("markdown_support: _markdown_to_plain_via_document loaded component has no getText (took %.3fs)" % (time.time() - t0), context="Markdown")
-                doc.close(True)
+        with _with_temp_buffer(markdown_string) as (path, file_url), hidden_document(ctx) as doc:
+            if doc is None:
+                debug_log("markdown_support: _markdown_to_plain_via_document no hidden document (took %.3fs)" % (time.time() - t0), context="Markdown")
                 return None
+            filter_name, _ = _get_format_props()
+            filter_props = (_create_property_value("FilterName", filter_name),)
+            debug_log("markdown_support: _markdown_to_plain_via_document inserting url=%s with FilterName=%s" % (file_url, filter_name), context="Markdown")
             cursor = doc.getText().createTextCursor()
+            cursor.insertDocumentFromURL(file_url, filter_props)
             cursor.gotoStart(False)
             cursor.gotoEnd(True)
             plain = cursor.getString()
-            doc.close(True)
             # Strip trailing newlines so we match document paragraphs (last para in doc often has no trailing \n)
             if plain is not None and isinstance(plain, str):
                 plain = plain.rstrip("\n\r")
@@ -383,74 +474,102 @@ def _markdown_to_plain_via_document(ctx, markdown_string):
         return None
 
 
-def _literal_search_candidates(source_string):
-    """Build a deduplicated list of literal search strings to try for a given source.
-    Includes raw, normalized (all line breaks collapsed to \\n), and variants with
-    \\n\\n, \\r\\n, \\r\\n\\r\\n, \\r, \\n\\r, plus optional trailing \\n and \\n\\n.
-    Used so multi-paragraph search can match regardless of how Writer stores breaks."""
-    if source_string is None or not isinstance(source_string, str):
-        return [source_string] if source_string is not None else []
-    seen = set()
-    out = []
-    def add(s):
-        if s is not None and s not in seen:
-            seen.add(s)
-            out.append(s)
-    add(source_string)
-    # Normalize: collapse all line break forms to single \n (order matters)
-    normalized = source_string.replace("\r\n\r\n", "\n").replace("\r\n", "\n").replace("\n\n", "\n").replace("\r", "\n")
-    add(normalized)
-    add(normalized.replace("\n", "\n\n"))
-    add(normalized.replace("\n", "\r\n"))
-    add(normalized.replace("\n", "\r\n\r\n"))
-    add(normalized.replace("\n", "\r"))
-    add(normalized.replace("\n", "\n\r"))
-    add(normalized + "\n")
-    add(normalized + "\n\n")
-    return out
-
-
-def _search_candidates_with_plain(ctx, search_string):
-    """Return deduplicated list of search candidates: raw + normalized + LO plain variants."""
-    candidates = list(_literal_search_candidates(search_string))
-    plain = _markdown_to_plain_via_document(ctx, search_string)
-    if plain:
-        seen = set(candidates)
-        for c in _literal_search_candidates(plain):
-            if c not in seen:
-                seen.add(c)
-                candidates.append(c)
-    return candidates
-
-
-def _get_document_sample_for_search_failure(model, ctx, search_string):
-    """Get a document snippet for diagnostic logging when search fails.
-    Uses first non-empty line to anchor; if found, samples from that offset; else from doc start.
-    Returns (doc_snippet, doc_snippet_repr, break_chars_hex). Any can be empty on error."""
-    from core.document import get_document_length, get_text_cursor_at_range
-    doc_len = get_document_length(model)
-    if doc_len <= 0:
-        return "", "[]", ""
+# Plain renderings that needed the hidden-document path, most recently used last
+_PLAIN_FALLBACK_CACHE_SIZE = 64
+_plain_fallback_cache = collections.OrderedDict()
+
+
+def _markdown_to_plain(ctx, markdown_string):
+    """Plain text LO would produce for markdown_string in DOCUMENT_FORMAT.
+    Uses the in-process converter; only constructs it flags as unsupported go
+    through a hidden document, and those results are cached too. None on failure."""
+    if markdown_string is None:
+        return None
+    plain = markup_to_plain(markdown_string, DOCUMENT_FORMAT)
+    if plain is not None:
+        return plain
+    key = (DOCUMENT_FORMAT, markdown_string)
+    if key in _plain_fallback_cache:
+        _plain_fallback_cache.move_to_end(key)
+        return _plain_fallback_cache[key]
+    plain = _markdown_to_plain_via_document(ctx, markdown_string)
+    if plain is not None:
+        _plain_fallback_cache[key] = plain
+        while len(_plain_fallback_cache) > _PLAIN_FALLBACK_CACHE_SIZE:
+            _plain_fallback_cache.popitem(last=False)
+    return plain
+
+
+def _find_spans(model, ctx, search_string, start=0, limit=None, case_sensitive=True,
+                regex=False, ignore_whitespace=False):
+    """Search the document's cached text mirror; return [(start, end), ...] in document order.
+    Line breaks are compared normalised (any run of \\n, \\r\\n, \\r, U+2029 matches any
+    other), so one scan replaces trying each break variant with findFirst. A literal
+    search_string that is not found is retried as the plain text it renders to ("## Summary"
+    is stored as "Summary"). Raises re.error for an invalid regex."""
+    from core.document import get_text_mirror
+    t0 = time.time()
+    mirror = get_text_mirror(model)
+    kwargs = dict(start=start, limit=limit, case_sensitive=case_sensitive, regex=regex,
+                  ignore_whitespace=ignore_whitespace)
+    spans = mirror.find(search_string, **kwargs)
+    if not spans and not regex:
+        plain = _markdown_to_plain(ctx, search_string)
+        if plain and plain != search_string:
+            spans = mirror.find(plain, **kwargs)
+            debug_log("format_support: _find_spans rendered plain len=%d -> %d matches" % (len(plain), len(spans)), context="Markdown")
+    debug_log("format_support: _find_spans len=%d -> %d matches in %d chars (took %.3fs)" % (
+        len(search_string), len(spans), len(mirror.text), time.time() - t0), context="Markdown")
+    return spans
+
+
+def _find_ranges_outside_body(model, ctx, search_string, limit=None, case_sensitive=True):
+    """Fallback for text the body mirror does not contain (tables, frames, text in
+    sections inside tables): findFirst/findNext over the whole document with the
+    break-normalised needle, then with its rendered plain text. Only called once the
+    mirror search found nothing, so every match lies outside the body text.
+    Returns the found XTextRanges in document order."""
+    from core.text_search import normalize_breaks
+    needles = [normalize_breaks(search_string)]
+    plain = _markdown_to_plain(ctx, search_string)
+    if plain and normalize_breaks(plain) not in needles:
+        needles.append(normalize_breaks(plain))
+    for needle in needles:
+        if not needle:
+            continue
+        sd = model.createSearchDescriptor()
+        sd.SearchString = needle
+        sd.SearchRegularExpression = False
+        sd.SearchCaseSensitive = case_sensitive
+        found_ranges = []
+        found = model.findFirst(sd)
+        while found is not None:
+            found_ranges.append(found)
+            if limit and len(found_ranges) >= limit:
+                break
+            found = model.findNext(found.getEnd(), sd)
+        if found_ranges:
+            debug_log("format_support: _find_ranges_outside_body -> %d matches" % len(found_ranges), context="Markdown")
+            return found_ranges
+    return []
+
+
+def _log_search_failure(model, search_string):
+    """Log the searched string and the matching region of the document (or its start), so
+    break characters and markup differences are visible when a search finds nothing."""
+    if not log_enabled(DEBUG):
+        return
+    from core.document import get_text_mirror
+    doc = get_text_mirror(model).text
     lines = [s.strip() for s in (search_string or "").splitlines() if s.strip()]
-    first_line = lines[0] if lines else None
-    sample_start = 0
-    sample_end = min(800, doc_len)
-    if first_line and ctx:
-        ranges = _find_text_ranges(model, ctx, first_line, start=0, limit=1)
-        if ranges:
-            s1 = ranges[0]["start"]
-            sample_start = s1
-            sample_end = min(s1 + len(search_string) + 300, doc_len)
-    cursor = get_text_cursor_at_range(model, sample_start, sample_end)
-    if not cursor:
-        return "", "[]", ""
-    snippet = cursor.getString() or ""
-    snippet_repr = repr(snippet)
-    if len(snippet_repr) > 800:
-        snippet_repr = snippet_repr[:800] + "..."
+    at = doc.find(lines[0]) if lines else -1
+    snippet = doc[at:at + len(search_string) + 300] if at >= 0 else doc[:800]
     break_ords = [ord(c) for c in snippet if ord(c) in (0x0a, 0x0d, 0x2028, 0x2029) or (ord(c) < 32 and ord(c) != 9)]
     break_hex = " ".join("0x%x" % o for o in break_ords[:30]) if break_ords else "(none)"
-    return snippet, snippet_repr, break_hex
+    r = repr(search_string)
+    debug_log("format_support: search FAILED len=%d repr=%s" % (len(search_string), r[:600] + ("..." if len(r) > 600 else "")), context="Markdown", level=DEBUG)
+    debug_log("format_support:   document_sample len=%d repr=%s" % (len(snippet), repr(snippet)[:800]), context="Markdown", level=DEBUG)
+    debug_log("format_support:   document_sample break chars: %s" % break_hex, context="Markdown", level=DEBUG)
 
 
 # ---------------------------------------------------------------------------
@@ -486,31 +605,32 @@ def _content_has_markup(content):
 
 
 def _replace_text_preserving_format(model, target_range, new_text, ctx=None):
-    """Replace the text in target_range with new_text, preserving per-character
-    formatting by replacing one character at a time.
-
-    Each single-character setString() inherits ALL character properties from the
-    character it replaces (CharBackColor, CharColor, CharHeight, CharWeight,
-    CharPosture, CharUnderline, etc.) including properties the AI has no
-    knowledge of.  The caller does not need to enumerate or copy properties.
-
-    Cursor approach: absolute document offsets (gotoStart + goRight(n)) are used
-    for each character rather than chaining cursor positions across setString()
-    calls, because setString() cursor state after replacement is
-    implementation-dependent in some LO versions.
-
-    Length handling:
-      - Overlapping portion: each new char gets the old char's formatting.
-      - Extra new chars (new_text longer): inherit formatting from the LAST
-        original character (inserted at the position after the overlap).
-      - Leftover old chars (new_text shorter): deleted.
+    """Replace the text in target_range with new_text, preserving formatting by
+    editing only the spans that differ.
+
+    core.text_diff.text_edit_ops diffs old and new (words, then characters inside
+    changed words), so unchanged runs are never touched and keep all their
+    character properties (CharBackColor, CharColor, CharHeight, CharWeight,
+    CharPosture, CharUnderline, etc.), including ones the AI has no knowledge of.
+    Changed spans are applied from the end of the range backwards, each from a
+    cursor at the range start, so earlier offsets stay valid:
+      - replace: each new char is inserted after the old char it pairs with,
+        inheriting its formatting, then the old char is deleted. Extra new chars
+        inherit from the last replaced char; leftover old chars are deleted.
+      - insert: one insertString; the text takes the formatting of the char
+        before it.
+      - delete: one setString("") over the span.
+    The cost scales with the size of the change, not the size of the range.
 
     Future enhancements:
       - Proportional format mapping for large length differences.
       - Paragraph-style preservation when replacement spans paragraph breaks.
       - Expose as an explicit option for Edit Selection streaming.
     """
-    text = model.getText()
+    from core.document import DocumentCache, get_position_offset, go_right
+    from core.text_diff import text_edit_ops
+    # The range's own text: a table cell or frame when the match is outside the body
+    text = target_range.getText()
     old_text = target_range.getString()
     old_len = len(old_text)
     new_len = len(new_text)
@@ -521,19 +641,20 @@ def _replace_text_preserving_format(model, target_range, new_text, ctx=None):
     # If the old range is empty, just insert (nothing to preserve)
     if old_len == 0:
         cursor = text.createTextCursorByRange(target_range.getStart())
-        text.insertString(cursor, new_text, False)
+        with DocumentCache.editing(model, get_position_offset(model, target_range.getStart(), text=text)):
+            text.insertString(cursor, new_text, False)
         return
 
-    overlap = min(old_len, new_len)
+    ops = text_edit_ops(old_text, new_text)
+    if not ops:
+        return
 
-    # Compute the absolute character offset of the range start by selecting
-    # from the document start to our range start and measuring the string length.
-    tmp = text.createTextCursorByRange(target_range.getStart())
-    tmp.gotoStart(True)  # extend selection back to doc start
-    start_offset = len(tmp.getString())
-    
-    debug_log("_replace_text_preserving_format: range '%s' (len=%d) -> '%s' (len=%d) at offset %d" % (
-        old_text[:20], old_len, new_text[:20], new_len, start_offset), context="Markdown")
+    # Absolute character offset of the range start, resolved through the paragraph
+    # offset index (paragraph lookup + intra-paragraph length) rather than the whole prefix.
+    start_offset = get_position_offset(model, target_range.getStart(), text=text)
+
+    debug_log("_replace_text_preserving_format: range '%s' (len=%d) -> '%s' (len=%d) at offset %d, %d edit(s)" % (
+        old_text[:20], old_len, new_text[:20], new_len, start_offset, len(ops)), context="Markdown")
 
     # Reuse toolkit if available to keep UI responsive
     toolkit = None
@@ -543,59 +664,61 @@ def _replace_text_preserving_format(model, target_range, new_text, ctx=None):
         except Exception:
             pass
 
-    # Replace character-by-character over the overlapping portion.
-    # Create a persistent cursor for traversal (O(N) instead of O(N^2))
-    main_cursor = text.createTextCursor()
-    main_cursor.gotoStart(False)
-    main_cursor.goRight(start_offset, False)
-
-    for i in range(overlap):
-        # Brief pause every 500 chars to avoid freezing the UI completely
-        if i > 0 and i % 500 == 0:
-            if toolkit:
+    # Offsets/lengths cached for this document are stale from the first edit on; the
+    # paragraph offsets before it survive (callers may replace several matches in one tool call).
+    with DocumentCache.editing(model, start_offset + ops[0][1]):
+        base = text.createTextCursorByRange(target_range.getStart())
+        calls = 0
+        for tag, i1, i2, j1, j2 in reversed(ops):
+            cursor = text.createTextCursorByRange(base)
+            go_right(cursor, i1)
+            if tag == "insert":
+                text.insertString(cursor, new_text[j1:j2], False)
+                calls += 1
+            elif tag == "delete":
+                go_right(cursor, i2 - i1, True)
+                cursor.setString("")
+                calls += 1
+            else:
+                calls += _replace_span_per_char(text, cursor, old_text[i1:i2], new_text[j1:j2])
+            # Brief pause every ~500 edits to avoid freezing the UI completely
+            if toolkit and calls >= 500:
+                calls = 0
                 try:
                     toolkit.processEvents()
                 except Exception:
                     toolkit = None
 
-        if new_text[i] == old_text[i]:
-            main_cursor.goRight(1, False)
-            continue
 
+def _replace_span_per_char(text, cursor, old_sub, new_sub):
+    """Replace old_sub (starting at collapsed cursor) with new_sub, giving each new
+    char the formatting of the old char at the same position. Returns edit count."""
+    from core.document import go_right
+    overlap = min(len(old_sub), len(new_sub))
+    edits = 0
+    for i in range(overlap):
+        if new_sub[i] == old_sub[i]:
+            cursor.goRight(1, False)
+            continue
         # Insert new char AFTER the old char to inherit its formatting
-        # Use a localized clone so we don't lose our place
-        ins = text.createTextCursorByRange(main_cursor)
+        ins = text.createTextCursorByRange(cursor)
         ins.goRight(1, False)
-        text.insertString(ins, new_text[i], False)
-        
-        # Delete the old char (at main_cursor)
-        deleter = text.createTextCursorByRange(main_cursor)
+        text.insertString(ins, new_sub[i], False)
+        # Delete the old char (at cursor), which leaves cursor before the new char
+        deleter = text.createTextCursorByRange(cursor)
         deleter.goRight(1, True)
         deleter.setString("")
-        
-        # Advance main_cursor past the new char (which is now at the current pos)
-        main_cursor.goRight(1, False)
-
-
-
-
-
-    if new_len > old_len:
-        # Extra new characters: insert after the replaced overlap.
-        # The cursor lands at start_offset + overlap (one past the last replaced char).
-        extra_cursor = text.createTextCursor()
-        extra_cursor.gotoStart(False)
-        extra_cursor.goRight(start_offset + overlap, False)
-        text.insertString(extra_cursor, new_text[old_len:], False)
-    elif old_len > new_len:
-        # Leftover old characters: delete them.
-        leftover = text.createTextCursor()
-        leftover.gotoStart(False)
-        leftover.goRight(start_offset + new_len, False)
-        leftover.goRight(old_len - new_len, True)
-        leftover.setString("")
-
-
+        cursor.goRight(1, False)
+        edits += 1
+    if len(new_sub) > overlap:
+        # Extra new characters inherit from the last replaced char (the one before cursor)
+        text.insertString(cursor, new_sub[overlap:], False)
+        edits += 1
+    elif len(old_sub) > overlap:
+        go_right(cursor, len(old_sub) - overlap, True)
+        cursor.setString("")
+        edits += 1
+    return edits
 
 
 def _apply_preserving_format_at_search(model, ctx, new_text, search_string,
@@ -603,156 +726,74 @@ def _apply_preserving_format_at_search(model, ctx, new_text, search_string,
     """Find search_string in the document and replace with new_text using
     format-preserving character-by-character replacement.
     Returns the number of replacements made."""
-    search_candidates = _search_candidates_with_plain(ctx, search_string)
-    for idx, candidate in enumerate(search_candidates):
-        sd = model.createSearchDescriptor()
-        sd.SearchString = candidate
-        sd.SearchRegularExpression = False
-        sd.SearchCaseSensitive = case_sensitive
-        count = 0
-        found = model.findFirst(sd)
-        if not found:
-            continue
-        while found:
-            _replace_text_preserving_format(model, found, new_text, ctx)
-            count += 1
-            if not all_matches:
-                break
-            # After replacement the range has changed; re-search from start
-            found = model.findFirst(sd)
-            if found and count > 100:  # safety valve
-                break
-        if count > 0:
-            debug_log("format_support: _apply_preserving_format_at_search candidate #%d -> replaced %d (preserving formatting)" % (idx, count), context="Markdown")
-            return count
-    debug_log("format_support: _apply_preserving_format_at_search all %d candidates gave 0 replacements" % len(search_candidates), context="Markdown")
-    return 0
+    from core.document import get_text_cursors_at_ranges
+    limit = None if all_matches else 1
+    spans = _find_spans(model, ctx, search_string, limit=limit, case_sensitive=case_sensitive)
+    if spans:
+        found_ranges = get_text_cursors_at_ranges(model, spans)
+    else:
+        found_ranges = _find_ranges_outside_body(model, ctx, search_string, limit=limit,
+                                                 case_sensitive=case_sensitive)
+    if not found_ranges:
+        _log_search_failure(model, search_string)
+        return 0
+    # One pass, back to front: replacing a later match never moves an earlier one
+    for found in reversed(found_ranges):
+        _replace_text_preserving_format(model, found, new_text, ctx)
+    debug_log("format_support: _apply_preserving_format_at_search replaced %d (preserving formatting)" % len(found_ranges), context="Markdown")
+    return len(found_ranges)
 
 
 def _apply_markdown_at_search(model, ctx, markdown_string, search_string, all_matches=False, case_sensitive=True):
     """Find search_string (first or all), replace each match with rendered markdown content.
-    Builds literal search candidates from the raw string and always from LO plain (when available)
-    via _literal_search_candidates, so we handle markdown stripping and multiple line-ending variants."""
-    from core.document import get_document_length
-    search_candidates = _search_candidates_with_plain(ctx, search_string)
-    t0 = time.time()
-    debug_log("markdown_support: _apply_markdown_at_search LO plain took %.3fs, %d candidates" % (time.time() - t0, len(search_candidates)), context="Markdown")
-    # Obtain document sample once for diagnostic logging on failed compares
-    doc_snippet, doc_snippet_repr, doc_break_hex = _get_document_sample_for_search_failure(model, ctx, search_string)
+    Matches come from _find_spans (break-normalised, retried as rendered plain text), or
+    from _find_ranges_outside_body when the body text has none, and are replaced back to
+    front in one pass."""
+    from core.document import DocumentCache, get_text_cursors_at_ranges
+    limit = None if all_matches else 1
+    spans = _find_spans(model, ctx, search_string, limit=limit, case_sensitive=case_sensitive)
+    if spans:
+        found_ranges = get_text_cursors_at_ranges(model, spans)
+        edit_offset = spans[0][0]
+    else:
+        found_ranges = _find_ranges_outside_body(model, ctx, search_string, limit=limit,
+                                                 case_sensitive=case_sensitive)
+        edit_offset = None
+    if not found_ranges:
+        _log_search_failure(model, search_string)
+        return 0
     with _with_temp_buffer(markdown_string) as (path, file_url):
         filter_name, _ = _get_format_props()
         filter_props = (_create_property_value("FilterName", filter_name),)
         try:
-            for idx, search_candidate in enumerate(search_candidates):
-                sd = model.createSearchDescriptor()
-                sd.SearchString = search_candidate
-                sd.SearchRegularExpression = False
-                sd.SearchCaseSensitive = case_sensitive
-                count = 0
-                found = model.findFirst(sd)
-                if not found:
-                    # Log every failed compare with document sample so we can see search vs document
-                    r = repr(search_candidate)
-                    if len(r) > 600:
-                        r = r[:600] + "..."
-                    debug_log("markdown_support: _apply_markdown_at_search candidate #%d FAILED (findFirst no match)" % idx, context="Markdown")
-                    debug_log("markdown_support:   search_candidate len=%d repr=%s" % (len(search_candidate), r), context="Markdown")
-                    debug_log("markdown_support:   document_sample  len=%d repr=%s" % (len(doc_snippet), doc_snippet_repr), context="Markdown")
-                    debug_log("markdown_support:   document_sample break chars: %s" % doc_break_hex, context="Markdown")
-                    continue
-                while found:
-                    text = found.getText()
-                    cursor = text.createTextCursorByRange(found)
+            with DocumentCache.editing(model, edit_offset):
+                for found in reversed(found_ranges):
+                    cursor = found.getText().createTextCursorByRange(found)
                     cursor.setString("")
                     cursor.insertDocumentFromURL(file_url, filter_props)
-                    count += 1
-                    if not all_matches:
-                        break
-                    found = model.findNext(cursor.getEnd(), sd)
-                debug_log("markdown_support: _apply_markdown_at_search candidate #%d -> replaced %d" % (idx, count), context="Markdown")
-                if count > 0:
-                    return count
-            debug_log("markdown_support: _apply_markdown_at_search all %d candidates gave 0 replacements" % len(search_candidates), context="Markdown")
-            return 0
+            debug_log("markdown_support: _apply_markdown_at_search replaced %d" % len(found_ranges), context="Markdown")
+            return len(found_ranges)
         except Exception as e:
             debug_log("markdown_support: _apply_markdown_at_search failed: %s" % e, context="Markdown")
             raise
 
 
-def _find_text_ranges(model, ctx, search_string, start=0, limit=None, case_sensitive=True):
+def _find_text_ranges(model, ctx, search_string, start=0, limit=None, case_sensitive=True,
+                      regex=False, ignore_whitespace=False):
     """Find occurrences of search_string, returning list of {start, end, text} dicts.
     Optional start offset to search from, and limit on number of matches.
     Each range includes "text": the exact document string at that span.
-    Tries exact search_string first; if no match, converts markdown to plain via LO and retries."""
-    from core.document import get_document_length
-    doc_len = get_document_length(model)
-    if start >= doc_len:
+    See _find_spans for how the search string is matched."""
+    from core.document import get_text_mirror
+    mirror = get_text_mirror(model)
+    if start >= len(mirror.text):
         return []
-
-    def _search(s):
-        matches = []
-        try:
-            sd = model.createSearchDescriptor()
-            sd.SearchString = s
-            sd.SearchRegularExpression = False
-            sd.SearchCaseSensitive = case_sensitive
-            cursor = model.getText().createTextCursor()
-            cursor.gotoStart(False)
-            cursor.goRight(start, False)
-            found = model.findNext(cursor, sd)
-            while found:
-                measure_cursor = found.getText().createTextCursor()
-                measure_cursor.gotoStart(False)
-                measure_cursor.gotoRange(found.getStart(), True)
-                m_start = len(measure_cursor.getString())
-                matched_text = found.getString()
-                m_end = m_start + len(matched_text)
-                matches.append({"start": m_start, "end": m_end, "text": matched_text})
-                if limit and len(matches) >= limit:
-                    break
-                found = model.findNext(found, sd)
-        except Exception as e:
-            debug_log("markdown_support: _find_text_ranges failed: %s" % e, context="Markdown")
-        return matches
-
-    r0 = repr(search_string)
-    if len(r0) > 400:
-        r0 = r0[:400] + "..."
-    debug_log("markdown_support: _find_text_ranges initial search len=%d: %s" % (len(search_string), r0), context="Markdown")
-    matches = _search(search_string)
-    debug_log("markdown_support: _find_text_ranges initial -> %d matches" % len(matches), context="Markdown")
-    if matches:
-        # Log first match's actual document text so we see what the doc contains
-        first_text = matches[0].get("text", "")
-        debug_log("markdown_support: _find_text_ranges first match text len=%d repr=%s" % (len(first_text), repr(first_text)[:300]), context="Markdown")
-    if not matches:
-        t0_fallback = time.time()
-        candidates = _search_candidates_with_plain(ctx, search_string)
-        for idx, needle in enumerate(candidates):
-            r = repr(needle)
-            if len(r) > 400:
-                r = r[:400] + "..."
-            debug_log("markdown_support: _find_text_ranges candidate #%d len=%d: %s" % (idx, len(needle), r), context="Markdown")
-            matches = _search(needle)
-            debug_log("markdown_support: _find_text_ranges candidate #%d -> %d matches" % (idx, len(matches)), context="Markdown")
-            if matches:
-                first_text = matches[0].get("text", "")
-                debug_log("markdown_support: _find_text_ranges first match text len=%d repr=%s" % (len(first_text), repr(first_text)[:300]), context="Markdown")
-                break
-        debug_log("markdown_support: _find_text_ranges fallback took %.3fs, %d candidates" % (time.time() - t0_fallback, len(candidates)), context="Markdown")
-        if not matches:
-            # Log document prefix so we can see actual line endings / content
-            try:
-                cursor = model.getText().createTextCursor()
-                cursor.gotoStart(False)
-                n = min(500, doc_len)
-                if n > 0:
-                    cursor.goRight(n, True)
-                    prefix = cursor.getString()
-                    debug_log("markdown_support: _find_text_ranges document prefix (first %d chars) repr=%s" % (len(prefix), repr(prefix)), context="Markdown")
-            except Exception as e:
-                debug_log("markdown_support: _find_text_ranges could not get document prefix: %s" % e, context="Markdown")
-    return matches
+    spans = _find_spans(model, ctx, search_string, start=start, limit=limit,
+                        case_sensitive=case_sensitive, regex=regex,
+                        ignore_whitespace=ignore_whitespace)
+    if not spans:
+        _log_search_failure(model, search_string)
+    return [{"start": s, "end": e, "text": mirror.text[s:e]} for s, e in spans]
 
 
 # ---------------------------------------------------------------------------
@@ -818,6 +859,8 @@ FORMAT_TOOLS = [
                     "start": {"type": "integer", "description": "Start offset to search from (default 0)."},
                     "limit": {"type": "integer", "description": "Maximum number of matches to return (optional)."},
                     "case_sensitive": {"type": "boolean", "description": "Case sensitive search. Default true."},
+                    "regex": {"type": "boolean", "description": "Treat search as a Python regular expression. Default false."},
+                    "ignore_whitespace": {"type": "boolean", "description": "Match any run of spaces/line breaks in the document to any run in search. Default false."},
                 },
                 "required": ["search"],
                 "additionalProperties": False
@@ -976,7 +1019,7 @@ def tool_apply_document_content(model, ctx, args):
             if use_preserve and count > 0:
                 msg += " (formatting preserved)"
             if count == 0:
-                msg += " Tried multiple literal candidates. For section replacement send the full section text as search, or use find_text then apply_document_content with target='range'."
+                msg += " Line breaks were normalised and the search was retried as rendered plain text. For section replacement send the full section text as search, or use find_text then apply_document_content with target='range'."
             return json.dumps({"status": "ok", "message": msg})
         except Exception as e:
             debug_log("markdown_support: apply_document_content search failed: %s" % e, context="Markdown")
@@ -1037,8 +1080,28 @@ def tool_find_text(model, ctx, args):
     start = args.get("start", 0)
     limit = args.get("limit")
     case_sensitive = args.get("case_sensitive", True)
-    
-    ranges = _find_text_ranges(model, ctx, search, start=start, limit=limit, case_sensitive=case_sensitive)
-    return json.dumps({"status": "ok", "ranges": ranges})
+
+    try:
+        ranges = _find_text_ranges(model, ctx, search, start=start, limit=limit, case_sensitive=case_sensitive,
+                                   regex=bool(args.get("regex", False)),
+                                   ignore_whitespace=bool(args.get("ignore_whitespace", False)))
+    except re.error as e:
+        return _tool_error("invalid regex: %s" % e)
+    except Exception as e:
+        debug_log("markdown_support: find_text failed: %s" % e, context="Markdown")
+        return _tool_error(str(e))
+    result = {"status": "ok", "ranges": ranges}
+    if not ranges and not args.get("regex") and not start:
+        # Offsets index the body text only; report matches in tables/frames by text
+        try:
+            outside = _find_ranges_outside_body(model, ctx, search, limit=limit, case_sensitive=case_sensitive)
+        except Exception as e:
+            debug_log("markdown_support: find_text outside-body search failed: %s" % e, context="Markdown")
+            outside = []
+        if outside:
+            result["outside_body"] = [found.getString() for found in outside]
+            result["message"] = ("Found only in tables or frames, which have no document offsets. "
+                                 "Replace with apply_document_content target='search'.")
+    return json.dumps(result)
 
 
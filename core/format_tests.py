@@ -43,7 +43,7 @@ def run_markdown_tests(ctx, model=None):
     if not doc or not hasattr(doc, "getText"):
         return 0, 1, ["No Writer document available."]
 
-    debug_log(ctx, "format_tests: run start (model=%s)" % ("supplied" if model is doc else "new"))
+    debug_log("format_tests: run start (model=%s)" % ("supplied" if model is doc else "new"))
 
     try:
         md = document_to_markdown(doc, ctx, scope="full")
@@ -103,7 +103,7 @@ def run_markdown_tests(ctx, model=None):
         full_text = _read_doc_text(doc)
         len_after = len(full_text)
         content_found = insert_needle in full_text
-        debug_log(ctx, "format_tests: apply at end len_before=%s len_after=%s content_found=%s" % (
+        debug_log("format_tests: apply at end len_before=%s len_after=%s content_found=%s" % (
             len_before, len_after, content_found))
         if content_found:
             passed += 1
@@ -114,7 +114,7 @@ def run_markdown_tests(ctx, model=None):
     except Exception as e:
         failed += 1
         log.append("FAIL: apply at end raised: %s" % e)
-        debug_log(ctx, "format_tests: apply at end raised: %s" % e)
+        debug_log("format_tests: apply at end raised: %s" % e)
 
     # Test: production path (tool_apply_document_content target='end')
     try:
@@ -525,6 +525,32 @@ def _run_format_preserving_tests(doc, ctx, ok, fail, log):
         failed += 1
         log.append("FAIL: shorter format-preserving test raised: %s" % e)
 
+    # --- Test Q: Diff-based replacement only touches the changed word ---
+    try:
+        old_chars = "one two three"
+        rng = _create_colored_text(old_chars)
+        before = _get_char_colors(rng)
+        _replace_text_preserving_format(doc, rng, "one 2 three", ctx)
+        sd = doc.createSearchDescriptor()
+        sd.SearchString = "one 2 three"
+        found = doc.findFirst(sd)
+        if found:
+            # "one " and " three" keep their colors; "2" inherits the color of "t"
+            expected_colors = before[:4] + [before[4]] + before[7:]
+            actual_colors = _get_char_colors(found)
+            if actual_colors == expected_colors:
+                passed += 1
+                ok("diff replacement: only the changed word edited, surrounding colors kept")
+            else:
+                failed += 1
+                fail("diff replacement: colors expected %s got %s" % (expected_colors, actual_colors))
+        else:
+            failed += 1
+            fail("diff replacement: 'one 2 three' not found after replace")
+    except Exception as e:
+        failed += 1
+        log.append("FAIL: diff format-preserving test raised: %s" % e)
+
     
     # --- Test T: Long replacement triggers processEvents (no crash) ---
     try:
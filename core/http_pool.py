@@ -0,0 +1,171 @@
+"""Process-wide HTTP connection pool.
+
+Connections are keyed by (scheme, host, port) and reused with HTTP keep-alive
+across LlmClient instances (sidebars, =PROMPT(), Calc batches) and
+sync_request callers (AI Horde polling, pricing, translation), so repeated
+requests to the same server skip the TCP and TLS handshakes.
+"""
+import ssl
+import time
+import socket
+import threading
+import http.client
+import urllib.parse
+from core.logging import debug_log
+
+DEFAULT_MAX_PER_HOST = 8
+DEFAULT_IDLE_TIMEOUT = 60.0
+
+_ssl_context = None
+_ssl_lock = threading.Lock()
+
+
+def get_unverified_ssl_context():
+    """Return the shared SSL context that doesn't verify certificates.
+
+    Building a context loads the system CA store, which costs several
+    milliseconds, so it is created once and shared (SSLContext is thread-safe)."""
+    global _ssl_context
+    with _ssl_lock:
+        if _ssl_context is None:
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+            _ssl_context = ssl_context
+        return _ssl_context
+
+
+def pool_key(url):
+    """Return (scheme, host, port) for a URL, filling in the default port."""
+    parsed = urllib.parse.urlparse(url)
+    scheme = (parsed.scheme or "http").lower()
+    port = parsed.port or (443 if scheme == "https" else 80)
+    return (scheme, parsed.hostname, port)
+
+
+class ConnectionPool:
+    """Thread-safe pool of http.client connections.
+
+    At most max_per_host connections per key exist at once (idle + checked
+    out); acquire() blocks until one is released. Idle connections older
+    than idle_timeout are closed instead of reused."""
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.max_per_host = max(1, int(max_per_host))
+        self.idle_timeout = idle_timeout
+        self.stats = {"opened": 0, "reused": 0, "discarded": 0}
+        self._idle = {}    # key -> [(conn, released_at), ...], most recent last
+        self._active = {}  # key -> number of checked-out connections
+        self._cond = threading.Condition()
+
+    def configure(self, max_per_host=None, idle_timeout=None):
+        """Update the limits; existing connections are kept."""
+        with self._cond:
+            if max_per_host is not None:
+                self.max_per_host = max(1, int(max_per_host))
+            if idle_timeout is not None:
+                self.idle_timeout = max(0.0, float(idle_timeout))
+            self._cond.notify_all()
+
+    def _new_connection(self, key, timeout):
+        scheme, host, port = key
+        self.stats["opened"] += 1
+        debug_log("Opening new connection to %s://%s:%s" % (scheme, host, port), context="HTTPPool")
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, context=get_unverified_ssl_context(), timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _close_stale(self, key, now):
+        idle = self._idle.get(key)
+        while idle and now - idle[0][1] > self.idle_timeout:
+            conn, _ = idle.pop(0)
+            self.stats["discarded"] += 1
+            conn.close()
+
+    def acquire(self, key, timeout=None):
+        """
+        Check out a connection for key, reusing an idle one when possible.
+
+        Args:
+            key: (scheme, host, port) tuple (see pool_key).
+            timeout: Socket timeout for the request; also bounds the wait for a
+                free slot when max_per_host connections are checked out.
+
+        Returns:
+            (connection, reused): reused is True when the connection came from the
+            idle list, the only case in which a dropped request may be retried.
+
+        Raises:
+            socket.timeout: no connection was released within timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._close_stale(key, time.monotonic())
+                idle = self._idle.get(key)
+                if idle:
+                    conn, _ = idle.pop()
+                    self._active[key] = self._active.get(key, 0) + 1
+                    self.stats["reused"] += 1
+                    break
+                if self._active.get(key, 0) < self.max_per_host:
+                    self._active[key] = self._active.get(key, 0) + 1
+                    conn = None
+                    break
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout(
+                        "timed out waiting for a free connection to %s://%s:%s" % key)
+                self._cond.wait(remaining)
+        if conn is None:
+            try:
+                return self._new_connection(key, timeout), False
+            except Exception:
+                with self._cond:
+                    self._checkin(key)
+                raise
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _checkin(self, key):
+        # Caller holds the lock. Waiters may be blocked on different keys.
+        self._active[key] = max(0, self._active.get(key, 0) - 1)
+        self._cond.notify_all()
+
+    def release(self, key, conn, reuse=True):
+        """Return a checked-out connection; it is closed unless reuse is True and still open."""
+        with self._cond:
+            if reuse and conn.sock is not None:
+                self._idle.setdefault(key, []).append((conn, time.monotonic()))
+            else:
+                conn.close()
+            self._checkin(key)
+
+    def discard_idle(self, key):
+        """Close the idle connections for key (after a connection error they are
+        likely just as stale, so a retry should not pick one of them up)."""
+        with self._cond:
+            for conn, _ in self._idle.pop(key, []):
+                self.stats["discarded"] += 1
+                conn.close()
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones are closed on release)."""
+        with self._cond:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+_pool = ConnectionPool()
+
+
+def get_connection_pool():
+    """Return the process-wide ConnectionPool."""
+    return _pool
@@ -9,7 +9,7 @@ import re
 import base64
 from pathlib import Path
 from core.api import sync_request, LlmClient, _format_http_error_response
-from core.logging import debug_log
+from core.logging import debug_log, DEBUG
 from core.aihordeclient import AiHordeClient
 
 logger = logging.getLogger(__name__)
@@ -87,7 +87,8 @@ class EndpointImageProvider(ImageProvider):
                     raise Exception(_format_http_error_response(http_resp.status, http_resp.reason, err_body))
 
                 result = json.loads(http_resp.read().decode("utf-8"))
-                debug_log("=== Image Response: %s" % json.dumps(result, indent=2), context="API")
+                self.client._release_connection()
+                debug_log(lambda: "=== Image Response: %s" % json.dumps(result, indent=2), context="API", level=DEBUG)
 
                 # Standard OpenAI format: {"data": [{"url": "...", "b64_json": "..."}]}
                 for img in (result.get("data") or []):
@@ -100,6 +101,7 @@ class EndpointImageProvider(ImageProvider):
                                 return self._save_b64(match.group(1))
                         return self._save_url(url)
             except Exception:
+                self.client._close_connection()
                 logger.exception("Image generation failed")
                 raise
 
@@ -1,8 +1,14 @@
-"""Simple file logging for LocalWriter. Single debug log + optional agent log; paths set via init_logging(ctx)."""
+"""Simple file logging for LocalWriter. Single debug log + optional agent log; paths set via init_logging(ctx).
+
+Lines are formatted on the calling thread only when their level is enabled
+and handed to a background writer thread, which appends them in batches,
+rotates the file by size and flushes at exit."""
 import os
 import sys
 import json
 import time
+import queue
+import atexit
 import traceback
 import threading
 
@@ -20,6 +26,24 @@ _watchdog_started = False
 _watchdog_interval_sec = 15
 _watchdog_threshold_sec = 30
 
+# Levels: debug_log defaults to INFO; verbose payload dumps use DEBUG.
+# Config key log_level: "debug", "info" (default), "warning", "error" or "off".
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LOG_LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": 100}
+_log_level = INFO
+
+# Background writer: bounded queue (lines are dropped and counted when full),
+# log files rotated to <name>.1 once they exceed log_max_bytes.
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 500
+DEFAULT_LOG_MAX_BYTES = 5 * 1024 * 1024
+_log_max_bytes = DEFAULT_LOG_MAX_BYTES
+_writer = None
+_writer_lock = threading.Lock()
+
 DEBUG_LOG_FILENAME = "localwriter_debug.log"
 AGENT_LOG_FILENAME = "localwriter_agent.log"
 FALLBACK_DEBUG = os.path.join(os.path.expanduser("~"), "localwriter_debug.log")
@@ -28,7 +52,7 @@ FALLBACK_AGENT = os.path.join(os.path.expanduser("~"), "localwriter_agent.log")
 
 def init_logging(ctx):
     """Set global log paths and enable_agent_log from ctx. Idempotent; safe to call from any entry point."""
-    global _debug_log_path, _agent_log_path, _enable_agent_log
+    global _debug_log_path, _agent_log_path, _enable_agent_log, _log_level, _log_max_bytes
     with _init_lock:
         if _debug_log_path is not None:
             return
@@ -42,6 +66,10 @@ def init_logging(ctx):
                 _debug_log_path = os.path.join(udir, DEBUG_LOG_FILENAME)
                 _agent_log_path = os.path.join(udir, AGENT_LOG_FILENAME)
                 _enable_agent_log = config.as_bool(config.get_config(ctx, "enable_agent_log", False))
+            level = str(config.get_config(ctx, "log_level", "info")).strip().lower()
+            _log_level = LOG_LEVELS.get(level, INFO)
+            _log_max_bytes = config._safe_int(
+                config.get_config(ctx, "log_max_bytes", DEFAULT_LOG_MAX_BYTES), DEFAULT_LOG_MAX_BYTES)
         except Exception:
             pass
 
@@ -65,7 +93,8 @@ def _install_global_exception_hooks():
         try:
             tb_lines = traceback.format_exception(exc_type, exc_value, exc_tb)
             msg = "Unhandled exception:\n" + "".join(tb_lines)
-            debug_log(msg.strip(), context="Excepthook")
+            debug_log(msg.strip(), context="Excepthook", level=ERROR)
+            flush_logs()
         except Exception:
             pass
         try:
@@ -86,7 +115,7 @@ def _install_global_exception_hooks():
                     "".join(traceback.format_exception(args.exc_type, args.exc_value, args.exc_traceback))
                     if getattr(args, "exc_type", None) else "",
                 )
-                debug_log(msg.strip(), context="Excepthook")
+                debug_log(msg.strip(), context="Excepthook", level=ERROR)
             except Exception:
                 pass
             try:
@@ -111,26 +140,106 @@ def log_exception(ex, context="AIHorde"):
             msg = "".join(tb_lines).strip()
         else:
             msg = str(ex)
-        debug_log(msg, context=context)
+        debug_log(msg, context=context, level=ERROR)
     except Exception:
-        debug_log(str(ex), context=context)
+        debug_log(str(ex), context=context, level=ERROR)
+
+
+class _LogWriter(threading.Thread):
+    """Daemon thread appending queued (path, line) pairs to their files in batches."""
+
+    def __init__(self):
+        super().__init__(name="LocalWriterLog", daemon=True)
+        self.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.dropped = 0
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write(self, batch):
+        by_path = {}
+        for path, line in batch:
+            by_path.setdefault(path, []).append(line)
+        if self.dropped:
+            by_path.setdefault(_get_debug_path(), []).append(
+                "[Logging] %d lines dropped (log queue full)\n" % self.dropped)
+            self.dropped = 0
+        for path, lines in by_path.items():
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(lines))
+                    size = f.tell()
+                if _log_max_bytes and size > _log_max_bytes:
+                    os.replace(path, path + ".1")
+            except Exception:
+                pass
+
+    def put(self, path, line):
+        try:
+            self.queue.put_nowait((path, line))
+        except queue.Full:
+            self.dropped += 1
 
 
-def debug_log(msg, context=None):
-    """Write one line to the unified debug log. Uses global path (set by init_logging). No ctx needed."""
+def _get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = _LogWriter()
+                writer.start()
+                atexit.register(flush_logs)
+                _writer = writer
+    return _writer
+
+
+def flush_logs(timeout=2.0):
+    """Wait (up to timeout seconds) until every queued log line has been written."""
+    writer = _writer
+    if writer is None:
+        return
+    deadline = time.monotonic() + timeout
+    while writer.queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def log_enabled(level=DEBUG):
+    """True if messages at level would be written (use to guard expensive logging code)."""
+    return level >= _log_level
+
+
+def debug_log(msg, *args, context=None, level=INFO):
+    """Write one line to the unified debug log. Uses global path (set by init_logging). No ctx needed.
+
+    Formatting is lazy: nothing is evaluated unless level is enabled. msg may be
+    a callable returning the message, and args are applied as msg % args.
+    Example: debug_log(lambda: json.dumps(data, indent=2), context="API", level=DEBUG)
+    """
+    if level < _log_level:
+        return
     try:
-        now = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        ms = int((time.time() % 1) * 1000)
+        if callable(msg):
+            msg = msg()
+        if args:
+            msg = msg % args
+        now = time.time()
         prefix = "[%s] " % context if context else ""
-        line = "%s.%03d | %s%s\n" % (now, ms, prefix, msg)
-    except Exception:
-        line = msg + "\n"
-    path = _get_debug_path()
-    try:
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(line)
+        line = "%s.%03d | %s%s\n" % (
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)), int((now % 1) * 1000), prefix, msg)
     except Exception:
-        pass
+        line = "%s %r\n" % (msg, args)
+    _get_writer().put(_get_debug_path(), line)
 
 
 def agent_log(location, message, data=None, hypothesis_id=None, run_id=None):
@@ -145,12 +254,7 @@ def agent_log(location, message, data=None, hypothesis_id=None, run_id=None):
     if run_id is not None:
         payload["runId"] = run_id
     line = json.dumps(payload) + "\n"
-    path = _get_agent_path()
-    try:
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(line)
-    except Exception:
-        pass
+    _get_writer().put(_get_agent_path(), line)
 
 
 def update_activity_state(phase, round_num=None, tool_name=None):
@@ -181,7 +285,7 @@ def _watchdog_loop(status_control):
             continue
         msg = "WATCHDOG: no activity for %ds; phase=%s round=%s tool=%s" % (
             int(elapsed), phase, round_num, tool_name if tool_name else "")
-        debug_log(msg, context="Chat")
+        debug_log(msg, context="Chat", level=WARNING)
         if status_control:
             try:
                 hung_text = "Hung: %s round %s" % (phase, round_num)
@@ -0,0 +1,186 @@
+"""In-process Markdown/HTML to plain text, as LibreOffice's import filters render it.
+
+Search-based edits and find_text look up the *rendered* form of what the model
+sent ("## Summary" is stored as the paragraph "Summary"). markup_to_plain covers
+the subset models actually emit: headings, paragraphs, lists, block quotes,
+emphasis, strikethrough, code spans, links and escapes for Markdown; paragraph,
+heading, list, line-break and inline tags for HTML. It returns None for
+anything it cannot reproduce exactly (tables, code blocks, images, raw HTML in
+Markdown, ambiguous emphasis, ...) so the caller can fall back to loading the
+string into a hidden Writer document.
+"""
+import functools
+import re
+from html.parser import HTMLParser
+
+CACHE_SIZE = 512
+
+# Lines the fast path does not render: fences, tables, rules/setext underlines,
+# HTML blocks, reference definitions, footnotes, task-list items
+_UNSUPPORTED_LINE_RE = re.compile(
+    r"^(```|~~~|\||[-*_](\s*[-*_]){2,}\s*$|=+\s*$|<|\[[^\]]+\]:|\[\^|([-*+]|\d+[.)])\s+\[[ xX]\])")
+_HEADING_RE = re.compile(r"^#{1,6}(?:\s+(.*?))?(?:\s+#+)?\s*$")
+_LIST_ITEM_RE = re.compile(r"^(?:[-*+]|\d{1,9}[.)])\s+(.*)$")
+_QUOTE_RE = re.compile(r"^(?:>\s?)+")
+
+_CODE_SPAN_RE = re.compile(r"(`+)(.+?)(?<!`)\1(?!`)")
+_ESCAPE_RE = re.compile(r"\\([!-/:-@\[-`{-~])")
+_LINK_RE = re.compile(r"\[([^\[\]]*)\]\(([^()\s]*)(?:\s+\"[^\"]*\")?\)")
+_EMPHASIS_RES = (
+    re.compile(r"\*\*\*(?=\S)(.+?)(?<=\S)\*\*\*"),
+    re.compile(r"(?<!\w)___(?=\S)(.+?)(?<=\S)___(?!\w)"),
+    re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*"),
+    re.compile(r"(?<!\w)__(?=\S)(.+?)(?<=\S)__(?!\w)"),
+    re.compile(r"\*(?=\S)(.+?)(?<=\S)\*"),
+    re.compile(r"(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)"),
+    re.compile(r"~~(?=\S)(.+?)(?<=\S)~~"),
+)
+_LEFTOVER_RE = re.compile(r"[*`<>]|~~|\]\(|!\[|\]\[|(?<!\w)_|_(?!\w)|&(?:#\d+|#x[0-9a-fA-F]+|\w+);")
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _md_inline(text):
+    protected = []
+
+    def protect(value):
+        protected.append(value)
+        return "\x00%d\x00" % (len(protected) - 1)
+
+    def code_span(m):
+        content = m.group(2)
+        if len(content) > 2 and content[0] == " " and content[-1] == " " and content.strip():
+            content = content[1:-1]
+        return protect(content)
+
+    text = _CODE_SPAN_RE.sub(code_span, text)
+    text = _ESCAPE_RE.sub(lambda m: protect(m.group(1)), text)
+    if "![" in text:
+        raise _Unsupported("image")
+    text = _LINK_RE.sub(lambda m: m.group(1), text)
+    changed = True
+    while changed:
+        changed = False
+        for regex in _EMPHASIS_RES:
+            text, n = regex.subn(r"\1", text)
+            changed = changed or n > 0
+    if _LEFTOVER_RE.search(text):
+        raise _Unsupported("markup left after conversion")
+    return re.sub("\x00(\\d+)\x00", lambda m: protected[int(m.group(1))], text)
+
+
+def _markdown_to_plain(text):
+    paragraphs = []
+    current = []
+
+    def flush():
+        if current:
+            paragraphs.append(_md_inline(" ".join(current)))
+            del current[:]
+
+    for line in text.split("\n"):
+        if not line.strip():
+            flush()
+            continue
+        if line.startswith(("    ", "\t")) and not current:
+            raise _Unsupported("indented code block")
+        if line.endswith(("  ", "\\")):
+            raise _Unsupported("hard line break")
+        stripped = _QUOTE_RE.sub("", line.strip())
+        if not stripped:
+            flush()
+            continue
+        if _UNSUPPORTED_LINE_RE.match(stripped):
+            raise _Unsupported("block construct")
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            flush()
+            paragraphs.append(_md_inline(heading.group(1) or ""))
+            continue
+        item = _LIST_ITEM_RE.match(stripped)
+        if item:
+            # List numbering/bullets are paragraph attributes, not text
+            flush()
+            current.append(item.group(1).strip())
+            continue
+        # A soft line break inside a paragraph renders as a space
+        current.append(stripped)
+    flush()
+    return "\n".join(paragraphs)
+
+
+_HTML_BLOCK_TAGS = frozenset((
+    "p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "li", "ul", "ol", "blockquote",
+    "html", "body", "head", "title", "section", "article", "header", "footer", "main",
+))
+_HTML_INLINE_TAGS = frozenset((
+    "b", "strong", "i", "em", "u", "s", "strike", "del", "ins", "span", "a", "font",
+    "sub", "sup", "code", "small", "big", "mark", "abbr", "cite", "q", "meta",
+))
+
+
+class _HTMLPlain(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self.current = []
+        self.skip = 0
+
+    def _flush(self):
+        # Source whitespace collapses to one space; <br> (kept as \x0b) is a line break
+        text = re.sub(r"[ \t\r\n\f]+", " ", "".join(self.current))
+        text = re.sub(r" ?\x0b ?", "\n", text).strip(" ")
+        if text:
+            self.paragraphs.append(text)
+        self.current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("head", "title"):
+            self.skip += 1
+        if tag == "br":
+            self.current.append("\x0b")
+        elif tag in _HTML_BLOCK_TAGS:
+            self._flush()
+        elif tag not in _HTML_INLINE_TAGS:
+            raise _Unsupported("<%s>" % tag)
+
+    def handle_endtag(self, tag):
+        if tag in ("head", "title"):
+            self.skip = max(0, self.skip - 1)
+        if tag in _HTML_BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.current.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _html_to_plain(text):
+    parser = _HTMLPlain()
+    parser.feed(text)
+    parser.close()
+    return "\n".join(parser.paragraphs)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def markup_to_plain(text, fmt="markdown"):
+    """Plain text of text rendered as fmt ("markdown" or "html"), with paragraphs
+    joined by "\\n" and no trailing newline; None if the text uses constructs this
+    converter does not reproduce. Results are memoised."""
+    if text is None:
+        return None
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    try:
+        if fmt == "html":
+            plain = _html_to_plain(text)
+        else:
+            plain = _markdown_to_plain(text)
+    except (_Unsupported, ValueError):
+        return None
+    return plain.rstrip("\n")
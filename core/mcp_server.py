@@ -12,11 +12,13 @@ import os
 import socket as _socket
 import subprocess as _subprocess
 import threading
+import time
 import urllib.parse
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
-from core.mcp_thread import execute_on_main_thread
+from core.mcp_thread import execute_on_main_thread, get_mcp_queue_stats
 from core.document import is_calc, is_draw, is_writer
+from core.doc_pool import get_pool_stats, is_pool_document
 from core.tool_bus import tool_bus
 
 # Health response body must contain this so _probe_health identifies our server
@@ -154,20 +156,96 @@ def _kill_zombies_on_port(host, port):
     return not _is_port_bound(host, port)
 
 
+# Seconds a tool call (or a whole /tools/batch) may wait for and run on the main thread
+TOOL_CALL_TIMEOUT = 30.0
+BATCH_TIMEOUT_MAX = 120.0
+# A batch runs on the main thread in one go; longer lists must be split by the client
+MAX_BATCH_CALLS = 50
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = 30
+
+
+def _execute_tool_call(ctx, doc, doc_type, tool_name, args):
+    """Run one tool on doc. Main thread. Returns the tool's JSON string (or dict)."""
+    if doc_type == "calc":
+        from core.calc_tools import execute_calc_tool
+        return execute_calc_tool(tool_name, args, doc, ctx)
+    if doc_type == "draw":
+        from core.draw_tools import execute_draw_tool
+        return execute_draw_tool(tool_name, args, doc, ctx, status_callback=None)
+    from core.document_tools import execute_tool
+    return execute_tool(tool_name, args, doc, ctx)
+
+
+def _parse_batch(body):
+    """Return [(tool_name, args), ...] from a /tools/batch body, or raise ValueError.
+    Accepts {"calls": [{"tool": name, "args": {...}}, ...]} or the bare list."""
+    calls = body.get("calls") if isinstance(body, dict) else body
+    if not isinstance(calls, list) or not calls:
+        raise ValueError("expected a non-empty 'calls' list")
+    if len(calls) > MAX_BATCH_CALLS:
+        raise ValueError("too many calls (%d); at most %d per batch" % (len(calls), MAX_BATCH_CALLS))
+    out = []
+    for i, call in enumerate(calls):
+        if not isinstance(call, dict) or not call.get("tool"):
+            raise ValueError("call %d: expected {\"tool\": name, \"args\": {...}}" % i)
+        args = call.get("args") or {}
+        if not isinstance(args, dict):
+            raise ValueError("call %d: 'args' must be an object" % i)
+        out.append((str(call["tool"]), args))
+    return out
+
+
+def _is_error_result(result):
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
 class MCPHandler(BaseHTTPRequestHandler):
+    """Request handler. HTTP/1.1 so clients can keep the connection open between
+    calls; every response carries Content-Length and a Server-Timing header
+    (queue = wait for the main thread, exec = time on it, total)."""
     ctx = None  # set at class level before server starts
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
 
-    def _respond(self, code, body):
-        if isinstance(body, dict):
+    def _respond(self, code, body, timing=None):
+        if isinstance(body, (dict, list)):
             body = json.dumps(body)
         if isinstance(body, str):
             body = body.encode("utf-8")
         self.send_response(code)
         self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
         self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "Server-Timing")
+        self._send_timing(timing)
         self.end_headers()
         self.wfile.write(body)
 
+    def _send_timing(self, timing):
+        total = (time.perf_counter() - self._t0) * 1000.0
+        parts = ["%s;dur=%.1f" % (name, ms) for name, ms in (timing or {}).items()]
+        parts.append("total;dur=%.1f" % total)
+        self.send_header("Server-Timing", ", ".join(parts))
+
+    def _on_main_thread(self, func, timeout):
+        """execute_on_main_thread, returning (result, {"queue": ms, "exec": ms})."""
+        queued = time.perf_counter()
+        started = []
+
+        def _timed():
+            started.append(time.perf_counter())
+            return func()
+
+        result = execute_on_main_thread(_timed, timeout=timeout)
+        done = time.perf_counter()
+        begin = started[0] if started else done
+        return result, {"queue": (begin - queued) * 1000.0, "exec": (done - begin) * 1000.0}
+
+    def parse_request(self):
+        self._t0 = time.perf_counter()
+        return super().parse_request()
+
     def log_message(self, *args):
         pass
 
@@ -176,11 +254,13 @@ class MCPHandler(BaseHTTPRequestHandler):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type, X-Document-URL")
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
     def do_GET(self):
         if self.path == "/health":
-            self._respond(200, {"status": "ok", "name": MCP_HEALTH_SIGNATURE})
+            self._respond(200, {"status": "ok", "name": MCP_HEALTH_SIGNATURE, "queue": get_mcp_queue_stats(),
+                                "doc_pool": get_pool_stats()})
             return
         if self.path in ("/", "/tools", "/documents"):
             doc_url = self.headers.get("X-Document-URL") or None
@@ -198,6 +278,8 @@ class MCPHandler(BaseHTTPRequestHandler):
                         while enum.hasMoreElements():
                             d = enum.nextElement()
                             try:
+                                if is_pool_document(d):
+                                    continue
                                 url = d.getURL() if hasattr(d, "getURL") else ""
                                 t = "calc" if is_calc(d) else "draw" if is_draw(d) else "writer"
                                 out.append({"url": url or "", "type": t})
@@ -218,8 +300,8 @@ class MCPHandler(BaseHTTPRequestHandler):
                 return {"tools": tools, "count": len(tools)}
 
             try:
-                result = execute_on_main_thread(_run, timeout=10.0)
-                self._respond(200, result)
+                result, timing = self._on_main_thread(_run, timeout=10.0)
+                self._respond(200, result, timing)
             except TimeoutError:
                 self._respond(504, {"status": "error", "message": "timeout"})
             except Exception as e:
@@ -227,10 +309,25 @@ class MCPHandler(BaseHTTPRequestHandler):
             return
         self._respond(404, {"error": "not found"})
 
+    def _read_json_body(self):
+        """Read the request body (always, so a kept-alive connection stays in sync)."""
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw.decode("utf-8")) if raw else {}
+
     def do_POST(self):
-        length = int(self.headers.get("Content-Length", 0))
-        body = json.loads(self.rfile.read(length).decode("utf-8")) if length else {}
+        try:
+            body = self._read_json_body()
+        except (ValueError, UnicodeDecodeError) as e:
+            self._respond(400, {"status": "error", "message": "invalid JSON body: %s" % e})
+            return
         path = self.path.rstrip("/")
+        if path == "/tools/batch":
+            self._handle_batch(body)
+            return
+        if not isinstance(body, dict):
+            self._respond(400, {"status": "error", "message": "JSON body must be an object"})
+            return
         tool_name = path[7:] if path.startswith("/tools/") else body.get("tool")
         if not tool_name:
             self._respond(400, {"status": "error", "message": "missing tool name"})
@@ -240,41 +337,113 @@ class MCPHandler(BaseHTTPRequestHandler):
         tool_bus.broadcast("request", {"method": "POST", "tool": tool_name, "args": body})
 
         def _run():
-            from core.calc_bridge import CalcBridge
-            from core.draw_bridge import DrawBridge
             doc, doc_type = _resolve_document(self.ctx, doc_url)
             if doc is None:
                 return json.dumps({"status": "error", "message": "No document found. Open a document or set X-Document-URL."})
-            if doc_type == "calc":
-                from core.calc_tools import execute_calc_tool
-                return execute_calc_tool(tool_name, body, doc, self.ctx)
-            if doc_type == "draw":
-                from core.draw_tools import execute_draw_tool
-                return execute_draw_tool(tool_name, body, doc, self.ctx, status_callback=None)
-            from core.document_tools import execute_tool
-            return execute_tool(tool_name, body, doc, self.ctx)
+            return _execute_tool_call(self.ctx, doc, doc_type, tool_name, body)
 
         try:
-            result = execute_on_main_thread(_run, timeout=30.0)
+            result, timing = self._on_main_thread(_run, timeout=TOOL_CALL_TIMEOUT)
             res_json = result if isinstance(result, str) else json.dumps(result)
             
             # Broadcast result snippet
             snippet = (res_json or "")[:200]
             tool_bus.broadcast("result", {"tool": tool_name, "result": snippet})
             
-            self._respond(200, res_json)
+            self._respond(200, res_json, timing)
         except TimeoutError:
             self._respond(504, {"status": "error", "message": "timeout"})
         except Exception as e:
             self._respond(500, {"status": "error", "message": str(e)})
 
+    def _handle_batch(self, body):
+        """POST /tools/batch: run an ordered list of tool calls in one main-thread
+        dispatch against one document. With "stop_on_error": true, calls after the
+        first error are skipped. On timeout the calls not yet started are cancelled
+        and the 504 lists the results completed so far."""
+        try:
+            calls = _parse_batch(body)
+        except ValueError as e:
+            self._respond(400, {"status": "error", "message": str(e)})
+            return
+        stop_on_error = isinstance(body, dict) and bool(body.get("stop_on_error", False))
+        doc_url = self.headers.get("X-Document-URL") or None
+
+        for tool_name, args in calls:
+            tool_bus.broadcast("request", {"method": "POST", "tool": tool_name, "args": args})
+
+        results = []
+        running = []
+        cancel = threading.Event()
+
+        def _run(cancel):
+            doc, doc_type = _resolve_document(self.ctx, doc_url)
+            if doc is None:
+                return None
+            for tool_name, args in calls:
+                if cancel.is_set():
+                    break
+                running[:] = [tool_name]
+                t0 = time.perf_counter()
+                try:
+                    result = _execute_tool_call(self.ctx, doc, doc_type, tool_name, args)
+                    if isinstance(result, str):
+                        try:
+                            result = json.loads(result)
+                        except ValueError:
+                            pass
+                except Exception as e:
+                    result = {"status": "error", "message": str(e)}
+                results.append({"tool": tool_name, "result": result,
+                                "ms": round((time.perf_counter() - t0) * 1000.0, 1)})
+                del running[:]
+                if stop_on_error and _is_error_result(result):
+                    break
+            return results
+
+        try:
+            timeout = min(TOOL_CALL_TIMEOUT * len(calls), BATCH_TIMEOUT_MAX)
+            outcome, timing = self._on_main_thread(lambda: _run(cancel), timeout=timeout)
+        except TimeoutError:
+            # Stop the main thread after the call in progress; report what was applied
+            cancel.set()
+            done = list(results)
+            self._respond(504, {
+                "status": "error",
+                "message": "timeout; calls not yet started were cancelled",
+                "results": done,
+                "executed": len(done),
+                "in_progress": running[0] if running else None,
+            })
+            return
+        except Exception as e:
+            self._respond(500, {"status": "error", "message": str(e)})
+            return
+        if outcome is None:
+            self._respond(200, {"status": "error", "message": "No document found. Open a document or set X-Document-URL."}, timing)
+            return
+        for item in results:
+            tool_bus.broadcast("result", {"tool": item["tool"], "result": json.dumps(item["result"])[:200]})
+        errors = sum(1 for item in results if _is_error_result(item["result"]))
+        self._respond(200, {
+            "status": "ok" if not errors else "partial",
+            "results": results,
+            "executed": len(results),
+            "skipped": len(calls) - len(results),
+            "errors": errors,
+        }, timing)
+
 
 class MCPHttpServer:
+    """Threaded HTTP server: each connection gets its own thread, so /health and
+    other clients are answered while a tool call waits for the main thread."""
+
     def __init__(self, ctx, port=8765):
         MCPHandler.ctx = ctx
         self._ctx = ctx
         self._port = port
-        self._server = HTTPServer(("localhost", port), MCPHandler)
+        self._server = ThreadingHTTPServer(("localhost", port), MCPHandler)
+        self._server.daemon_threads = True
         self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
 
     def start(self):
@@ -4,14 +4,35 @@
 # to that project; check libreoffice-mcp-extension/ when maintaining this module.
 """
 MCP main-thread executor: work is queued from HTTP handler threads and drained
-on the UNO main thread (via UNO Timer in main.py). All UNO calls must run on
-the main thread.
+on the UNO main thread. All UNO calls must run on the main thread.
+
+Enqueuing wakes the main thread right away through the waker registered with
+set_main_thread_waker (main.py posts an AsyncCallback), at most one pending
+wake-up at a time. drain_mcp_queue runs queued work until the queue is empty or
+its time budget is used up, then asks for another wake-up if work remains.
 """
+import collections
 import queue
 import threading
+import time
 
 _mcp_queue = queue.Queue()
 
+# Seconds of queued work drain_mcp_queue runs per main-thread visit (at least one item)
+DRAIN_BUDGET = 0.05
+# Number of recent items kept for the wait/exec percentiles
+STATS_WINDOW = 1000
+
+_waker = None
+_wake_lock = threading.Lock()
+_wake_pending = False
+
+_stats_lock = threading.Lock()
+_waits = collections.deque(maxlen=STATS_WINDOW)   # seconds from enqueue to start
+_execs = collections.deque(maxlen=STATS_WINDOW)   # seconds on the main thread
+_processed = 0
+_max_depth = 0
+
 
 class _Future:
     def __init__(self):
@@ -35,26 +56,73 @@ class _Future:
         return self._result
 
 
+def set_main_thread_waker(waker):
+    """Register a thread-safe callable that makes the main thread call
+    drain_mcp_queue() soon (None to unregister). Pending work triggers a wake-up."""
+    global _waker, _wake_pending
+    with _wake_lock:
+        _waker = waker
+        _wake_pending = False
+    if waker is not None and not _mcp_queue.empty():
+        request_drain()
+
+
+def request_drain(force=False):
+    """Wake the main thread unless a wake-up is already pending (or force)."""
+    global _wake_pending
+    with _wake_lock:
+        waker = _waker
+        if waker is None or (_wake_pending and not force):
+            return
+        _wake_pending = True
+    try:
+        waker()
+    except Exception as e:
+        with _wake_lock:
+            _wake_pending = False
+        try:
+            from core.logging import debug_log
+            debug_log("MCP wake-up failed: %s" % e, context="MCP")
+        except Exception:
+            pass
+
+
+def _enqueue(func, args, future):
+    global _max_depth
+    _mcp_queue.put((func, args, future, time.perf_counter()))
+    depth = _mcp_queue.qsize()
+    if depth > _max_depth:
+        _max_depth = depth
+    request_drain()
+
+
 def execute_on_main_thread(func, *args, timeout=30.0):
     future = _Future()
-    _mcp_queue.put((func, args, future))
+    _enqueue(func, args, future)
     return future.result(timeout=timeout)
 
 
 def post_to_main_thread(func, *args):
     """Put a task on the main thread queue and return immediately."""
-    _mcp_queue.put((func, args, None))
+    _enqueue(func, args, None)
 
 
-def drain_mcp_queue(max_per_tick=5):
-    """Drain pending MCP requests. Called on the main thread."""
+def drain_mcp_queue(budget=DRAIN_BUDGET):
+    """Drain pending MCP requests for up to budget seconds. Called on the main thread.
+    Returns the number of items run."""
+    global _wake_pending, _processed
+    with _wake_lock:
+        # Work enqueued from now on needs a new wake-up
+        _wake_pending = False
+    start = time.perf_counter()
     n = 0
-    for _ in range(max_per_tick):
+    while True:
         try:
-            func, args, future = _mcp_queue.get_nowait()
+            func, args, future, queued_at = _mcp_queue.get_nowait()
         except queue.Empty:
             break
         n += 1
+        t0 = time.perf_counter()
         try:
             res = func(*args)
             if future:
@@ -62,9 +130,50 @@ def drain_mcp_queue(max_per_tick=5):
         except Exception as e:
             if future:
                 future.set_exception(e)
+        t1 = time.perf_counter()
+        with _stats_lock:
+            _waits.append(t0 - queued_at)
+            _execs.append(t1 - t0)
+            _processed += 1
+        if t1 - start >= budget:
+            break
+    if not _mcp_queue.empty():
+        # Budget used up: let the UI run, then continue on the next wake-up
+        request_drain()
     if n:
         try:
-            from core.logging import debug_log
-            debug_log("MCP queue drained %d item(s)" % n, context="MCP")
+            from core.logging import debug_log, log_enabled, DEBUG
+            if log_enabled(DEBUG):
+                debug_log("MCP queue drained %d item(s) in %.1f ms" % (n, (time.perf_counter() - start) * 1000.0),
+                          context="MCP", level=DEBUG)
         except Exception:
             pass
+    return n
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(q):
+        return round(ordered[min(last, int(q * len(ordered)))] * 1000.0, 2)
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": round(ordered[-1] * 1000.0, 2)}
+
+
+def get_mcp_queue_stats():
+    """Queue depth (now and peak), items processed, and wait/exec percentiles in ms
+    over the last STATS_WINDOW items."""
+    with _stats_lock:
+        waits = list(_waits)
+        execs = list(_execs)
+        processed = _processed
+    return {
+        "depth": _mcp_queue.qsize(),
+        "max_depth": _max_depth,
+        "processed": processed,
+        "wait_ms": _percentiles(waits),
+        "exec_ms": _percentiles(execs),
+        "event_driven": _waker is not None,
+    }
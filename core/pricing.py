@@ -14,8 +14,80 @@ def _get_cache_path(ctx):
         return None
     return os.path.join(config_dir, PRICING_FILENAME)
 
+# Cache file format: {"format": 2, "rates": {model_id: [prompt_rate, completion_rate]}}.
+# Older caches hold the raw /models list and are still read.
+PRICING_FORMAT = 2
+
+# In-memory index of the cache file: (path, mtime_ns, size) it was built from, and
+# {normalized id or alias: (prompt_rate, completion_rate) or None if ambiguous}
+_index_stamp = None
+_index = {}
+
+
+def _compact_rates(models):
+    """Reduce the OpenRouter /models list to {id: [prompt_rate, completion_rate]}."""
+    rates = {}
+    for m in models:
+        model_id = m.get("id") if isinstance(m, dict) else None
+        if not model_id:
+            continue
+        p = m.get("pricing") or {}
+        try:
+            # OpenRouter /models returns USD per 1 token
+            rates[model_id] = [float(p.get("prompt", 0) or 0), float(p.get("completion", 0) or 0)]
+        except (TypeError, ValueError):
+            continue
+    return rates
+
+
+def _normalize_model_id(model_id):
+    return str(model_id or "").strip().lower()
+
+
+def _build_index(rates):
+    """Index rates by normalized id, plus the bare name without the vendor prefix
+    ("openai/gpt-4o" -> "gpt-4o") when only one vendor uses that name."""
+    index = {}
+    aliases = {}
+    for model_id, (prompt_rate, completion_rate) in rates.items():
+        key = _normalize_model_id(model_id)
+        index[key] = (prompt_rate, completion_rate)
+        bare = key.rsplit("/", 1)[-1]
+        if bare != key:
+            aliases[bare] = None if bare in aliases and aliases[bare] != index[key] else index[key]
+    for bare, value in aliases.items():
+        index.setdefault(bare, value)
+    return index
+
+
+def _load_index(cache_path):
+    """Return the index for cache_path, re-reading the file only if it changed."""
+    global _index_stamp, _index
+    try:
+        st = os.stat(cache_path)
+    except OSError:
+        return None
+    stamp = (cache_path, st.st_mtime_ns, st.st_size)
+    if stamp == _index_stamp:
+        return _index
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if isinstance(data, dict) and data.get("format") == PRICING_FORMAT:
+        rates = data.get("rates") or {}
+    elif isinstance(data, list):
+        rates = _compact_rates(data)
+    else:
+        return None
+    _index = _build_index(rates)
+    _index_stamp = stamp
+    return _index
+
+
 def fetch_openrouter_pricing(ctx, force=False):
-    """Fetch all model pricing from OpenRouter and cache it locally."""
+    """Fetch all model pricing from OpenRouter and cache it locally (ids and rates only)."""
     cache_path = _get_cache_path(ctx)
     
     if not force and cache_path and os.path.exists(cache_path):
@@ -29,32 +101,30 @@ def fetch_openrouter_pricing(ctx, force=False):
     try:
         data = sync_request(url, parse_json=True)
         if data and "data" in data:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(data["data"], f, indent=2)
-            debug_log(f"Cached {len(data['data'])} models.", context="Pricing")
+            rates = _compact_rates(data["data"])
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"format": PRICING_FORMAT, "rates": rates}, f, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
+            debug_log(f"Cached {len(rates)} models.", context="Pricing")
     except Exception as e:
         debug_log(f"Failed to fetch OpenRouter pricing: {e}", context="Pricing")
 
 def get_model_pricing(ctx, model_id):
-    """Return (prompt_rate, completion_rate) per token in USD."""
+    """Return (prompt_rate, completion_rate) per token in USD, or None if unknown.
+    Matches ids case-insensitively, ignores ":free"/":online"-style variant
+    suffixes and accepts names without the vendor prefix ("gpt-4o")."""
     cache_path = _get_cache_path(ctx)
-    if not cache_path or not os.path.exists(cache_path):
+    if not cache_path:
         return None
-        
-    try:
-        with open(cache_path, "r", encoding="utf-8") as f:
-            models = json.load(f)
-            
-        for m in models:
-            if m.get("id") == model_id:
-                p = m.get("pricing", {})
-                # Rates are often given per 1000 tokens or similar in some APIs, 
-                # but OpenRouter /models returns USD per 1 token.
-                return float(p.get("prompt", 0)), float(p.get("completion", 0))
-    except (IOError, json.JSONDecodeError, ValueError):
-        pass
-        
-    return None
+    index = _load_index(cache_path)
+    if not index:
+        return None
+    key = _normalize_model_id(model_id)
+    rates = index.get(key)
+    if rates is None and ":" in key:
+        rates = index.get(key.split(":", 1)[0])
+    return rates
 
 def calculate_cost(ctx, usage, model_id):
     """Calculate USD cost for a turn based on usage dict and model hardware."""
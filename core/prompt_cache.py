@@ -0,0 +1,219 @@
+"""Persistent result cache for the Calc =PROMPT() function.
+
+Results are content-addressed by (endpoint, model, system prompt, message,
+max_tokens) and stored in localwriter_prompt_cache.json next to
+localwriter.json, so recalculating or reopening a sheet with unchanged
+=PROMPT() cells does not call the model again.
+"""
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from core.config import user_config_dir, get_config_dict, as_bool, _safe_int
+from core.logging import debug_log
+
+PROMPT_CACHE_FILENAME = "localwriter_prompt_cache.json"
+PROMPT_CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL_DAYS = 30
+# Writes are batched: a sheet recalculating 2,000 cells should not rewrite the
+# file 2,000 times. The file is written SAVE_DELAY seconds after the last
+# change (so the end of a recalculation burst is saved promptly), and at
+# least every MAX_SAVE_DELAY seconds while changes keep coming. Pending
+# changes are also flushed at exit and on clear().
+SAVE_DELAY = 1.0
+MAX_SAVE_DELAY = 10.0
+
+
+def prompt_cache_key(endpoint, model, system_prompt, message, max_tokens):
+    """Return the cache key (sha256 hex) for one =PROMPT() call."""
+    payload = json.dumps(
+        [str(endpoint or "").strip(), str(model or ""), str(system_prompt or ""),
+         str(message or ""), int(max_tokens)],
+        ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """LRU + TTL cache of prompt results backed by a JSON file.
+
+    Entries are kept in an OrderedDict in least- to most-recently-used order;
+    each value is [created_timestamp, text]. All methods are thread-safe."""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_DAYS * 86400):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._dirty = False
+        self._timer = None
+        self._changed_at = 0.0
+        self._pending_since = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, ValueError) as e:
+            debug_log("Ignoring unreadable prompt cache %s: %s" % (self.path, e), context="PromptCache")
+            return
+        if not isinstance(data, dict) or data.get("version") != PROMPT_CACHE_VERSION:
+            return
+        now = time.time()
+        try:
+            for key, entry in data.get("entries", []):
+                if not isinstance(entry[0], (int, float)) or not isinstance(entry[1], str):
+                    raise TypeError("malformed entry for %r" % (key,))
+                if not self._expired(entry, now):
+                    self._entries[key] = entry
+        except (TypeError, ValueError, IndexError) as e:
+            debug_log("Ignoring malformed prompt cache %s: %s" % (self.path, e), context="PromptCache")
+            self._entries = OrderedDict()
+            return
+        self._evict()
+
+    def _expired(self, entry, now):
+        return self.ttl and now - entry[0] > self.ttl
+
+    def _evict(self):
+        # Expired entries are dropped on load and on lookup, so only the size
+        # limit needs enforcing here.
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
+
+    def get(self, key):
+        """Return the cached text for key, or None if missing or expired."""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, time.time()):
+                del self._entries[key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, text):
+        """Store text under key, evicting the least recently used entries over the limit."""
+        with self._lock:
+            self._load()
+            self._entries[key] = [time.time(), text]
+            self._entries.move_to_end(key)
+            self._evict()
+            self._dirty = True
+            self._schedule_save()
+
+    def clear(self):
+        """Drop every entry and write the empty cache to disk."""
+        with self._lock:
+            self._entries = OrderedDict()
+            self._dirty = True
+            self._save()
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self._entries)
+
+    def flush(self):
+        """Write pending changes to disk."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _schedule_save(self):
+        # Caller holds the lock. One timer per burst; it re-arms itself until
+        # the cache has been quiet for SAVE_DELAY (or MAX_SAVE_DELAY has passed).
+        now = time.monotonic()
+        self._changed_at = now
+        if self._timer is None:
+            self._pending_since = now
+            self._start_timer(SAVE_DELAY)
+
+    def _start_timer(self, delay):
+        self._timer = threading.Timer(delay, self._on_save_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_save_timer(self):
+        with self._lock:
+            self._timer = None
+            if not self._dirty:
+                return
+            now = time.monotonic()
+            quiet_left = SAVE_DELAY - (now - self._changed_at)
+            cap_left = MAX_SAVE_DELAY - (now - self._pending_since)
+            if quiet_left > 0 and cap_left > 0:
+                self._start_timer(min(quiet_left, cap_left))
+                return
+            self._save()
+
+    def _save(self):
+        # Caller holds the lock. Write to a temp file and rename so a crash
+        # mid-write never leaves a truncated cache behind.
+        if not self.path or self._entries is None:
+            return
+        data = {"version": PROMPT_CACHE_VERSION, "entries": list(self._entries.items())}
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except (IOError, OSError) as e:
+            debug_log("Error writing prompt cache %s: %s" % (self.path, e), context="PromptCache")
+
+
+_prompt_cache = None
+_prompt_cache_lock = threading.Lock()
+
+
+def _shared_cache(ctx):
+    global _prompt_cache
+    with _prompt_cache_lock:
+        if _prompt_cache is None:
+            config_dir = user_config_dir(ctx)
+            if not config_dir:
+                return None
+            _prompt_cache = PromptCache(os.path.join(config_dir, PROMPT_CACHE_FILENAME))
+            atexit.register(_prompt_cache.flush)
+        return _prompt_cache
+
+
+def get_prompt_cache(ctx):
+    """Return the shared PromptCache, or None when disabled (prompt_cache_enabled=false)
+    or when the user config directory is unavailable."""
+    config = get_config_dict(ctx)
+    if not as_bool(config.get("prompt_cache_enabled", True)):
+        return None
+    cache = _shared_cache(ctx)
+    if cache is not None:
+        cache.max_entries = max(1, _safe_int(config.get("prompt_cache_max_entries"), DEFAULT_MAX_ENTRIES))
+        cache.ttl = max(0, _safe_int(config.get("prompt_cache_ttl_days"), DEFAULT_TTL_DAYS)) * 86400
+    return cache
+
+
+def clear_prompt_cache(ctx):
+    """Remove every cached =PROMPT() result. Returns the number of entries dropped."""
+    cache = _shared_cache(ctx)
+    if cache is None:
+        return 0
+    count = len(cache)
+    cache.clear()
+    return count
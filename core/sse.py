@@ -0,0 +1,105 @@
+"""Server-Sent Events decoder for streaming LLM responses.
+
+Reads the response in large blocks (read1) instead of line by line and
+splits events on raw bytes. Only the data of each event is kept, as bytes
+that json.loads accepts directly, so comments (": OPENROUTER PROCESSING"),
+"event:"/"id:"/"retry:" fields and blank keep-alives are never decoded.
+"""
+import http.client
+import json
+
+READ_BLOCK_SIZE = 65536
+
+
+class SSEDecoder:
+    """Incremental SSE parser (https://html.spec.whatwg.org/multipage/server-sent-events.html).
+
+    feed() takes arbitrary byte blocks and returns the data payloads of the
+    events completed by that block. Lines may end in \\n, \\r\\n or \\r; a blank
+    line dispatches the event; multiple "data:" lines of one event are joined
+    with \\n. Some servers send no blank line between events: when a data line
+    arrives while the pending data is one line of complete JSON (or [DONE]),
+    that line is dispatched on its own first, so those streams stay incremental."""
+
+    def __init__(self):
+        self._buf = b""
+        self._data = []
+
+    def feed(self, block):
+        """Parse a block of bytes. Returns a list of payloads (bytes)."""
+        buf = self._buf + block if self._buf else block
+        # A trailing \r may be the first half of \r\n: keep that line pending
+        search_end = len(buf) - 1 if buf.endswith(b"\r") else len(buf)
+        cut = max(buf.rfind(b"\n", 0, search_end), buf.rfind(b"\r", 0, search_end))
+        if cut < 0:
+            self._buf = buf
+            return []
+        self._buf = buf[cut + 1:]
+        return self._parse_lines(buf[:cut + 1].splitlines())
+
+    def close(self):
+        """Flush a final line and event that were not terminated. Returns payloads."""
+        tail = self._buf
+        self._buf = b""
+        events = self._parse_lines(tail.splitlines()) if tail else []
+        payload = b"\n".join(self._data)
+        self._data = []
+        if payload:
+            events.append(payload)
+        return events
+
+    def _parse_lines(self, lines):
+        events = []
+        data = self._data
+        for line in lines:
+            if not line:
+                if data:
+                    payload = data[0] if len(data) == 1 else b"\n".join(data)
+                    if payload:
+                        events.append(payload)
+                    data = []
+            elif line.startswith(b"data:"):
+                value = line[5:]
+                if value.startswith(b" "):
+                    value = value[1:]
+                if len(data) == 1 and _is_complete_payload(data[0]):
+                    events.append(data[0])
+                    data = []
+                data.append(value)
+            # Comments (":...") and event/id/retry fields carry nothing we use
+        self._data = data
+        return events
+
+
+def _is_complete_payload(value):
+    """True if value is a whole [DONE] marker or JSON document on its own."""
+    if value == b"[DONE]":
+        return True
+    if not value.startswith((b"{", b"[")):
+        return False
+    try:
+        json.loads(value)
+    except ValueError:
+        return False
+    return True
+
+
+def iter_sse_blocks(response, block_size=READ_BLOCK_SIZE):
+    """Yield raw byte blocks from a response: read1 blocks for a real
+    http.client.HTTPResponse, otherwise whatever iterating the object yields."""
+    if isinstance(response, http.client.HTTPResponse):
+        while True:
+            block = response.read1(block_size)
+            if not block:
+                return
+            yield block
+    else:
+        yield from response
+
+
+def iter_sse_data(response, block_size=READ_BLOCK_SIZE):
+    """Yield the data payload (bytes) of each SSE event in a streaming response."""
+    decoder = SSEDecoder()
+    for block in iter_sse_blocks(response, block_size):
+        yield from decoder.feed(block)
+    yield from decoder.close()
@@ -91,3 +91,134 @@ def accumulate_delta(
         acc[key] = acc_value
 
     return acc
+
+
+# --- LocalWriter: linear-time accumulator -------------------------------------
+#
+# accumulate_delta re-concatenates every string on every chunk (acc_value +=
+# delta_value with the old value still referenced from acc), so a tool call
+# whose arguments stream in as 10k fragments costs O(n^2) copying. The
+# accumulator below applies the same merge rules but keeps strings as lists of
+# fragments and list-of-object entries in a dict keyed by `index`, and only
+# builds the plain snapshot when asked.
+
+
+class _Text:
+    """String being accumulated: fragments joined on demand."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, value: str):
+        self.parts = [value]
+
+
+class _IndexedList:
+    """List of objects merged by their `index` key, in first-seen order."""
+
+    __slots__ = ("entries",)
+
+    def __init__(self):
+        self.entries = {}
+
+
+def _is_scalar(x: object) -> bool:
+    return isinstance(x, (str, int, float))
+
+
+def _ingest(value: object) -> object:
+    """Convert a delta value into the accumulator's internal representation."""
+    if isinstance(value, str):
+        return _Text(value)
+    if _is_dict(value):
+        return {k: _ingest(v) for k, v in value.items()}
+    if _is_list(value) and value and not all(_is_scalar(x) for x in value):
+        node = _IndexedList()
+        for position, entry in enumerate(value):
+            index = entry.get("index", position) if _is_dict(entry) else position
+            node.entries[index] = _ingest(entry)
+        return node
+    if _is_list(value):
+        return list(value)
+    return value
+
+
+def _merge(acc: dict, delta: dict) -> None:
+    for key, delta_value in delta.items():
+        acc_value = acc.get(key)
+        if acc_value is None or key == "index" or key == "type":
+            acc[key] = _ingest(delta_value)
+        elif isinstance(acc_value, _Text):
+            if isinstance(delta_value, str):
+                acc_value.parts.append(delta_value)
+        elif isinstance(acc_value, (int, float)) and isinstance(delta_value, (int, float)):
+            acc[key] = acc_value + delta_value
+        elif _is_dict(acc_value) and _is_dict(delta_value):
+            _merge(acc_value, delta_value)
+        elif _is_list(acc_value) and _is_list(delta_value):
+            # Only scalar entries so far (or none): entries are only ever appended.
+            # Objects arriving in a list that started empty ("tool_calls": [])
+            # switch it to merging by index, as accumulate_delta does.
+            if all(_is_scalar(x) for x in delta_value):
+                acc_value.extend(delta_value)
+            else:
+                acc[key] = _ingest(acc_value + delta_value)
+        elif isinstance(acc_value, _IndexedList) and _is_list(delta_value):
+            _merge_indexed(acc_value, delta_value)
+
+
+def _merge_indexed(node: _IndexedList, delta_value: list) -> None:
+    for delta_entry in delta_value:
+        if not _is_dict(delta_entry):
+            raise TypeError(
+                f"Unexpected list delta entry is not a dictionary: {delta_entry}"
+            )
+        try:
+            index = delta_entry["index"]
+        except KeyError as exc:
+            raise RuntimeError(
+                f"Expected list delta entry to have an `index` key; {delta_entry}"
+            ) from exc
+        if not isinstance(index, int):
+            raise TypeError(
+                f"Unexpected, list delta entry `index` value is not an integer; {index}"
+            )
+        acc_entry = node.entries.get(index)
+        if acc_entry is None:
+            node.entries[index] = _ingest(delta_entry)
+        elif _is_dict(acc_entry):
+            _merge(acc_entry, delta_entry)
+        else:
+            raise TypeError("not handled yet")
+
+
+def _build(value: object) -> object:
+    if isinstance(value, _Text):
+        if len(value.parts) > 1:
+            value.parts = ["".join(value.parts)]
+        return value.parts[0]
+    if _is_dict(value):
+        return {k: _build(v) for k, v in value.items()}
+    if isinstance(value, _IndexedList):
+        return [_build(v) for v in value.entries.values()]
+    if _is_list(value):
+        return list(value)
+    return value
+
+
+class DeltaAccumulator:
+    """Accumulates streaming chunk deltas into one message in linear time.
+
+    Usage: call add(delta) for every chunk delta, then snapshot() for the
+    merged message (same result as folding the deltas with accumulate_delta).
+    """
+
+    def __init__(self):
+        self._acc = {}
+
+    def add(self, delta: dict[object, object]) -> None:
+        """Merge one chunk delta."""
+        _merge(self._acc, delta)
+
+    def snapshot(self) -> dict[object, object]:
+        """Return the merged message as plain dicts, lists and strings."""
+        return _build(self._acc)
@@ -0,0 +1,82 @@
+"""Minimal edit scripts between two strings, for in-place document edits.
+
+text_edit_ops(old, new) trims the common prefix and suffix, diffs the rest as
+word/punctuation tokens (each with its trailing space) with
+difflib.SequenceMatcher, refines each replaced token span at character level,
+and returns only the spans that change. Applying those spans leaves the
+unchanged text (and its formatting) untouched, so the number of document calls
+scales with the size of the change rather than the size of the text.
+"""
+import difflib
+import re
+
+_TOKEN_RE = re.compile(r"\w+\s*|[^\w\s]\s*|\s+", re.UNICODE)
+
+# Replaced token spans longer than this (on either side) are not refined per character
+CHAR_REFINE_LIMIT = 2000
+
+
+def _tokenize(text):
+    return _TOKEN_RE.findall(text)
+
+
+def _offsets(tokens):
+    """Character offset of each token start, plus the total length at the end."""
+    out = [0]
+    for tok in tokens:
+        out.append(out[-1] + len(tok))
+    return out
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _common_affixes(old, new):
+    """Lengths of the common prefix and suffix, backed off to word boundaries so
+    a partly shared word is diffed as a whole."""
+    limit = min(len(old), len(new))
+    p = 0
+    while p < limit and old[p] == new[p]:
+        p += 1
+    while 0 < p < limit and _is_word_char(old[p - 1]) and (_is_word_char(old[p]) or _is_word_char(new[p])):
+        p -= 1
+    limit -= p
+    q = 0
+    while q < limit and old[-1 - q] == new[-1 - q]:
+        q += 1
+    while 0 < q < limit and _is_word_char(old[-q]) and (_is_word_char(old[-1 - q]) or _is_word_char(new[-1 - q])):
+        q -= 1
+    return p, q
+
+
+def text_edit_ops(old, new):
+    """Return [(tag, i1, i2, j1, j2), ...] turning old into new: tag is "replace",
+    "delete" or "insert"; old[i1:i2] becomes new[j1:j2]. Equal spans are omitted;
+    ops are in increasing order and do not overlap."""
+    if old == new:
+        return []
+    # Edits are usually local: diff only what lies between the common prefix and suffix
+    p, q = _common_affixes(old, new)
+    old_mid = old[p:len(old) - q]
+    new_mid = new[p:len(new) - q]
+    if not old_mid or not new_mid:
+        return [("insert" if new_mid else "delete", p, p + len(old_mid), p, p + len(new_mid))]
+    old_tokens = _tokenize(old_mid)
+    new_tokens = _tokenize(new_mid)
+    old_at = _offsets(old_tokens)
+    new_at = _offsets(new_tokens)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        i1, i2, j1, j2 = old_at[a1], old_at[a2], new_at[b1], new_at[b2]
+        if tag == "replace" and max(i2 - i1, j2 - j1) <= CHAR_REFINE_LIMIT:
+            chars = difflib.SequenceMatcher(None, old_mid[i1:i2], new_mid[j1:j2], autojunk=False)
+            for ctag, c1, c2, d1, d2 in chars.get_opcodes():
+                if ctag != "equal":
+                    ops.append((ctag, p + i1 + c1, p + i1 + c2, p + j1 + d1, p + j1 + d2))
+        else:
+            ops.append((tag, p + i1, p + i2, p + j1, p + j2))
+    return ops
@@ -0,0 +1,125 @@
+"""Searching a plain-text mirror of a document and mapping matches back to offsets.
+
+TextMirror holds the document string (cursor.getString() from start to end, the
+offset system find_text and apply_document_content use) and builds normalised
+views on demand:
+  - "breaks": every run of line/paragraph break characters becomes one "\\n", so
+    "a\\r\\n\\r\\nb", "a\\n\\nb" and "a\\nb" all match the same needle;
+  - "whitespace": every run of whitespace (breaks included) becomes one " ".
+A search is a single regex scan over a view; each match is mapped back to the
+exact [start, end) span of the original text, so a search that used to try a
+dozen break variants with findFirst is now one pass in Python.
+"""
+import bisect
+import re
+
+_BREAK_RUN_RE = re.compile(r"[\r\n\u2028\u2029]+")
+_SPACE_RUN_RE = re.compile(r"\s+")
+
+_VIEWS = {"breaks": (_BREAK_RUN_RE, "\n"), "whitespace": (_SPACE_RUN_RE, " ")}
+
+
+def normalize_breaks(text):
+    return _BREAK_RUN_RE.sub("\n", text)
+
+
+def normalize_whitespace(text):
+    return _SPACE_RUN_RE.sub(" ", text).strip(" ")
+
+
+class NormalizedView:
+    """text with runs matching run_re collapsed to one replacement char, plus the
+    offset map back to text. Only runs that actually change are recorded, so the
+    map is O(number of collapsed runs) and lookups are a bisect."""
+
+    def __init__(self, text, run_re, replacement):
+        pieces = []
+        self.norm_at = []   # normalised offset of each collapsed run
+        self.orig_at = []   # original start of each collapsed run
+        self.orig_end = []  # original end of each collapsed run
+        last = 0
+        shift = 0  # original offset minus normalised offset so far
+        for m in run_re.finditer(text):
+            if m.group(0) == replacement:
+                continue
+            pieces.append(text[last:m.start()])
+            pieces.append(replacement)
+            self.norm_at.append(m.start() - shift)
+            self.orig_at.append(m.start())
+            self.orig_end.append(m.end())
+            shift += len(m.group(0)) - 1
+            last = m.end()
+        pieces.append(text[last:])
+        self.text = "".join(pieces)
+        self.orig_len = len(text)
+
+    def to_original(self, start, end):
+        """Original [start, end) covering normalised [start, end) (end > start); a
+        collapsed run at either edge is covered entirely."""
+        return self._orig_start(start), self._orig_end(end)
+
+    def _orig_start(self, k):
+        i = bisect.bisect_right(self.norm_at, k) - 1
+        if i < 0:
+            return k
+        if self.norm_at[i] == k:
+            return self.orig_at[i]
+        return self.orig_end[i] + (k - self.norm_at[i] - 1)
+
+    def _orig_end(self, k):
+        # End of the original span of normalised char k - 1
+        i = bisect.bisect_right(self.norm_at, k - 1) - 1
+        if i >= 0 and self.norm_at[i] == k - 1:
+            return self.orig_end[i]
+        return self._orig_start(k - 1) + 1
+
+    def to_normalized(self, offset):
+        """Normalised offset of original offset (a position inside a run maps to the run)."""
+        i = bisect.bisect_right(self.orig_at, offset) - 1
+        if i < 0:
+            return offset
+        if offset < self.orig_end[i]:
+            return self.norm_at[i]
+        return self.norm_at[i] + 1 + (offset - self.orig_end[i])
+
+
+class TextMirror:
+    """Plain-text copy of a document with lazily built normalised views.
+    revision: the DocumentCache revision the text was read at."""
+
+    def __init__(self, text, revision=None):
+        self.text = text
+        self.revision = revision
+        self._views = {}
+
+    def view(self, name):
+        view = self._views.get(name)
+        if view is None:
+            run_re, replacement = _VIEWS[name]
+            view = NormalizedView(self.text, run_re, replacement)
+            self._views[name] = view
+        return view
+
+    def find(self, needle, start=0, limit=None, case_sensitive=True, regex=False,
+             ignore_whitespace=False):
+        """Return [(start, end), ...] of non-overlapping matches of needle in document
+        offsets, in document order, beginning at offset start. needle is literal
+        unless regex; line breaks (or, with ignore_whitespace, all whitespace) are
+        compared normalised. Empty matches are skipped. Raises re.error for a bad regex."""
+        view = self.view("whitespace" if ignore_whitespace else "breaks")
+        if regex:
+            pattern = needle
+        else:
+            needle = normalize_whitespace(needle) if ignore_whitespace else normalize_breaks(needle)
+            if not needle:
+                return []
+            pattern = re.escape(needle)
+        compiled = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        spans = []
+        for m in compiled.finditer(view.text, view.to_normalized(max(0, start))):
+            if m.end() == m.start():
+                continue
+            spans.append(view.to_original(m.start(), m.end()))
+            if limit and len(spans) >= limit:
+                break
+        return spans
@@ -50,3 +50,112 @@ def set_checkbox_state(ctrl, value):
             ctrl.getModel().State = value
     except Exception:
         pass
+
+
+def _utf16_len(text):
+    """Length in UTF-16 code units, the unit of com.sun.star.awt.Selection positions."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+class ResponseTranscript:
+    """Append-only transcript shown in a read-only multi-line text control.
+
+    Appends are buffered and written with XTextComponent.insertText at the end
+    of the control, so each write costs the size of the new text instead of
+    re-reading and re-setting the whole transcript. The control only keeps the
+    newest max_visible characters: when that is exceeded the oldest text moves
+    to an in-memory archive and the control is reset to the newest
+    keep_visible characters (one full rewrite per max_visible - keep_visible
+    appended characters)."""
+
+    MAX_VISIBLE = 200000
+    KEEP_VISIBLE = 120000
+
+    def __init__(self, control, max_visible=MAX_VISIBLE, keep_visible=KEEP_VISIBLE):
+        self.control = control
+        self.max_visible = max_visible
+        self.keep_visible = min(keep_visible, max_visible)
+        self._pending = []
+        self._visible = []       # text currently in the control, in chunks
+        self._visible_len = 0    # in characters (for the cap)
+        self._visible_units = 0  # in UTF-16 units (for Selection positions)
+        self._archive = []       # text moved out of the control, oldest first
+        self._archived_len = 0
+        self._header = ""        # "[N earlier characters not shown]" line, first in _visible
+        try:
+            initial = control.getText()
+        except Exception:
+            initial = None
+        if isinstance(initial, str) and initial:
+            self._add_visible(initial)
+
+    def _add_visible(self, text):
+        self._visible.append(text)
+        self._visible_len += len(text)
+        self._visible_units += _utf16_len(text)
+
+    def append(self, text, flush=True):
+        """Add text at the end. With flush=False it is written on the next flush()
+        (the sidebar flushes once per stream drain tick)."""
+        if text:
+            # The control counts line ends as one position
+            self._pending.append(text.replace("\r\n", "\n").replace("\r", "\n"))
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Write buffered text to the control and scroll to the end."""
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        if self._visible_len + len(text) > self.max_visible:
+            self._spill(text)
+        else:
+            end = self._visible_units
+            self.control.insertText(_selection(end, end), text)
+            self._add_visible(text)
+        self._scroll_to_end()
+
+    def _spill(self, text):
+        shown = "".join(self._visible)[len(self._header):] + text
+        cut = len(shown) - self.keep_visible
+        # Start the visible part on a line boundary when there is one nearby
+        newline = shown.find("\n", cut, cut + 2000)
+        if newline != -1:
+            cut = newline + 1
+        self._archive.append(shown[:cut])
+        self._archived_len += cut
+        self._header = "[%d earlier characters not shown]\n" % self._archived_len
+        shown = self._header + shown[cut:]
+        self.control.setText(shown)
+        self._visible = []
+        self._visible_len = self._visible_units = 0
+        self._add_visible(shown)
+
+    def _scroll_to_end(self):
+        try:
+            end = self._visible_units
+            self.control.setSelection(_selection(end, end))
+        except Exception:
+            pass
+
+    def clear(self):
+        """Empty the control and the archive."""
+        self._pending = []
+        self._visible = []
+        self._visible_len = self._visible_units = 0
+        self._archive = []
+        self._archived_len = 0
+        self._header = ""
+        self.control.setText("")
+
+    def get_text(self):
+        """Full transcript, including archived text (without the spill marker)."""
+        self.flush()
+        return "".join(self._archive) + "".join(self._visible)[len(self._header):]
+
+
+def _selection(start, end):
+    import uno
+    return uno.createUnoStruct("com.sun.star.awt.Selection", start, end)
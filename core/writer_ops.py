@@ -3,7 +3,7 @@ import json
 from core.logging import debug_log
 from core.document import (
     get_paragraph_ranges,
-    find_paragraph_for_range,
+    find_paragraphs_for_ranges,
     build_heading_tree,
     ensure_heading_bookmarks,
     resolve_locator,
@@ -212,6 +212,7 @@ def tool_list_comments(model, ctx, args):
         para_ranges = get_paragraph_ranges(model)
         text_obj = model.getText()
         comments = []
+        anchors = []
         while enum.hasMoreElements():
             field = enum.nextElement()
             if not field.supportsService("com.sun.star.text.textfield.Annotation"):
@@ -248,19 +249,22 @@ def tool_list_comments(model, ctx, args):
             except Exception:
                 pass
             anchor = field.getAnchor()
-            para_idx = find_paragraph_for_range(anchor, para_ranges, text_obj)
+            anchors.append(anchor)
             anchor_preview = anchor.getString()[:80]
             entry = {
                 "author": author,
                 "content": content,
                 "date": date_str,
                 "resolved": resolved,
-                "paragraph_index": para_idx,
+                "paragraph_index": 0,
                 "anchor_preview": anchor_preview,
                 "name": name,
                 "parent_name": parent_name
             }
             comments.append(entry)
+        # One sorted sweep over the paragraphs instead of a linear scan per comment
+        for entry, para_idx in zip(comments, find_paragraphs_for_ranges(anchors, para_ranges, text_obj)):
+            entry["paragraph_index"] = para_idx
         return json.dumps({"status": "ok", "comments": comments,
                            "count": len(comments)})
     except Exception as e:
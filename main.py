@@ -9,12 +9,12 @@ if _ext_dir not in sys.path:
 import unohelper
 import officehelper
 
-from core.config import get_config, set_config, as_bool, get_api_config, get_current_endpoint, validate_api_config, populate_combobox_with_lru, update_lru_history, notify_config_changed, populate_image_model_selector, populate_endpoint_selector, endpoint_from_selector_text, get_image_model, set_image_model, get_api_key_for_endpoint, set_api_key_for_endpoint
+from core.config import get_config, set_config, config_batch, as_bool, get_api_config, get_batch_concurrency, get_current_endpoint, validate_api_config, populate_combobox_with_lru, update_lru_history, notify_config_changed, populate_image_model_selector, populate_endpoint_selector, endpoint_from_selector_text, get_image_model, set_image_model, get_api_key_for_endpoint, set_api_key_for_endpoint
 from core.api import LlmClient, format_error_message
 from core.uno_ui_helpers import is_checkbox_control, get_checkbox_state, set_checkbox_state
-from core.document import get_full_document_text, get_document_context_for_chat
-from core.async_stream import run_stream_completion_async
-from core.logging import agent_log, init_logging
+from core.document import get_full_document_text, get_document_context_for_chat, TextRangeAppender, undo_group
+from core.async_stream import run_stream_completion_async, run_completion_batch_async
+from core.logging import agent_log, debug_log, init_logging
 from core.constants import get_chat_system_prompt_for_document
 from com.sun.star.task import XJobExecutor
 from com.sun.star.awt import MessageBoxButtons as MSG_BUTTONS, XItemListener
@@ -39,55 +39,61 @@ _mcp_timer_thread = None
 _mcp_timer_stop_event = None
 
 
+# Safety net: if a wake-up is ever lost, queued MCP work still runs within this many seconds
+MCP_WATCHDOG_INTERVAL = 1.0
+
+
 def _start_mcp_timer(ctx):
-    """Start Python background thread that periodically dispatches a drain command
-    to the main thread. We use dispatch instead of a UNO Timer because UNO Timers
-    fail to instantiate in the system Python environment (missing 'com' package).
+    """Register the main-thread waker for MCP work: each enqueue posts one
+    com.sun.star.awt.AsyncCallback that runs drain_mcp_queue() on the main thread
+    (AsyncCallback instead of a UNO Timer because UNO Timers fail to instantiate in
+    the system Python environment, missing 'com' package). A background thread only
+    re-posts the callback if work has been waiting longer than MCP_WATCHDOG_INTERVAL.
     """
     global _mcp_timer_thread, _mcp_timer_stop_event
     from core.logging import debug_log
+    from core.mcp_thread import set_main_thread_waker, request_drain, get_mcp_queue_stats
     import threading
-    import time
 
     if _mcp_timer_thread and _mcp_timer_thread.is_alive():
         return
 
-    _mcp_timer_stop_event = threading.Event()
+    try:
+        smgr = ctx.getServiceManager()
+        async_cb = smgr.createInstanceWithContext("com.sun.star.awt.AsyncCallback", ctx)
 
-    def timer_loop():
-        try:
-            smgr = ctx.getServiceManager()
-            async_cb = smgr.createInstanceWithContext("com.sun.star.awt.AsyncCallback", ctx)
-            
-            from com.sun.star.awt import XCallback
-            import unohelper
-            
-            class _MCPDrainCallback(unohelper.Base, XCallback):
-                def notify(self, data):
-                    try:
-                        from core.mcp_thread import drain_mcp_queue
-                        drain_mcp_queue()
-                    except Exception as e:
-                        debug_log("MCP drain failed: %s" % e, context="MCP")
-            
-            callback = _MCPDrainCallback()
-            
-        except Exception as e:
-            debug_log("MCP Timer thread failed to initialize AsyncCallback or XCallback: %s" % e, context="MCP")
-            return
+        from com.sun.star.awt import XCallback
+        import unohelper
 
-        while not _mcp_timer_stop_event.is_set():
-            time.sleep(0.1) # 100ms
-            if _mcp_timer_stop_event.is_set():
-                break
-            try:
-                async_cb.addCallback(callback, None)
-            except Exception as e:
-                debug_log("MCP async_cb error: %s" % str(e), context="MCP")
+        class _MCPDrainCallback(unohelper.Base, XCallback):
+            def notify(self, data):
+                try:
+                    from core.mcp_thread import drain_mcp_queue
+                    drain_mcp_queue()
+                except Exception as e:
+                    debug_log("MCP drain failed: %s" % e, context="MCP")
+
+        callback = _MCPDrainCallback()
+    except Exception as e:
+        debug_log("MCP failed to initialize AsyncCallback or XCallback: %s" % e, context="MCP")
+        return
+
+    set_main_thread_waker(lambda: async_cb.addCallback(callback, None))
+    _mcp_timer_stop_event = threading.Event()
 
-    _mcp_timer_thread = threading.Thread(target=timer_loop, daemon=True)
+    def watchdog_loop():
+        last_processed = -1
+        while not _mcp_timer_stop_event.wait(MCP_WATCHDOG_INTERVAL):
+            stats = get_mcp_queue_stats()
+            if stats["depth"] and stats["processed"] == last_processed:
+                debug_log("MCP: %d item(s) waiting with no progress, re-posting drain" % stats["depth"], context="MCP")
+                request_drain(force=True)
+            last_processed = stats["processed"]
+        set_main_thread_waker(None)
+
+    _mcp_timer_thread = threading.Thread(target=watchdog_loop, daemon=True)
     _mcp_timer_thread.start()
-    debug_log("MCP Timer thread started (drain every 100ms via Dispatch)", context="MCP")
+    debug_log("MCP main-thread waker registered (drain on enqueue)", context="MCP")
 
 
 def try_ensure_mcp_timer(ctx):
@@ -211,6 +217,14 @@ def _do_mcp_status(ctx):
     url = "http://localhost:%s" % port
     health = "OK" if ok else ("FAIL" if _mcp_server else "N/A")
     msg = "MCP Server: %s\nPort: %s\nURL: %s\nHealth: %s" % (status, port, url, health)
+    from core.mcp_thread import get_mcp_queue_stats
+    stats = get_mcp_queue_stats()
+    msg += "\nQueue: %d waiting (peak %d), %d processed\nMain-thread wait: p50 %.1f ms, p99 %.1f ms" % (
+        stats["depth"], stats["max_depth"], stats["processed"], stats["wait_ms"]["p50"], stats["wait_ms"]["p99"])
+    from core.doc_pool import get_pool_stats
+    pool = get_pool_stats()
+    msg += "\nHidden documents: %d/%d idle, %d created, %d reused" % (
+        pool["idle"], pool["size"], pool["created"], pool["reused"])
     box = toolkit.createMessageBox(window_peer, 0, BUTTONS_OK, "MCP Server Status", msg)
     box.execute()
 
@@ -290,58 +304,59 @@ class MainJob(unohelper.Base, XJobExecutor):
 
     def _apply_settings_result(self, result):
         """Apply settings dialog result to config. Shared by Writer and Calc."""
-        # Keys to set directly from result; derived from dialog field specs (exclude specially handled ones)
-        _apply_skip = ("endpoint", "api_key", "use_aihorde", "api_type", "mcp_port")
-        apply_keys = [f["name"] for f in self._get_settings_field_specs() if f["name"] not in _apply_skip]
-
-        # Resolve endpoint first so LRU updates use the endpoint being saved
-        effective_endpoint = endpoint_from_selector_text(result.get("endpoint", "")) if "endpoint" in result else get_current_endpoint(self.ctx)
-        if "endpoint" in result and effective_endpoint:
-            self.set_config("endpoint", effective_endpoint)
-        current_endpoint = effective_endpoint or get_current_endpoint(self.ctx)
-
-        # Set keys from result (endpoint, api_key, use_aihorde, api_type, mcp_port handled below)
-        for key in apply_keys:
-            if key in result:
-                val = result[key]
-                self.set_config(key, val)
-                
-                # Update LRU history
-                if key == "text_model" and val:
-                    self._update_lru_history(val, "model_lru", current_endpoint)
-                elif key == "image_model" and val:
-                    set_image_model(self.ctx, val)
-                elif key == "additional_instructions" and val:
-                    self._update_lru_history(val, "prompt_lru", "")
-                elif key == "image_base_size" and val:
-                    self._update_lru_history(str(val), "image_base_size_lru", "")
-
-        # Handle provider toggle from checkbox
-        if "use_aihorde" in result:
-            provider = "aihorde" if result["use_aihorde"] else "endpoint"
-            self.set_config("image_provider", provider)
-
-        
-        # Update endpoint_lru when user changed endpoint (endpoint already set above)
-        if "endpoint" in result and effective_endpoint:
-            self._update_lru_history(effective_endpoint, "endpoint_lru", "")
-        
-        if "api_type" in result:
-            api_type_value = str(result["api_type"]).strip().lower()
-            if api_type_value not in ("chat", "completions"):
-                api_type_value = "completions"
-            self.set_config("api_type", api_type_value)
-
-        if "mcp_port" in result:
-            try:
-                port = int(result["mcp_port"])
-                if 1 <= port <= 65535:
-                    self.set_config("mcp_port", port)
-            except (TypeError, ValueError):
-                pass
+        # One atomic write of localwriter.json for the whole dialog
+        with config_batch(self.ctx):
+            # Keys to set directly from result; derived from dialog field specs (exclude specially handled ones)
+            _apply_skip = ("endpoint", "api_key", "use_aihorde", "api_type", "mcp_port")
+            apply_keys = [f["name"] for f in self._get_settings_field_specs() if f["name"] not in _apply_skip]
+
+            # Resolve endpoint first so LRU updates use the endpoint being saved
+            effective_endpoint = endpoint_from_selector_text(result.get("endpoint", "")) if "endpoint" in result else get_current_endpoint(self.ctx)
+            if "endpoint" in result and effective_endpoint:
+                self.set_config("endpoint", effective_endpoint)
+            current_endpoint = effective_endpoint or get_current_endpoint(self.ctx)
+
+            # Set keys from result (endpoint, api_key, use_aihorde, api_type, mcp_port handled below)
+            for key in apply_keys:
+                if key in result:
+                    val = result[key]
+                    self.set_config(key, val)
+
+                    # Update LRU history
+                    if key == "text_model" and val:
+                        self._update_lru_history(val, "model_lru", current_endpoint)
+                    elif key == "image_model" and val:
+                        set_image_model(self.ctx, val)
+                    elif key == "additional_instructions" and val:
+                        self._update_lru_history(val, "prompt_lru", "")
+                    elif key == "image_base_size" and val:
+                        self._update_lru_history(str(val), "image_base_size_lru", "")
+
+            # Handle provider toggle from checkbox
+            if "use_aihorde" in result:
+                provider = "aihorde" if result["use_aihorde"] else "endpoint"
+                self.set_config("image_provider", provider)
+
+            # Update endpoint_lru when user changed endpoint (endpoint already set above)
+            if "endpoint" in result and effective_endpoint:
+                self._update_lru_history(effective_endpoint, "endpoint_lru", "")
+
+            if "api_type" in result:
+                api_type_value = str(result["api_type"]).strip().lower()
+                if api_type_value not in ("chat", "completions"):
+                    api_type_value = "completions"
+                self.set_config("api_type", api_type_value)
+
+            if "mcp_port" in result:
+                try:
+                    port = int(result["mcp_port"])
+                    if 1 <= port <= 65535:
+                        self.set_config("mcp_port", port)
+                except (TypeError, ValueError):
+                    pass
 
-        if "api_key" in result:
-            set_api_key_for_endpoint(self.ctx, current_endpoint, result["api_key"])
+            if "api_key" in result:
+                set_api_key_for_endpoint(self.ctx, current_endpoint, result["api_key"])
 
         notify_config_changed(self.ctx)
 
@@ -750,6 +765,12 @@ class MainJob(unohelper.Base, XJobExecutor):
         if args == "MCPStatus":
             _do_mcp_status(self.ctx)
             return
+        if args == "ClearPromptCache":
+            from core.prompt_cache import clear_prompt_cache
+            count = clear_prompt_cache(self.ctx)
+            self.show_error("Cleared %d cached =PROMPT() results. Recalculate (Ctrl+Shift+F9) to refresh the cells." % count,
+                            "PROMPT() cache")
+            return
         if args == "TestTypes":
             from core.test_types import test_types
             test_types(self.ctx)
@@ -783,6 +804,16 @@ class MainJob(unohelper.Base, XJobExecutor):
                 self.show_error("Tests failed to run: %s" % e, "Calc tests")
             return
 
+        if args == "RunCalcWriteBenchmark":
+            try:
+                from core.calc_tests import run_calc_write_benchmark
+                p, f, log = run_calc_write_benchmark(self.ctx)
+                msg = "Calc write benchmark: %d passed, %d failed.\n\n%s" % (p, f, "\n".join(log))
+                self.show_error(msg, "Calc write benchmark")
+            except Exception as e:
+                self.show_error("Benchmark failed to run: %s" % e, "Calc write benchmark")
+            return
+
         if args == "RunDrawTests":
             try:
                 from core.draw_tests import run_draw_tests
@@ -838,15 +869,18 @@ class MainJob(unohelper.Base, XJobExecutor):
                             return
                         client = self._get_client()
 
-                        def apply_chunk(chunk_text, is_thinking=False):
-                            if not is_thinking:
-                                text_range.setString(text_range.getString() + chunk_text)
-
-                        run_stream_completion_async(
-                            self.ctx, client, prompt, system_prompt, max_tokens, api_type,
-                            apply_chunk, lambda: None,
-                            lambda e: self.show_error(format_error_message(e), "LocalWriter: Extend Selection"),
-                        )
+                        # Chunks are appended at the end of the selection once per UI tick,
+                        # each flush its own undo action (the user may type meanwhile).
+                        appender = TextRangeAppender(text_range, model, "LocalWriter: Extend Selection")
+                        try:
+                            run_stream_completion_async(
+                                self.ctx, client, prompt, system_prompt, max_tokens, api_type,
+                                appender.append, lambda: None,
+                                lambda e: self.show_error(format_error_message(e), "LocalWriter: Extend Selection"),
+                                on_tick_fn=appender.flush,
+                            )
+                        finally:
+                            appender.flush()
                     except Exception as e:
                         self.show_error(format_error_message(e), "LocalWriter: Extend Selection")
 
@@ -875,25 +909,38 @@ class MainJob(unohelper.Base, XJobExecutor):
                 if not ok:
                     self.show_error(err_msg, "LocalWriter: Edit Selection")
                     return
-                text_range.setString("")
                 client = self._get_client()
+                errors = []
 
-                def apply_chunk(chunk_text, is_thinking=False):
-                    if not is_thinking:
-                        text_range.setString(text_range.getString() + chunk_text)
-
-                def on_error(e):
-                    text_range.setString(original_text)
-                    self.show_error(format_error_message(e), "LocalWriter: Edit Selection")
-
+                # Clearing the selection and each streamed flush are short undo actions;
+                # no undo context stays open while the UI keeps processing the user's
+                # input. On error the streamed text is replaced by the original.
+                title = "LocalWriter: Edit Selection"
+                appender = None
                 try:
-                    run_stream_completion_async(
-                        self.ctx, client, prompt, system_prompt, max_tokens, api_type,
-                        apply_chunk, lambda: None, on_error,
-                    )
+                    with undo_group(model, title):
+                        text_range.setString("")
+                    appender = TextRangeAppender(text_range, model, title)
+                    try:
+                        run_stream_completion_async(
+                            self.ctx, client, prompt, system_prompt, max_tokens, api_type,
+                            appender.append, lambda: None, errors.append,
+                            on_tick_fn=appender.flush,
+                        )
+                    finally:
+                        appender.flush()
                 except Exception as e:
-                    text_range.setString(original_text)
-                    self.show_error(format_error_message(e), "LocalWriter: Edit Selection")
+                    errors.append(e)
+                if errors:
+                    try:
+                        with undo_group(model, title):
+                            if appender is not None:
+                                appender.replace_written(original_text)
+                            else:
+                                text_range.setString(original_text)
+                    except Exception as e:
+                        debug_log("Edit Selection: could not restore original text: %s" % e, context="Writer")
+                    self.show_error(format_error_message(errors[0]), "LocalWriter: Edit Selection")
 
             elif args == "settings":
                 try:
@@ -959,42 +1006,60 @@ class MainJob(unohelper.Base, XJobExecutor):
                             max_tokens = len(cell_original) + edit_max_new_tokens
                             tasks.append((cell, prompt, edit_system_prompt, max_tokens, cell_original))
 
+                title = "LocalWriter: Edit Selection (Calc)" if args == "EditSelection" else "LocalWriter: Extend Selection (Calc)"
                 api_config = get_api_config(self.ctx)
                 ok, err_msg = validate_api_config(api_config)
                 if not ok:
-                    self.show_error(err_msg, "LocalWriter: Edit Selection (Calc)" if args == "EditSelection" else "LocalWriter: Extend Selection (Calc)")
+                    self.show_error(err_msg, title)
+                    return
+                if not tasks:
                     return
-                client = self._get_client()
-                task_index = [0]
 
-                def run_next_cell():
-                    if task_index[0] >= len(tasks):
-                        return
-                    cell, prompt, system_prompt, max_tokens, original = tasks[task_index[0]]
-                    task_index[0] += 1
-                    if args == "EditSelection" and original is not None:
-                        cell.setString("")
+                # Cells are independent: run up to N requests at once, each worker with its own
+                # client. A cell is only written when its result is complete, so a failed cell
+                # keeps its original content (per-cell rollback).
+                concurrency = get_batch_concurrency(self.ctx, api_config.get("endpoint"))
+                jobs = [(prompt, system_prompt, max_tokens) for _, prompt, system_prompt, max_tokens, _ in tasks]
+                errors = []
 
-                    def apply_chunk(chunk_text, is_thinking=False):
-                        if not is_thinking:
-                            cell.setString(cell.getString() + chunk_text)
+                status = None
+                try:
+                    status = model.getCurrentController().getFrame().createStatusIndicator()
+                    status.start("LocalWriter: 0/%d cells" % len(tasks), len(tasks))
+                except Exception:
+                    status = None
 
-                    def on_done():
-                        run_next_cell()
+                def on_result(i, text):
+                    cell, _, _, _, original = tasks[i]
+                    if args == "EditSelection" and original is not None:
+                        cell.setString(text)
+                    else:
+                        cell.setString(cell.getString() + text)
 
-                    def on_error(e):
-                        if original is not None:
-                            cell.setString(original)
-                        self.show_error(format_error_message(e), "LocalWriter: Edit Selection (Calc)" if args == "EditSelection" else "LocalWriter: Extend Selection (Calc)")
-                        # Stop on first error: do not call run_next_cell()
+                def on_error(i, e):
+                    errors.append(e)
 
-                    run_stream_completion_async(
-                        self.ctx, client, prompt, system_prompt, max_tokens, api_type,
-                        apply_chunk, on_done, on_error,
-                    )
+                def on_progress(done, total, elapsed):
+                    if status is None:
+                        return
+                    rate = done / elapsed if elapsed > 0 else 0.0
+                    status.setText("LocalWriter: %d/%d cells (%.1f cells/s, %d parallel)" % (done, total, rate, concurrency))
+                    status.setValue(done)
 
-                if tasks:
-                    run_next_cell()
+                try:
+                    with undo_group(model, title):
+                        skipped = run_completion_batch_async(
+                            self.ctx, lambda: LlmClient(api_config, self.ctx), jobs, concurrency, api_type,
+                            on_result, on_error, on_progress,
+                        )
+                finally:
+                    if status is not None:
+                        status.end()
+                if errors:
+                    msg = format_error_message(errors[0])
+                    if len(errors) > 1 or skipped:
+                        msg += "\n\n(%d cell(s) failed, %d not processed; failed cells were left unchanged.)" % (len(errors), skipped)
+                    self.show_error(msg, title)
             except Exception as e:
                 self.show_error(format_error_message(e), "LocalWriter: Calc Processing")
         elif is_draw(model):
@@ -15,6 +15,7 @@ import urllib.parse
 from org.extension.localwriter.PromptFunction import XPromptFunction
 from core.config import get_config, get_api_config
 from core.api import LlmClient
+from core.prompt_cache import get_prompt_cache, prompt_cache_key
 
 # Enable debug logging
 DEBUG = True
@@ -132,11 +133,24 @@ class PromptFunction(unohelper.Base, XPromptFunction):
                 if model is not None:
                     config = dict(config, model=str(model_name))
                 
+                # Unchanged cells are served from the persistent cache on recalc/reopen
+                cache = get_prompt_cache(self.ctx)
+                cache_key = None
+                if cache is not None:
+                    cache_key = prompt_cache_key(config.get("endpoint"), config.get("model"),
+                                                 system_prompt, message, max_tokens)
+                    cached = cache.get(cache_key)
+                    if cached is not None:
+                        return cached
+
                 if not self.client:
                     self.client = LlmClient(config, self.ctx)
                 else:
                     self.client.config = config
-                return self.client.chat_completion_sync(messages, max_tokens=max_tokens)
+                result = self.client.chat_completion_sync(messages, max_tokens=max_tokens)
+                if cache is not None and result:
+                    cache.put(cache_key, result)
+                return result
             except Exception as e:
                 from core.api import format_error_for_display
                 debug_log("PROMPT error: %s" % str(e))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: accumulating streamed tool-call deltas. No LibreOffice or network required.
+
+Streams one apply_document_content call whose arguments arrive as N small
+fragments (plus content and usage chunks) and compares folding the deltas with
+accumulate_delta against DeltaAccumulator. accumulate_delta re-copies the
+growing arguments string on every fragment, so its time grows quadratically;
+DeltaAccumulator stays linear.
+
+Usage:
+  python tests/run_delta_benchmark.py [max_deltas]
+"""
+
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.streaming_deltas import DeltaAccumulator, accumulate_delta
+
+MAX_DELTAS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+FRAGMENT = "<p>lorem ipsum</p>"
+
+
+def make_deltas(n):
+    deltas = [
+        {"role": "assistant", "content": ""},
+        {"tool_calls": [{"index": 0, "id": "call_0", "type": "function",
+                         "function": {"name": "apply_document_content", "arguments": ""}}]},
+        {"tool_calls": [{"index": 0, "function": {"arguments": '{"target": "full", "content": "'}}]},
+    ]
+    for _ in range(n):
+        deltas.append({"tool_calls": [{"index": 0, "function": {"arguments": FRAGMENT}}]})
+    deltas.append({"tool_calls": [{"index": 0, "function": {"arguments": '"}'}}]})
+    deltas.append({"content": "", "usage": {"prompt_tokens": 50, "completion_tokens": n}})
+    return deltas
+
+
+def run_function(deltas):
+    snapshot = {}
+    for d in deltas:
+        accumulate_delta(snapshot, d)
+    return snapshot
+
+
+def run_accumulator(deltas):
+    acc = DeltaAccumulator()
+    for d in deltas:
+        acc.add(d)
+    return acc.snapshot()
+
+
+def _time(fn, deltas):
+    # accumulate_delta stores (and later mutates) the delta objects themselves
+    deltas = copy.deepcopy(deltas)
+    t0 = time.perf_counter()
+    result = fn(deltas)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    print("Tool-call delta accumulation (%d-char fragments)" % len(FRAGMENT))
+    n = 1250
+    while n <= MAX_DELTAS:
+        deltas = make_deltas(n)
+        old_t, old = _time(run_function, deltas)
+        new_t, new = _time(run_accumulator, deltas)
+        assert old == new
+        size = len(new["tool_calls"][0]["function"]["arguments"])
+        print("  %6d deltas  %8.1f KB args  accumulate_delta %8.2f ms  DeltaAccumulator %7.2f ms  (%.1fx)" % (
+            n, size / 1024.0, old_t * 1000, new_t * 1000, old_t / new_t))
+        n *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: SSE parsing of streaming chat responses. No LibreOffice or network required.
+
+Compares the previous line-by-line parser (strip, decode, slice after "data:",
+decode again, json.loads) with core.sse + core.api._iter_sse_chunks on
+recorded-shape streams from OpenAI, OpenRouter, Ollama and Grok.
+
+Usage:
+  python tests/run_sse_benchmark.py [tokens]
+"""
+
+import http.client
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.api import _iter_sse_chunks, _SSE_DONE
+
+TOKENS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+REPEAT = 5
+
+WORDS = ["The", " quick", " brown", " fox", " jumps", " over", " the", " lazy", " dog", ".", "\n", " é", " ü"]
+
+
+def _event(obj, eol=b"\n"):
+    return b"data: " + json.dumps(obj).encode("utf-8") + eol + eol
+
+
+def openai_stream(n):
+    base = {"id": "chatcmpl-9xYz", "object": "chat.completion.chunk", "created": 1718000000,
+            "model": "gpt-4o-2024-08-06", "system_fingerprint": "fp_3aa7262c27"}
+    out = [_event(dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                        "logprobs": None, "finish_reason": None}]))]
+    for i in range(n):
+        out.append(_event(dict(base, choices=[{"index": 0, "delta": {"content": WORDS[i % len(WORDS)]},
+                                                "logprobs": None, "finish_reason": None}])))
+    out.append(_event(dict(base, choices=[{"index": 0, "delta": {}, "logprobs": None, "finish_reason": "stop"}])))
+    out.append(b"data: [DONE]\n\n")
+    return b"".join(out)
+
+
+def openrouter_stream(n):
+    base = {"id": "gen-1718000000-abc", "provider": "Together", "model": "meta-llama/llama-3.1-70b-instruct",
+            "object": "chat.completion.chunk", "created": 1718000000}
+    out = [b": OPENROUTER PROCESSING\n\n"] * 3
+    for i in range(n):
+        if i and i % 500 == 0:
+            out.append(b": OPENROUTER PROCESSING\n\n")
+        out.append(_event(dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": WORDS[i % len(WORDS)]},
+                                                "finish_reason": None, "logprobs": None}])))
+    out.append(_event(dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                            "finish_reason": "stop", "native_finish_reason": "eos"}])))
+    out.append(_event(dict(base, choices=[], usage={"prompt_tokens": 20, "completion_tokens": n, "total_tokens": n + 20})))
+    out.append(b"data: [DONE]\n\n")
+    return b"".join(out)
+
+
+def ollama_stream(n):
+    base = {"id": "chatcmpl-123", "object": "chat.completion.chunk", "created": 1718000000,
+            "model": "llama3.1:8b", "system_fingerprint": "fp_ollama"}
+    out = []
+    for i in range(n):
+        out.append(_event(dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": WORDS[i % len(WORDS)]},
+                                                "finish_reason": None}])))
+    out.append(_event(dict(base, choices=[{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": "stop"}])))
+    out.append(b"data: [DONE]\n\n")
+    return b"".join(out)
+
+
+def grok_stream(n):
+    base = {"id": "3f1c", "object": "chat.completion.chunk", "created": 1718000000, "model": "grok-4-fast",
+            "system_fingerprint": "fp_grok"}
+    out = []
+    for i in range(n):
+        key = "reasoning_content" if i < n // 4 else "content"
+        out.append(_event(dict(base, choices=[{"index": 0, "delta": {key: WORDS[i % len(WORDS)]}}]), eol=b"\r\n"))
+    out.append(_event(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]), eol=b"\r\n"))
+    out.append(_event(dict(base, choices=[], usage={"prompt_tokens": 20, "completion_tokens": n}), eol=b"\r\n"))
+    out.append(b"data: [DONE]\r\n\r\n")
+    return b"".join(out)
+
+
+class _FakeSocket:
+    def __init__(self, data):
+        self._data = data
+
+    def makefile(self, mode):
+        return io.BufferedReader(io.BytesIO(self._data))
+
+
+def recorded_response(raw):
+    """A real http.client.HTTPResponse replaying raw as a chunked body, one HTTP
+    chunk per SSE event (how streaming servers send it)."""
+    parts = [b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n"]
+    sep = b"\r\n\r\n" if b"\r\n\r\n" in raw else b"\n\n"
+    for event in raw.split(sep):
+        if event:
+            event += sep
+            parts.append(b"%x\r\n%s\r\n" % (len(event), event))
+    parts.append(b"0\r\n\r\n")
+    response = http.client.HTTPResponse(_FakeSocket(b"".join(parts)))
+    response.begin()
+    return response
+
+
+def legacy_parse(raw):
+    """The line-based loop _run_streaming_loop used before core.sse."""
+    chunks = 0
+    for line in recorded_response(raw):
+        line_str = line.strip()
+        if not line_str or line_str.startswith(b":") or not line_str.startswith(b"data:"):
+            continue
+        idx = line_str.find(b":") + 1
+        payload = line_str[idx:].decode("utf-8").strip()
+        if payload == "[DONE]":
+            continue
+        try:
+            json.loads(payload)
+        except json.JSONDecodeError:
+            continue
+        chunks += 1
+    return chunks
+
+
+def buffered_parse(raw):
+    return sum(1 for chunk in _iter_sse_chunks(recorded_response(raw)) if chunk is not _SSE_DONE)
+
+
+def _best(fn, arg):
+    best = None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        result = fn(arg)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    print("SSE parse benchmark: %d tokens per stream, best of %d" % (TOKENS, REPEAT))
+    for name, make in (("OpenAI", openai_stream), ("OpenRouter", openrouter_stream),
+                       ("Ollama", ollama_stream), ("Grok", grok_stream)):
+        raw = make(TOKENS)
+        old_t, old_n = _best(legacy_parse, raw)
+        new_t, new_n = _best(buffered_parse, raw)
+        assert old_n == new_n, (name, old_n, new_n)
+        print("  %-10s %7.1f KB  line-based %7.2f ms  buffered %7.2f ms  (%.2fx, %.0f chunks/ms)" % (
+            name, len(raw) / 1024.0, old_t * 1000, new_t * 1000, old_t / new_t, new_n / (new_t * 1000)))
+
+
+if __name__ == "__main__":
+    main()
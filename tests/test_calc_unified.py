@@ -1,5 +1,6 @@
 import unittest
 import json
+from unittest.mock import patch
 from core.calc_address_utils import (
     column_to_index, index_to_column, parse_address, 
     parse_range_string, format_address
@@ -7,6 +8,12 @@ from core.calc_address_utils import (
 from core.calc_error_detector import ERROR_TYPES, ERROR_PATTERNS
 from core.constants import get_chat_system_prompt_for_document
 from core.calc_tools import execute_calc_tool, _parse_color
+from core.calc_bridge import CalcBridge
+from core.calc_inspector import CellInspector
+from core import calc_sheet_analyzer, calc_formula_graph
+from core.calc_formula_graph import FormulaGraph, SheetCache, parse_references
+from core.calc_error_detector import ErrorDetector
+from core.calc_sheet_analyzer import SheetAnalyzer
 
 # --- Stateful Stubs for Dispatcher Testing ---
 
@@ -61,6 +68,47 @@ class SheetStub:
         if s not in self.ranges: self.ranges[s] = RangeStub(s)
         return self.ranges[s]
 
+class BulkRangeStub:
+    """Range backed by 2D data/formula arrays, as returned by getDataArray/getFormulaArray.
+
+    formula_cells lists the absolute (col, row) positions reported by
+    queryContentCells(FORMULA); by default, every cell whose formula starts with "="."""
+    def __init__(self, sc, sr, data, formulas, formula_cells=None):
+        self.data = data
+        self.formulas = formulas
+        if formula_cells is None:
+            formula_cells = [(sc + c, sr + r) for r, row in enumerate(formulas)
+                             for c, f in enumerate(row) if str(f).startswith("=")]
+        self.formula_cells = formula_cells
+        self.addr = type("Addr", (), {"StartColumn": sc, "StartRow": sr,
+                                      "EndColumn": sc + len(data[0]) - 1,
+                                      "EndRow": sr + len(data) - 1})()
+    def getRangeAddress(self): return self.addr
+    def getDataArray(self): return self.data
+    def getFormulaArray(self): return self.formulas
+    def queryContentCells(self, flags):
+        blocks = tuple(type("Addr", (), {"StartColumn": c, "StartRow": r,
+                                         "EndColumn": c, "EndRow": r})()
+                       for c, r in self.formula_cells)
+        return type("Ranges", (), {"getRangeAddresses": lambda self: blocks})()
+
+class BulkSheetStub(SheetStub):
+    def __init__(self, name, bulk_range):
+        super().__init__(name)
+        self.bulk_range = bulk_range
+    def getCellRangeByPosition(self, sc, sr, ec, er):
+        return self.bulk_range
+
+class UsedAreaSheetStub(BulkSheetStub):
+    """Sheet whose used area (from A1) is the given bulk range."""
+    def createCursor(self):
+        addr = self.bulk_range.addr
+        class Cursor:
+            def gotoStartOfUsedArea(self, expand): pass
+            def gotoEndOfUsedArea(self, expand): pass
+            def getRangeAddress(self): return addr
+        return Cursor()
+
 class DocStub:
     def __init__(self):
         self.sheets = {"Sheet1": SheetStub("Sheet1")}
@@ -192,5 +240,230 @@ class TestCalcUnified(unittest.TestCase):
         res = json.loads(execute_calc_tool("bad_tool", {}, doc))
         self.assertEqual(res["status"], "error")
 
+    def test_read_range_bulk(self):
+        doc = DocStub()
+        data = ((1.5, "abc", ""), (0.0, 7.0, "x"))
+        formulas = (("1.5", "abc", ""), ("=A1-A1", "=A1*2", "=\"x\""))
+        doc.active_sheet = BulkSheetStub("Sheet1", BulkRangeStub(1, 1, data, formulas))
+        doc.active_sheet.getCellByPosition(1, 2).setString("0")
+        inspector = CellInspector(CalcBridge(doc))
+
+        rows = inspector.read_range("B2:D3")
+        self.assertEqual(rows[0][0], {"address": "B2", "value": 1.5, "formula": None, "type": "value"})
+        self.assertEqual(rows[0][1]["type"], "text")
+        self.assertEqual(rows[0][2], {"address": "D2", "value": None, "formula": None, "type": "empty"})
+        # Zero formula result falls back to the display string, like read_cell
+        self.assertEqual(rows[1][0], {"address": "B3", "value": "0", "formula": "=A1-A1", "type": "formula"})
+        self.assertEqual(rows[1][1]["value"], 7.0)
+        self.assertEqual(rows[1][2]["value"], "x")
+
+        compact = inspector.read_range("B2:D3", compact=True)
+        self.assertEqual(compact["range"], "B2:D3")
+        self.assertEqual(compact["values"], [[1.5, "abc", None], ["0", 7.0, "x"]])
+        self.assertEqual(compact["formulas"][0], [None, None, None])
+        self.assertEqual(compact["formulas"][1][1], "=A1*2")
+
+        # A text cell entered as "'=x" has getFormula() "=x" but is not a formula cell
+        doc.active_sheet = BulkSheetStub("Sheet1", BulkRangeStub(
+            1, 1, (("=x", 2.0),), (("=x", "=A1*2"),), formula_cells=[(2, 1)]))
+        rows = inspector.read_range("B2:C2")
+        self.assertEqual(rows[0][0], {"address": "B2", "value": "=x", "formula": None, "type": "text"})
+        self.assertEqual(rows[0][1]["type"], "formula")
+        doc.active_sheet = BulkSheetStub("Sheet1", BulkRangeStub(
+            1, 1, (("=x",),), (("=x",),), formula_cells=[]))
+        self.assertNotIn("formulas", inspector.read_range("B2:B2", compact=True))
+
+    def _analyzer_for(self, data, formulas, formula_cells=None):
+        doc = DocStub()
+        sheet = UsedAreaSheetStub("Sheet1", BulkRangeStub(0, 0, data, formulas, formula_cells))
+        doc.active_sheet = sheet
+        return SheetAnalyzer(CalcBridge(doc)), sheet
+
+    def _check_sheet_analyzer_snapshot(self):
+        data = ((1.0, 2.0, ""), ("", "", ""), ("", "x", 4.0), ("", "", 0.0))
+        formulas = (("1", "2", ""), ("", "", ""), ("", "x", "=A1*4"), ("", "", '=""&"y"'))
+        analyzer, sheet = self._analyzer_for(data, formulas)
+        self.assertEqual(analyzer.detect_data_regions(), [
+            {"range": "A1:B1", "row_count": 1, "col_count": 2},
+            {"range": "B3:C4", "row_count": 2, "col_count": 2},
+        ])
+        self.assertEqual(analyzer.find_empty_cells("A1:C2"), ["C1", "A2", "B2", "C2"])
+        # Outside the used area everything is empty
+        self.assertEqual(analyzer.find_empty_cells("D1:D1"), ["D1"])
+        stats = analyzer.get_column_statistics("C")
+        self.assertEqual((stats["count"], stats["sum"], stats["max"]), (2, 4.0, 4.0))
+        self.assertEqual(analyzer.get_column_statistics("Z")["count"], 0)
+        # A text cell entered as "'=x" is not a formula and is left out of the statistics
+        text_analyzer, _ = self._analyzer_for(((1.0,), ("=x",), (2.0,)), (("1",), ("=x",), ("2",)),
+                                              formula_cells=[])
+        stats = text_analyzer.get_column_statistics("A")
+        self.assertEqual((stats["count"], stats["sum"], stats["min"]), (2, 3.0, 1.0))
+        self.assertEqual(text_analyzer.detect_data_regions()[0]["range"], "A1:A3")
+
+        # Unwatched sheets are captured per call
+        self.assertIsNot(analyzer.get_snapshot(), analyzer.get_snapshot())
+        # A watched sheet's snapshot serves all calls until the sheet is modified
+        listeners = []
+        with patch.object(calc_formula_graph, "watch_sheet",
+                          lambda sheet, on_modified: listeners.append(on_modified) or object()):
+            analyzer, sheet = self._analyzer_for(data, formulas)
+            snap = analyzer.get_snapshot()
+            self.assertIs(analyzer.get_snapshot(), snap)
+            listeners[0]()
+            snap2 = analyzer.get_snapshot()
+            self.assertIsNot(snap2, snap)
+            self.assertIs(analyzer.get_snapshot(), snap2)
+            self.assertEqual(len(listeners), 1)
+            analyzer.invalidate_snapshot()
+            self.assertIsNot(analyzer.get_snapshot(), snap2)
+            # Rebuilding the tools detaches the listener
+            with patch.object(calc_formula_graph, "unwatch_sheet") as unwatch:
+                analyzer.close()
+            self.assertEqual(unwatch.call_count, 1)
+
+    def test_sheet_analyzer_snapshot_pure_python(self):
+        saved = calc_sheet_analyzer.np
+        calc_sheet_analyzer.np = None
+        try:
+            self._check_sheet_analyzer_snapshot()
+        finally:
+            calc_sheet_analyzer.np = saved
+
+    @unittest.skipIf(calc_sheet_analyzer.np is None, "NumPy not installed")
+    def test_sheet_analyzer_snapshot_numpy(self):
+        self._check_sheet_analyzer_snapshot()
+
+    # Formula dependency graph
+    def test_parse_references(self):
+        refs = parse_references('=SUM(A1:B3)*$Sheet2.$C$1+LOG10(4)+"A5"&\'My Sheet\'.D4', "Sheet1")
+        self.assertEqual(refs, [
+            ("Sheet1", 0, 0, 1, 2),
+            ("Sheet2", 2, 0, 2, 0),
+            ("My Sheet", 3, 3, 3, 3),
+        ])
+
+    def test_formula_graph_queries(self):
+        graph = FormulaGraph("Sheet1", {
+            (3, 0): "=SUM(C1:C2)",   # D1
+            (2, 1): "=C1*2",         # C2
+            (2, 0): "=A1+B1",        # C1
+            (4, 0): "=Sheet2.A1",    # E1
+        })
+        self.assertEqual(graph.dependents_of(0, 0), [(2, 0)])
+        self.assertEqual(graph.dependents_of(2, 0), [(3, 0), (2, 1)])
+        self.assertEqual(graph.dependents_of(2, 5), [])
+        self.assertEqual(graph.dependents_of(0, 0, sheet="Sheet2"), [(4, 0)])
+        self.assertEqual(graph.topological_order(), [(2, 0), (4, 0), (2, 1), (3, 0)])
+        self.assertEqual(graph.ref_endpoints(3, 0), ["C1", "C2"])
+        self.assertEqual(graph.ref_endpoints(4, 0), ["Sheet2.A1"])
+
+    def test_inspector_uses_formula_graph(self):
+        formulas = (("=A1+B1", "=SUM(A1:A3)"),)
+        data = ((3.0, 0.0),)
+        block = BulkRangeStub(2, 0, data, formulas)
+        sheet = BulkSheetStub("Sheet1", block)
+        sheet.getCellByPosition(3, 0).setString("0")
+        addr = block.getRangeAddress()
+        sheet.queryContentCells = lambda flags: type("Ranges", (), {"getRangeAddresses": lambda self: (addr,)})()
+        doc = DocStub()
+        doc.active_sheet = sheet
+        inspector = CellInspector(CalcBridge(doc))
+
+        self.assertEqual(inspector.get_cell_dependents("A2"), ["D1"])
+        self.assertEqual(inspector.get_cell_dependents("A1"), ["C1", "D1"])
+        self.assertEqual(inspector.get_cell_precedents("D1"), ["A1", "A3"])
+        listed = inspector.get_all_formulas()
+        self.assertEqual([f["address"] for f in listed], ["C1", "D1"])
+        self.assertEqual(listed[1]["value"], "0")
+        structure = inspector.analyze_spreadsheet_structure()
+        self.assertEqual([f["cell"] for f in structure["formula_chain"]], ["C1", "D1"])
+
+    def test_structure_analysis_uses_graph(self):
+        # B1 is read by B2 only through the inside of the range A1:C1
+        block = BulkRangeStub(1, 0, ((2.0,), (5.0,)), (("=A1*2",), ("=SUM(A1:C1)",)))
+        sheet = BulkSheetStub("Sheet1", block)
+        addr = block.getRangeAddress()
+        sheet.queryContentCells = lambda flags: type("Ranges", (), {"getRangeAddresses": lambda self: (addr,)})()
+        doc = DocStub()
+        doc.active_sheet = sheet
+        structure = CellInspector(CalcBridge(doc)).analyze_spreadsheet_structure()
+        self.assertEqual(structure["output_cells"], ["B2"])
+        self.assertEqual(structure["intermediate_cells"], ["B1"])
+        self.assertEqual(structure["input_cells"], ["A1", "C1"])
+        self.assertEqual([f["cell"] for f in structure["formula_chain"]], ["B1", "B2"])
+
+    def test_sheet_cache_keys_on_sheet_identity(self):
+        class NamedSheet:
+            def __init__(self, name): self.name = name
+            def getName(self): return self.name
+        listeners = {}
+        removed = []
+
+        def fake_watch(sheet, on_modified):
+            listeners[sheet] = on_modified
+            return ("listener", sheet.name)
+
+        with patch.object(calc_formula_graph, "watch_sheet", fake_watch), \
+                patch.object(calc_formula_graph, "unwatch_sheet",
+                             lambda sheet, listener: removed.append(listener)):
+            cache = SheetCache()
+            build = lambda sheet: [sheet.getName()]
+            a, b = NamedSheet("A"), NamedSheet("B")
+            value_a = cache.get(a, build)
+            value_b = cache.get(b, build)
+            self.assertIs(cache.get(a, build), value_a)
+            # Swapped names: each sheet keeps its own value, rebuilt under the new name
+            a.name, b.name = "B", "A"
+            self.assertEqual(cache.get(a, build), ["B"])
+            self.assertEqual(cache.get(b, build), ["A"])
+            # A new sheet taking a cached name is not served the old sheet's value
+            self.assertEqual(cache.get(NamedSheet("A"), build), ["A"])
+            self.assertIsNot(cache.get(NamedSheet("A"), build), cache.get(b, build))
+            # A modify only drops the modified sheet's value
+            value_a = cache.get(a, build)
+            value_b = cache.get(b, build)
+            listeners[b]()
+            self.assertIs(cache.get(a, build), value_a)
+            self.assertIsNot(cache.get(b, build), value_b)
+            cache.close()
+            self.assertEqual(len(removed), len(listeners))
+
+    def test_detect_errors_queries_error_cells_only(self):
+        class ErrCell:
+            def __init__(self, code): self.code = code
+            def getError(self): return self.code
+        class ErrBlock:
+            def __init__(self, addr, formulas, codes):
+                self.addr, self.formulas, self.codes = addr, formulas, codes
+            def getFormulaArray(self): return self.formulas
+            def getCellByPosition(self, c, r): return ErrCell(self.codes[r][c])
+        Addr = lambda sc, sr, ec, er: type("Addr", (), {"StartColumn": sc, "StartRow": sr,
+                                                        "EndColumn": ec, "EndRow": er})()
+        # Two error blocks, reported by the query in column order
+        blocks = {
+            (3, 4, 3, 5): ErrBlock(Addr(3, 4, 3, 5), (("=1/0",), ("=X()",)), ((532,), (504,))),
+            (0, 5, 0, 5): ErrBlock(Addr(0, 5, 0, 5), (("=A9/0",),), ((532,),)),
+        }
+        queried = []
+        class Area:
+            def queryFormulaCells(self, flags):
+                queried.append(flags)
+                return type("Ranges", (), {"getRangeAddresses":
+                                           lambda self: [b.addr for b in blocks.values()]})()
+        class ErrSheet(SheetStub):
+            def getCellRangeByPosition(self, sc, sr, ec, er):
+                return blocks.get((sc, sr, ec, er)) or Area()
+            def getCellByPosition(self, c, r):
+                raise AssertionError("cell-by-cell scan")
+        doc = DocStub()
+        doc.active_sheet = ErrSheet("Sheet1")
+        bridge = CalcBridge(doc)
+        detector = ErrorDetector(bridge, CellInspector(bridge))
+        errors = detector.detect_errors("A1:Z100")
+        self.assertEqual(queried, [4])
+        self.assertEqual([e["address"] for e in errors], ["D5", "A6", "D6"])
+        self.assertEqual(errors[0]["formula"], "=1/0")
+        self.assertEqual(errors[2]["error"]["code"], ERROR_TYPES[504]["code"])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,96 @@
+"""Tests for the in-memory localwriter.json cache in core.config (temp directory, no LibreOffice)."""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import types
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    sys.modules['uno'] = types.ModuleType('uno')
+
+from core import config as lw_config
+from core.config import (
+    get_config, set_config, remove_config, config_batch, get_config_dict,
+    get_config_bool, get_config_int, get_config_float, invalidate_config_cache,
+)
+
+
+class _Ctx:
+    def __init__(self, user_dir):
+        self.user_dir = user_dir
+
+    def getServiceManager(self):
+        return self
+
+    def createInstanceWithContext(self, name, ctx):
+        return types.SimpleNamespace(UserConfig=self.user_dir)
+
+
+class TestConfigCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.ctx = _Ctx(self.tmpdir)
+        self.path = os.path.join(self.tmpdir, lw_config.CONFIG_FILENAME)
+        invalidate_config_cache()
+
+    def tearDown(self):
+        invalidate_config_cache()
+        shutil.rmtree(self.tmpdir)
+
+    def _write_file(self, data):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def test_lookups_do_not_reparse(self):
+        self._write_file({"chat_max_tokens": "2048"})
+        with patch("core.config.json.load", wraps=json.load) as load:
+            for _ in range(100):
+                self.assertEqual(get_config(self.ctx, "chat_max_tokens", 0), "2048")
+            self.assertEqual(load.call_count, 1)
+        self.assertEqual(get_config_int(self.ctx, "chat_max_tokens", 0), 2048)
+        self.assertEqual(get_config_int(self.ctx, "missing", 7), 7)
+
+    def test_external_edit_is_picked_up(self):
+        self._write_file({"endpoint": "http://a"})
+        self.assertEqual(get_config(self.ctx, "endpoint", ""), "http://a")
+        self._write_file({"endpoint": "http://bb", "mcp_enabled": "true"})
+        lw_config._store._checked = 0.0  # skip the stat throttle
+        self.assertEqual(get_config(self.ctx, "endpoint", ""), "http://bb")
+        self.assertTrue(get_config_bool(self.ctx, "mcp_enabled"))
+
+    def test_batch_writes_once(self):
+        with patch("core.config.os.replace", wraps=os.replace) as replace:
+            with config_batch(self.ctx):
+                set_config(self.ctx, "text_model", "m1")
+                set_config(self.ctx, "temperature", 0.2)
+                remove_config(self.ctx, "text_model")
+                self.assertFalse(os.path.exists(self.path))
+                self.assertEqual(get_config_float(self.ctx, "temperature", 0.5), 0.2)
+            self.assertEqual(replace.call_count, 1)
+            set_config(self.ctx, "temperature", 0.2)  # unchanged: no write
+            self.assertEqual(replace.call_count, 1)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"temperature": 0.2})
+        self.assertEqual([n for n in os.listdir(self.tmpdir) if n.endswith(".tmp")], [])
+
+    def test_returned_containers_are_copies(self):
+        set_config(self.ctx, "model_lru", ["a"])
+        lru = get_config(self.ctx, "model_lru", [])
+        lru.append("b")
+        get_config_dict(self.ctx)["model_lru"].append("c")
+        self.assertEqual(get_config(self.ctx, "model_lru", []), ["a"])
+
+    def test_corrupt_file_gives_defaults(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        self.assertEqual(get_config(self.ctx, "endpoint", "dflt"), "dflt")
+        self.assertEqual(get_config_dict(self.ctx), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
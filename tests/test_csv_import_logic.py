@@ -60,6 +60,29 @@ class TestCSVImportLogic(unittest.TestCase):
             args, kwargs = mock_reader.call_args
             self.assertEqual(kwargs['delimiter'], ',')
 
+    def test_csv_written_in_bulk(self):
+        csv_data = "Name,Age\nJohn,28\nAnn,=1+1"
+        self.manipulator.import_csv_from_string(csv_data)
+        self.sheet.getCellByPosition.assert_not_called()
+        self.sheet.getCellRangeByPosition.assert_called_once_with(0, 0, 1, 2)
+        rng = self.sheet.getCellRangeByPosition.return_value
+        # CSV fields are never formulas
+        rng.setDataArray.assert_called_once_with(
+            (("Name", "Age"), ("John", 28.0), ("Ann", "=1+1")))
+
+class TestBulkWriteBlocks(unittest.TestCase):
+    def test_mixed_rows_split_into_blocks(self):
+        from core.calc_manipulator import _write_blocks
+        sheet = MagicMock()
+        ranges = {}
+        sheet.getCellRangeByPosition.side_effect = lambda *pos: ranges.setdefault(pos, MagicMock())
+        rows = [["a", 1, "=A1*2"], ["b", "2", "=A2*2"], ["c", 3.5, 7]]
+        calls = _write_blocks(sheet, 1, 4, rows)
+        self.assertEqual(calls, 3)
+        ranges[(1, 4, 2, 5)].setDataArray.assert_called_once_with((("a", 1.0), ("b", 2.0)))
+        ranges[(3, 4, 3, 5)].setFormulaArray.assert_called_once_with((("=A1*2",), ("=A2*2",)))
+        ranges[(1, 6, 3, 6)].setDataArray.assert_called_once_with((("c", 3.5, 7.0),))
+
 class TestFormulaParsingLogic(unittest.TestCase):
     def test_parse_json_array(self):
         from core.calc_manipulator import _parse_formula_or_values_string
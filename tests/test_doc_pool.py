@@ -0,0 +1,177 @@
+"""Tests for core.doc_pool with fake hidden documents (no LibreOffice)."""
+import os
+import sys
+import types
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    sys.modules['uno'] = types.ModuleType('uno')
+
+from core import doc_pool
+from core.doc_pool import HiddenDocumentPool
+
+
+class _Collection:
+    def __init__(self):
+        self.items = []
+
+    def getCount(self):
+        return len(self.items)
+
+    def getByIndex(self, i):
+        return self.items[i]
+
+    def remove(self, item):
+        self.items.remove(item)
+
+    def add_disposable(self):
+        self.items.append(types.SimpleNamespace(dispose=lambda: self.items.pop()))
+
+
+class _StyleFamily:
+    def __init__(self, styles):
+        self.styles = dict(styles)  # name -> user defined
+
+    def getElementNames(self):
+        return tuple(self.styles)
+
+    def getByName(self, name):
+        return types.SimpleNamespace(isUserDefined=lambda: self.styles[name])
+
+    def removeByName(self, name):
+        del self.styles[name]
+
+
+class _StyleFamilies:
+    def __init__(self):
+        self.families = {"ParagraphStyles": _StyleFamily({"Standard": False})}
+
+    def getElementNames(self):
+        return tuple(self.families)
+
+    def getByName(self, name):
+        return self.families[name]
+
+
+class _FakeDoc:
+    def __init__(self):
+        self.content = ""
+        self.closed = False
+        self.tables = _Collection()
+        self.sections = _Collection()
+        self.bookmarks = _Collection()
+        self.footnotes = _Collection()
+        self.shapes = _Collection()
+        self.styles = _StyleFamilies()
+        self.fail_reset = False
+
+    def getText(self):
+        if self.closed:
+            raise RuntimeError("disposed")
+        doc = self
+        cursor = types.SimpleNamespace(
+            gotoStart=lambda expand: None, gotoEnd=lambda expand: None,
+            setString=lambda s: setattr(doc, "content", s),
+            setAllPropertiesToDefault=lambda: None,
+            setPropertyValue=self._set_property)
+        return types.SimpleNamespace(createTextCursor=lambda: cursor, getString=lambda: doc.content)
+
+    def _set_property(self, name, value):
+        if self.fail_reset:
+            raise RuntimeError("read-only")
+
+    def getTextTables(self):
+        return self.tables
+
+    def getTextSections(self):
+        return self.sections
+
+    def getBookmarks(self):
+        return self.bookmarks
+
+    def getFootnotes(self):
+        return self.footnotes
+
+    def getEndnotes(self):
+        return _Collection()
+
+    def getStyleFamilies(self):
+        return self.styles
+
+    def getDrawPage(self):
+        return self.shapes
+
+    def getUndoManager(self):
+        return types.SimpleNamespace(clear=lambda: None)
+
+    def setModified(self, value):
+        pass
+
+    def close(self, deliver):
+        self.closed = True
+
+
+class TestHiddenDocumentPool(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+        def create(ctx):
+            doc = _FakeDoc()
+            self.created.append(doc)
+            return doc
+
+        self.patcher = patch.object(doc_pool, "_create_hidden_writer", side_effect=create)
+        self.patcher.start()
+        self.pool = HiddenDocumentPool(size=2)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_documents_are_cleared_and_reused(self):
+        for i in range(5):
+            with self.pool.acquire(None) as doc:
+                self.assertEqual(doc.content, "")
+                doc.content = "text %d" % i
+                doc.tables.add_disposable()
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(self.pool.stats["reused"], 4)
+        self.assertEqual(self.created[0].tables.getCount(), 0)
+        self.assertTrue(self.pool.owns(self.created[0]))
+
+    def test_imported_sections_bookmarks_and_styles_are_removed(self):
+        with self.pool.acquire(None) as doc:
+            doc.sections.add_disposable()
+            doc.bookmarks.add_disposable()
+            doc.styles.families["ParagraphStyles"].styles["Imported"] = True
+        self.assertEqual((doc.sections.getCount(), doc.bookmarks.getCount()), (0, 0))
+        self.assertEqual(doc.styles.families["ParagraphStyles"].getElementNames(), ("Standard",))
+        with self.pool.acquire(None) as again:
+            self.assertIs(again, doc)
+            # A footnote that survived clearing the text means the reset failed
+            again.footnotes.items.append(object())
+        self.assertTrue(doc.closed)
+        self.assertFalse(self.pool.owns(doc))
+
+    def test_nested_use_and_size_cap(self):
+        with self.pool.acquire(None) as a, self.pool.acquire(None) as b, self.pool.acquire(None) as c:
+            self.assertEqual(len({id(a), id(b), id(c)}), 3)
+        self.assertEqual(len(self.pool._idle), 2)
+        self.assertEqual(sum(d.closed for d in self.created), 1)
+
+    def test_failed_reset_or_closed_document_is_replaced(self):
+        with self.pool.acquire(None) as doc:
+            doc.fail_reset = True
+        self.assertTrue(doc.closed)
+        self.assertFalse(self.pool.owns(doc))
+        self.assertTrue(self.pool.warm(None))
+        self.created[-1].closed = True
+        with self.pool.acquire(None) as doc:
+            self.assertFalse(doc.closed)
+        self.assertEqual(len(self.created), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests for the revision-keyed get_document_content export cache (fake document, no LibreOffice)."""
+import os
+import sys
+import types
+import unittest
+import urllib.parse
+import urllib.request
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    sys.modules['uno'] = types.ModuleType('uno')
+
+from core import format_support
+from core.document import DocumentCache
+
+TEXT = "Title\nFirst paragraph.\n\nItem one\nItem two"
+MARKDOWN = "# Title\n\nFirst **paragraph**.\n\n- Item one\n- Item two\n"
+HTML = ('<html><body><h1>Title</h1>\n<p style="x">First <b>paragraph</b>.</p>\n<p></p>\n'
+        '<ul><li><p>Item one</p></li>\n<li><p>Item\n two</p></li></ul></body></html>')
+
+
+class _FakeModel:
+    RuntimeUID = "export-cache-test"
+
+    def __init__(self, text, export):
+        self.text, self.export, self.stores = text, export, 0
+
+    def storeToURL(self, url, props):
+        self.stores += 1
+        with open(urllib.request.url2pathname(urllib.parse.urlparse(url).path), "w", encoding="utf-8") as f:
+            f.write(self.export)
+
+    def getText(self):
+        cursor = types.SimpleNamespace(gotoStart=lambda e: None, gotoEnd=lambda e: None,
+                                       getString=lambda: self.text)
+        return types.SimpleNamespace(createTextCursor=lambda: cursor)
+
+
+class TestExportCache(unittest.TestCase):
+    def setUp(self):
+        self.tracked = True
+        self.patchers = [
+            patch.object(format_support, "_create_property_value", lambda name, value: (name, value)),
+            patch.object(format_support, "DOCUMENT_FORMAT", "markdown"),
+            patch("core.document._attach_cache_listener", lambda model, key: object() if self.tracked else None),
+            patch.object(format_support, "_range_to_markdown_via_temp_doc", return_value="TEMP"),
+        ]
+        for p in self.patchers:
+            p.start()
+        self.model = _FakeModel(TEXT, MARKDOWN)
+
+    def tearDown(self):
+        DocumentCache.invalidate(self.model)
+        for p in self.patchers:
+            p.stop()
+
+    def _get(self, **args):
+        return format_support.document_to_markdown(self.model, None, **args)
+
+    def test_full_export_reused_until_edit(self):
+        self.assertEqual(self._get(), MARKDOWN)
+        self.assertEqual(self._get(max_chars=7), "# Title\n\n[... truncated ...]")
+        self.assertEqual(self.model.stores, 1)
+        DocumentCache.note_modified(self.model)
+        self._get()
+        self.assertEqual(self.model.stores, 2)
+
+    def test_untracked_document_is_exported_every_time(self):
+        self.tracked = False
+        self._get()
+        self._get()
+        self.assertEqual(self.model.stores, 2)
+        self.assertEqual(self._get(scope="range", range_start=6, range_end=23), "TEMP")
+
+    def test_ranges_cut_from_cached_export(self):
+        self.assertEqual(self._get(scope="range", range_start=6, range_end=23), "TEMP")  # nothing cached yet
+        self._get()
+        self.assertEqual(self._get(scope="range", range_start=6, range_end=23), "First **paragraph**.")
+        self.assertEqual(self._get(scope="range", range_start=6, range_end=len(TEXT)),
+                         "First **paragraph**.\n\n- Item one\n- Item two")
+        # Range that splits a paragraph is exported through a temp document
+        self.assertEqual(self._get(scope="range", range_start=8, range_end=23), "TEMP")
+        self.assertEqual(self.model.stores, 1)
+
+    def test_html_blocks_and_unclean_exports(self):
+        with patch.object(format_support, "DOCUMENT_FORMAT", "html"):
+            self.model.export = HTML
+            self._get()
+            self.assertEqual(self._get(scope="range", range_start=24, range_end=len(TEXT)),
+                             "<p>Item one</p>\n<p>Item\n two</p>")
+        DocumentCache.note_modified(self.model)
+        self.model.export = MARKDOWN.replace("- Item two", "| a | b |")
+        self._get()
+        self.assertEqual(self._get(scope="range", range_start=0, range_end=5), "TEMP")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+"""Tests for core.http_pool and sync_request reuse (local HTTP server, no LibreOffice)."""
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import unittest
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.http_pool import ConnectionPool, pool_key, get_connection_pool, get_unverified_ssl_context
+from core.api import LlmClient, sync_request
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/json")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/close":
+            # Answer, then drop the keep-alive connection without telling the client
+            self._send_json({"ok": True})
+            self.close_connection = True
+            return
+        self._send_json({"path": self.path, "port": self.client_address[1]})
+
+    def do_POST(self):
+        # Read the request, then hang up without answering
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        type(self).dropped_posts += 1
+        self.close_connection = True
+
+    dropped_posts = 0
+
+    def _send_json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = "http://127.0.0.1:%d" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        get_connection_pool().close_all()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_pool_key_defaults(self):
+        self.assertEqual(pool_key("https://api.example.com/v1"), ("https", "api.example.com", 443))
+        self.assertEqual(pool_key("http://localhost:11434"), ("http", "localhost", 11434))
+
+    def test_ssl_context_is_shared(self):
+        self.assertIs(get_unverified_ssl_context(), get_unverified_ssl_context())
+
+    def test_sync_request_reuses_connection(self):
+        first = sync_request(self.base + "/a")
+        second = sync_request(self.base + "/b")
+        # Same client port means the same TCP connection was kept alive
+        self.assertEqual(first["port"], second["port"])
+        self.assertEqual(second["path"], "/b")
+
+    def test_sync_request_follows_redirect(self):
+        self.assertEqual(sync_request(self.base + "/redirect")["path"], "/json")
+
+    def test_stale_connection_is_retried(self):
+        sync_request(self.base + "/close")
+        # The pooled connection was closed by the server; the next call must still succeed
+        self.assertEqual(sync_request(self.base + "/after")["path"], "/after")
+
+    def test_dropped_request_on_fresh_connection_is_not_resent(self):
+        get_connection_pool().close_all()
+        _Handler.dropped_posts = 0
+        with self.assertRaises(Exception):
+            sync_request(self.base + "/submit", data=b'{"job": 1}')
+        # A retry would submit the job a second time
+        self.assertEqual(_Handler.dropped_posts, 1)
+
+    def test_sync_request_uses_configured_proxy(self):
+        # The test server doubles as the proxy: it sees the absolute request URI
+        with patch.dict(os.environ, {"http_proxy": self.base, "no_proxy": ""}):
+            result = sync_request("http://proxied.invalid/via-proxy")
+        self.assertEqual(result["path"], "http://proxied.invalid/via-proxy")
+
+    def test_sync_request_honours_no_proxy(self):
+        with patch.dict(os.environ, {"http_proxy": "http://127.0.0.1:9", "no_proxy": "127.0.0.1"}):
+            self.assertEqual(sync_request(self.base + "/direct")["path"], "/direct")
+
+    def test_max_per_host_blocks_until_release(self):
+        pool = ConnectionPool(max_per_host=1)
+        key = pool_key(self.base)
+        conn, _ = pool.acquire(key, timeout=5)
+        acquired = threading.Event()
+
+        def worker():
+            other, _ = pool.acquire(key, timeout=5)
+            acquired.set()
+            pool.release(key, other, reuse=False)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        self.assertFalse(acquired.wait(0.2))
+        pool.release(key, conn, reuse=False)
+        self.assertTrue(acquired.wait(2))
+        t.join()
+
+    def test_acquire_times_out_when_host_is_full(self):
+        pool = ConnectionPool(max_per_host=1)
+        key = pool_key(self.base)
+        conn, _ = pool.acquire(key, timeout=5)
+        started = time.monotonic()
+        with self.assertRaises(socket.timeout):
+            pool.acquire(key, timeout=0.1)
+        self.assertLess(time.monotonic() - started, 2)
+        # The failed wait must not leak a slot
+        pool.release(key, conn, reuse=False)
+        pool.release(key, pool.acquire(key, timeout=1)[0], reuse=False)
+
+    def test_client_applies_pool_settings_only_on_change(self):
+        pool = ConnectionPool()
+        config = {"http_max_connections_per_host": 3, "http_idle_timeout": 30.0}
+        with patch("core.api.get_connection_pool", return_value=pool), \
+                patch.object(pool, "configure", wraps=pool.configure) as configure, \
+                patch("core.api._pool_settings", None):
+            LlmClient(config, None)
+            LlmClient(dict(config), None)
+            self.assertEqual(configure.call_count, 1)
+            LlmClient(dict(config, http_max_connections_per_host=4), None)
+            self.assertEqual(configure.call_count, 2)
+        self.assertEqual(pool.max_per_host, 4)
+
+    def test_idle_timeout_discards_connection(self):
+        pool = ConnectionPool(idle_timeout=0.01)
+        key = pool_key(self.base)
+        conn, _ = pool.acquire(key, timeout=5)
+        conn.request("GET", "/x")
+        conn.getresponse().read()
+        pool.release(key, conn)
+        time.sleep(0.05)
+        self.assertIsNot(pool.acquire(key, timeout=5)[0], conn)
+        self.assertEqual(pool.stats["discarded"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import logging as lw_logging
+from core.logging import debug_log, flush_logs, log_enabled, DEBUG, INFO, ERROR
+
+
+class TestDebugLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "debug.log")
+        self.saved = (lw_logging._debug_log_path, lw_logging._log_level, lw_logging._log_max_bytes)
+        lw_logging._debug_log_path = self.path
+        lw_logging._log_level = INFO
+
+    def tearDown(self):
+        flush_logs()
+        lw_logging._debug_log_path, lw_logging._log_level, lw_logging._log_max_bytes = self.saved
+        shutil.rmtree(self.tmpdir)
+
+    def _read(self):
+        flush_logs()
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_levels_and_lazy_formatting(self):
+        calls = []
+
+        def expensive():
+            calls.append(1)
+            return "payload"
+
+        debug_log(expensive, context="API", level=DEBUG)
+        self.assertEqual(calls, [])
+        self.assertFalse(log_enabled(DEBUG))
+        debug_log("value=%d", 42, context="API")
+        debug_log("boom", level=ERROR)
+        text = self._read()
+        self.assertIn("[API] value=42", text)
+        self.assertIn("boom", text)
+        self.assertNotIn("payload", text)
+
+        lw_logging._log_level = DEBUG
+        debug_log(expensive, context="API", level=DEBUG)
+        self.assertIn("[API] payload", self._read())
+        self.assertEqual(calls, [1])
+
+    def test_bad_format_args_still_logged(self):
+        debug_log("needs %d", "not a number")
+        self.assertIn("needs %d", self._read())
+
+    def test_rotation(self):
+        lw_logging._log_max_bytes = 1000
+        for i in range(40):
+            debug_log("line %03d %s", i, "x" * 40)
+        flush_logs()
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        debug_log("after rotation")
+        self.assertIn("after rotation", self._read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for core.markup_plain and the search-candidate fallback (no LibreOffice)."""
+import os
+import sys
+import types
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    sys.modules['uno'] = types.ModuleType('uno')
+
+from core import format_support
+from core.markup_plain import markup_to_plain
+
+
+class TestMarkdownToPlain(unittest.TestCase):
+    def test_common_subset(self):
+        cases = [
+            ("## Summary", "Summary"),
+            ("# Title #\n\nFirst para.\n\n\nSecond para.\n", "Title\nFirst para.\nSecond para."),
+            ("Some **bold**, *italic*, ***both***, __strong__ and ~~gone~~ text", "Some bold, italic, both, strong and gone text"),
+            ("Call `f(*args)` via [the docs](https://example.com \"t\")", "Call f(*args) via the docs"),
+            ("- one\n- two\n  continued\n1. three", "one\ntwo continued\nthree"),
+            ("> quoted **text**", "quoted text"),
+            ("snake_case_name stays, 5\\*3 escapes", "snake_case_name stays, 5*3 escapes"),
+            ("line one\nline two", "line one line two"),
+            ("", ""),
+        ]
+        for source, expected in cases:
+            self.assertEqual(markup_to_plain(source, "markdown"), expected, source)
+
+    def test_unsupported_constructs_flagged(self):
+        for source in ["| a | b |\n|---|---|", "```\ncode\n```", "![img](a.png)", "a <b>raw</b> tag",
+                       "text\n---", "    indented code", "hard  \nbreak", "2 * 3 * 4 *", "[ref][1]",
+                       "- [ ] task", "Fish &amp; chips"]:
+            self.assertIsNone(markup_to_plain(source, "markdown"), source)
+
+
+class TestHtmlToPlain(unittest.TestCase):
+    def test_blocks_inline_and_entities(self):
+        source = "<h1>Title</h1>\n<p>Fish &amp; <b>chips</b>\n  today</p><ul><li>one</li><li>two<br>lines</li></ul>"
+        self.assertEqual(markup_to_plain(source, "html"), "Title\nFish & chips today\none\ntwo\nlines")
+
+    def test_unsupported_tags_flagged(self):
+        self.assertIsNone(markup_to_plain("<table><tr><td>x</td></tr></table>", "html"))
+        self.assertIsNone(markup_to_plain("<p><img src='a.png'></p>", "html"))
+
+
+class TestPlainForSearch(unittest.TestCase):
+    def setUp(self):
+        format_support._plain_fallback_cache.clear()
+        self.patcher = patch.object(format_support, "DOCUMENT_FORMAT", "markdown")
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_fast_path_skips_hidden_document(self):
+        with patch.object(format_support, "_markdown_to_plain_via_document") as slow:
+            self.assertEqual(format_support._markdown_to_plain(None, "## Summary"), "Summary")
+        slow.assert_not_called()
+
+    def test_unsupported_falls_back_once(self):
+        table = "| a | b |\n|---|---|"
+        with patch.object(format_support, "_markdown_to_plain_via_document", return_value="a\tb") as slow:
+            for _ in range(3):
+                self.assertEqual(format_support._markdown_to_plain(None, table), "a\tb")
+        self.assertEqual(slow.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
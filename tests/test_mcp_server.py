@@ -0,0 +1,182 @@
+"""Tests for the MCP HTTP server (real sockets; a background thread stands in for the UNO main thread)."""
+import os
+import sys
+import json
+import time
+import types
+import threading
+import http.client
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    sys.modules['uno'] = types.ModuleType('uno')
+
+from core import mcp_server
+from core.mcp_server import MCPHttpServer, MCP_HEALTH_SIGNATURE
+from core.mcp_thread import drain_mcp_queue, post_to_main_thread, set_main_thread_waker, get_mcp_queue_stats
+
+
+def _fake_tool(ctx, doc, doc_type, tool_name, args):
+    doc.append(tool_name)
+    if tool_name == "slow":
+        time.sleep(args.get("seconds", 0.5))
+    if tool_name == "fail":
+        return json.dumps({"status": "error", "message": "bad args"})
+    return json.dumps({"status": "ok", "tool": tool_name, "args": args})
+
+
+class TestMCPServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.doc = []
+        cls.patchers = [
+            patch.object(mcp_server, "_resolve_document", lambda ctx, url: (cls.doc, "writer")),
+            patch.object(mcp_server, "_execute_tool_call", _fake_tool),
+            patch.object(mcp_server.tool_bus, "broadcast", lambda *a, **k: None),
+        ]
+        for p in cls.patchers:
+            p.start()
+        cls.server = MCPHttpServer(None, port=0)
+        cls.port = cls.server._server.server_address[1]
+        cls.server.start()
+        cls.stop = threading.Event()
+
+        def main_loop():
+            while not cls.stop.is_set():
+                drain_mcp_queue()
+                time.sleep(0.005)
+
+        cls.main_thread = threading.Thread(target=main_loop, daemon=True)
+        cls.main_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stop.set()
+        cls.server.stop()
+        for p in cls.patchers:
+            p.stop()
+
+    def setUp(self):
+        del self.doc[:]
+
+    def _conn(self):
+        return http.client.HTTPConnection("localhost", self.port, timeout=10)
+
+    def _post(self, conn, path, body):
+        conn.request("POST", path, body=json.dumps(body), headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        return resp, json.loads(resp.read().decode("utf-8"))
+
+    def test_keep_alive_and_timing_header(self):
+        conn = self._conn()
+        resp, data = self._post(conn, "/tools/get_document_content", {"scope": "full"})
+        self.assertEqual(data["args"], {"scope": "full"})
+        self.assertIn("exec;dur=", resp.getheader("Server-Timing"))
+        sock = conn.sock
+        conn.request("GET", "/health")
+        resp = conn.getresponse()
+        self.assertIn(MCP_HEALTH_SIGNATURE, resp.read().decode("utf-8"))
+        self.assertIs(conn.sock, sock)
+        conn.close()
+
+    def test_health_answers_while_tool_call_runs(self):
+        worker = threading.Thread(target=lambda: self._post(self._conn(), "/tools/slow", {"seconds": 0.5}))
+        worker.start()
+        time.sleep(0.1)
+        t0 = time.perf_counter()
+        conn = self._conn()
+        conn.request("GET", "/health")
+        self.assertEqual(conn.getresponse().status, 200)
+        self.assertLess(time.perf_counter() - t0, 0.3)
+        worker.join()
+
+    def test_batch_runs_calls_in_order(self):
+        calls = [{"tool": "a", "args": {"n": 1}}, {"tool": "fail"}, {"tool": "b"}]
+        resp, data = self._post(self._conn(), "/tools/batch", {"calls": calls})
+        self.assertEqual(self.doc, ["a", "fail", "b"])
+        self.assertEqual(data["status"], "partial")
+        self.assertEqual([r["tool"] for r in data["results"]], ["a", "fail", "b"])
+        self.assertEqual(data["results"][0]["result"]["args"], {"n": 1})
+        self.assertEqual(data["errors"], 1)
+
+        del self.doc[:]
+        resp, data = self._post(self._conn(), "/tools/batch", {"calls": calls, "stop_on_error": True})
+        self.assertEqual(self.doc, ["a", "fail"])
+        self.assertEqual((data["executed"], data["skipped"]), (2, 1))
+
+    def test_batch_timeout_cancels_remaining_calls(self):
+        calls = [{"tool": "slow", "args": {"seconds": 0.4}}] * 3
+        with patch.object(mcp_server, "TOOL_CALL_TIMEOUT", 0.2):
+            resp, data = self._post(self._conn(), "/tools/batch", {"calls": calls})
+        self.assertEqual(resp.status, 504)
+        self.assertEqual((data["executed"], data["in_progress"]), (1, "slow"))
+        time.sleep(0.6)
+        # The call in progress finished; the third never started
+        self.assertEqual(self.doc, ["slow", "slow"])
+
+        resp, data = self._post(self._conn(), "/tools/batch",
+                                {"calls": [{"tool": "a"}] * (mcp_server.MAX_BATCH_CALLS + 1)})
+        self.assertEqual(resp.status, 400)
+
+    def test_bad_requests(self):
+        conn = self._conn()
+        resp, data = self._post(conn, "/tools/batch", {"calls": [{"args": {}}]})
+        self.assertEqual(resp.status, 400)
+        conn.request("POST", "/tools/x", body=b"{oops", headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        self.assertEqual(resp.status, 400)
+        # Valid JSON that is not an object, on the same kept-alive connection
+        for path, body in (("/", []), ("/tools/x", "x")):
+            resp, data = self._post(conn, path, body)
+            self.assertEqual(resp.status, 400)
+        # /tools/batch accepts a bare list of calls
+        resp, data = self._post(conn, "/tools/batch", [{"tool": "a"}])
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(self.doc, ["a"])
+
+
+class TestMainThreadWakeup(unittest.TestCase):
+    def setUp(self):
+        drain_mcp_queue()
+        self.wakeups = []
+        set_main_thread_waker(lambda: self.wakeups.append(1))
+
+    def tearDown(self):
+        set_main_thread_waker(None)
+        drain_mcp_queue()
+
+    def test_one_wakeup_per_burst(self):
+        ran = []
+        for i in range(20):
+            post_to_main_thread(ran.append, i)
+        self.assertEqual(len(self.wakeups), 1)
+        self.assertEqual(drain_mcp_queue(), 20)
+        self.assertEqual(ran, list(range(20)))
+        post_to_main_thread(ran.append, 20)
+        self.assertEqual(len(self.wakeups), 2)
+
+    def test_budget_limits_drain_and_rearms(self):
+        for _ in range(5):
+            post_to_main_thread(time.sleep, 0.02)
+        self.assertEqual(drain_mcp_queue(budget=0.03), 2)
+        self.assertEqual(len(self.wakeups), 2)  # re-armed because work remains
+        self.assertEqual(drain_mcp_queue(budget=1.0), 3)
+
+    def test_stats(self):
+        post_to_main_thread(time.sleep, 0.01)
+        post_to_main_thread(lambda: None)
+        drain_mcp_queue()
+        stats = get_mcp_queue_stats()
+        self.assertEqual(stats["depth"], 0)
+        self.assertGreaterEqual(stats["max_depth"], 2)
+        self.assertGreaterEqual(stats["wait_ms"]["max"], 10.0)
+        self.assertGreaterEqual(stats["exec_ms"]["max"], 10.0)
+        self.assertTrue(stats["event_driven"])
+
+
+if __name__ == '__main__':
+    unittest.main()
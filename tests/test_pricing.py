@@ -0,0 +1,79 @@
+"""Tests for core.pricing lookups against a temp cache file (no LibreOffice, no network)."""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import types
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    sys.modules['uno'] = types.ModuleType('uno')
+
+from core import pricing
+from core.pricing import calculate_cost, get_model_pricing, fetch_openrouter_pricing
+
+MODELS = [
+    {"id": "openai/gpt-4o", "name": "GPT-4o", "description": "x" * 500,
+     "pricing": {"prompt": "0.0000025", "completion": "0.00001", "image": "0.003613"}},
+    {"id": "openai/gpt-4o:free", "pricing": {"prompt": "0", "completion": "0"}},
+    {"id": "meta-llama/llama-3.1-8b-instruct", "pricing": {"prompt": "0.00000002", "completion": "0.00000005"}},
+    {"id": "other/llama-3.1-8b-instruct", "pricing": {"prompt": "0.0000001", "completion": "0.0000001"}},
+    {"id": "broken/model", "pricing": {"prompt": "n/a"}},
+]
+
+
+class TestPricing(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, pricing.PRICING_FILENAME)
+        self.patcher = patch("core.pricing._get_cache_path", return_value=self.path)
+        self.patcher.start()
+        pricing._index_stamp = None
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def _fetch(self):
+        with patch("core.pricing.sync_request", return_value={"data": MODELS}):
+            fetch_openrouter_pricing(None, force=True)
+
+    def test_compact_cache_and_lookup(self):
+        self._fetch()
+        with open(self.path, encoding="utf-8") as f:
+            stored = json.load(f)
+        self.assertEqual(stored["format"], pricing.PRICING_FORMAT)
+        self.assertNotIn("broken/model", stored["rates"])
+        self.assertEqual(get_model_pricing(None, "openai/gpt-4o"), (0.0000025, 0.00001))
+        self.assertEqual(get_model_pricing(None, "OpenAI/GPT-4o"), (0.0000025, 0.00001))
+        self.assertEqual(get_model_pricing(None, "gpt-4o"), (0.0000025, 0.00001))
+        self.assertEqual(get_model_pricing(None, "openai/gpt-4o:free"), (0.0, 0.0))
+        self.assertEqual(get_model_pricing(None, "openai/gpt-4o:online"), (0.0000025, 0.00001))
+        # Bare name used by two vendors with different prices is not guessed
+        self.assertIsNone(get_model_pricing(None, "llama-3.1-8b-instruct"))
+        self.assertIsNone(get_model_pricing(None, "unknown"))
+
+    def test_file_parsed_once_until_changed(self):
+        self._fetch()
+        with patch("core.pricing.json.load", wraps=json.load) as load:
+            for _ in range(50):
+                calculate_cost(None, {"prompt_tokens": 1000, "completion_tokens": 100}, "openai/gpt-4o")
+            self.assertEqual(load.call_count, 1)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"format": pricing.PRICING_FORMAT, "rates": {"openai/gpt-4o": [1.0, 2.0]}, "pad": 1}, f)
+            self.assertEqual(get_model_pricing(None, "openai/gpt-4o"), (1.0, 2.0))
+            self.assertEqual(load.call_count, 2)
+
+    def test_legacy_list_cache(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(MODELS, f)
+        cost = calculate_cost(None, {"prompt_tokens": 1000, "completion_tokens": 100}, "openai/gpt-4o")
+        self.assertAlmostEqual(cost, 1000 * 0.0000025 + 100 * 0.00001)
+
+
+if __name__ == '__main__':
+    unittest.main()
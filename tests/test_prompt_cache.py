@@ -0,0 +1,116 @@
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Mock uno (core.config imports it)
+sys.modules.setdefault('uno', MagicMock())
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import prompt_cache
+from core.prompt_cache import PromptCache, prompt_cache_key
+
+
+class TestPromptCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "cache.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_key_covers_every_argument(self):
+        base = ("http://localhost:11434", "llama3", "sys", "hello", 70)
+        keys = {prompt_cache_key(*base)}
+        for i, changed in enumerate(("http://other", "mistral", "other sys", "bye", 71)):
+            args = list(base)
+            args[i] = changed
+            keys.add(prompt_cache_key(*args))
+        self.assertEqual(len(keys), 6)
+        self.assertEqual(prompt_cache_key(*base), prompt_cache_key(*base))
+
+    def test_persists_across_instances(self):
+        cache = PromptCache(self.path)
+        cache.put("k1", "result one")
+        cache.flush()
+        reopened = PromptCache(self.path)
+        self.assertEqual(reopened.get("k1"), "result one")
+        self.assertIsNone(reopened.get("missing"))
+        self.assertEqual((reopened.hits, reopened.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = PromptCache(self.path, max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+
+    def test_ttl_expiry(self):
+        cache = PromptCache(self.path, ttl=10)
+        with patch.object(prompt_cache.time, "time", return_value=1000.0):
+            cache.put("k", "v")
+        with patch.object(prompt_cache.time, "time", return_value=1005.0):
+            self.assertEqual(cache.get("k"), "v")
+        with patch.object(prompt_cache.time, "time", return_value=1011.0):
+            self.assertIsNone(cache.get("k"))
+
+    def test_writes_are_batched_and_clear_persists(self):
+        cache = PromptCache(self.path)
+        with patch.object(prompt_cache, "SAVE_DELAY", 0.2):
+            for i in range(50):
+                cache.put("k%d" % i, "v")
+            # Nothing is written while the burst is still going
+            self.assertFalse(os.path.exists(self.path))
+            # The whole burst, including its last put, is saved once it goes quiet
+            deadline = time.monotonic() + 5
+            while not os.path.exists(self.path) and time.monotonic() < deadline:
+                time.sleep(0.05)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["entries"]), 50)
+        cache.clear()
+        self.assertEqual(len(PromptCache(self.path)), 0)
+
+    def test_continuous_writes_are_saved_by_max_delay(self):
+        cache = PromptCache(self.path)
+        with patch.object(prompt_cache, "SAVE_DELAY", 0.2), \
+                patch.object(prompt_cache, "MAX_SAVE_DELAY", 0.3):
+            deadline = time.monotonic() + 5
+            i = 0
+            while not os.path.exists(self.path) and time.monotonic() < deadline:
+                cache.put("k%d" % i, "v")
+                i += 1
+                time.sleep(0.02)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_unreadable_file_is_ignored(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        cache = PromptCache(self.path)
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", "v")
+        cache.flush()
+        self.assertEqual(PromptCache(self.path).get("k"), "v")
+
+    def test_malformed_entries_are_ignored(self):
+        good = ["good", [time.time(), "g"]]
+        for entries in ({"ab": "cd"}, [good, ["k"]], [good, ["k", ["old", "v"]]],
+                        [good, ["k", 5]], [good, [["k"], [time.time(), "v"]]]):
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"version": prompt_cache.PROMPT_CACHE_VERSION, "entries": entries}, f)
+            cache = PromptCache(self.path)
+            self.assertIsNone(cache.get("good"))
+            cache.put("k", "v")
+            self.assertEqual(cache.get("k"), "v")
+
+
+if __name__ == '__main__':
+    unittest.main()
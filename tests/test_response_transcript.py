@@ -0,0 +1,100 @@
+"""Tests for core.uno_ui_helpers.ResponseTranscript with a fake XTextComponent (no LibreOffice)."""
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    _uno = types.ModuleType('uno')
+    _uno.createUnoStruct = lambda name, *args: (name.rsplit('.', 1)[-1],) + args
+    sys.modules['uno'] = _uno
+
+from core.uno_ui_helpers import ResponseTranscript
+
+
+class _FakeTextControl:
+    """Minimal XTextComponent: positions are UTF-16 units like the real control."""
+
+    def __init__(self, text=""):
+        self.text = text
+        self.calls = []
+
+    def getText(self):
+        self.calls.append("getText")
+        return self.text
+
+    def setText(self, text):
+        self.calls.append("setText")
+        self.text = text
+
+    def insertText(self, sel, text):
+        self.calls.append("insertText")
+        units = self.text.encode("utf-16-le")
+        start, end = sel[1] * 2, sel[2] * 2
+        self.text = (units[:start] + text.encode("utf-16-le") + units[end:]).decode("utf-16-le")
+
+    def setSelection(self, sel):
+        self.calls.append("setSelection")
+        self.selection = sel[1:]
+
+
+class TestResponseTranscript(unittest.TestCase):
+    def test_append_inserts_at_end_without_reading_back(self):
+        ctrl = _FakeTextControl("Hello\n")
+        t = ResponseTranscript(ctrl)
+        ctrl.calls.clear()
+        t.append("You: hi\n")
+        t.append("AI: 😀 ok")
+        self.assertEqual(ctrl.text, "Hello\nYou: hi\nAI: 😀 ok")
+        self.assertNotIn("getText", ctrl.calls)
+        self.assertNotIn("setText", ctrl.calls)
+        # The emoji is two UTF-16 units; the caret must land at the real end
+        self.assertEqual(ctrl.selection, (len(ctrl.text) + 1,) * 2)
+
+    def test_buffered_appends_are_written_once_per_flush(self):
+        ctrl = _FakeTextControl()
+        t = ResponseTranscript(ctrl)
+        for word in ("The", " quick", " fox"):
+            t.append(word, flush=False)
+        self.assertEqual(ctrl.text, "")
+        t.flush()
+        self.assertEqual(ctrl.text, "The quick fox")
+        self.assertEqual(ctrl.calls.count("insertText"), 1)
+        t.flush()
+        self.assertEqual(ctrl.calls.count("insertText"), 1)
+
+    def test_line_endings_normalized(self):
+        ctrl = _FakeTextControl()
+        t = ResponseTranscript(ctrl)
+        t.append("a\r\nb\rc")
+        self.assertEqual(ctrl.text, "a\nb\nc")
+
+    def test_spill_keeps_visible_text_bounded(self):
+        ctrl = _FakeTextControl()
+        t = ResponseTranscript(ctrl, max_visible=1000, keep_visible=400)
+        lines = ["line %04d %s\n" % (i, "x" * 20) for i in range(200)]
+        for line in lines:
+            t.append(line)
+            self.assertLessEqual(len(ctrl.text), 1100)
+        self.assertTrue(ctrl.text.startswith("["))
+        self.assertTrue(ctrl.text.endswith(lines[-1]))
+        self.assertEqual(t.get_text(), "".join(lines))
+        # Inserts after a spill still land at the end of the reset text
+        t.append("tail")
+        self.assertTrue(ctrl.text.endswith(lines[-1] + "tail"))
+
+    def test_clear(self):
+        ctrl = _FakeTextControl("greeting\n")
+        t = ResponseTranscript(ctrl, max_visible=50, keep_visible=20)
+        t.append("y" * 100)
+        t.clear()
+        self.assertEqual(ctrl.text, "")
+        t.append("fresh")
+        self.assertEqual(ctrl.text, "fresh")
+        self.assertEqual(t.get_text(), "fresh")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -327,5 +327,154 @@ class TestFinishReasonRemap(unittest.TestCase):
         self.assertIsNotNone(result.get("tool_calls"))
 
 
+class TestDeltaAccumulator(unittest.TestCase):
+    """DeltaAccumulator produces the same snapshot as folding with accumulate_delta."""
+
+    def _both(self, deltas):
+        import copy
+        from core.streaming_deltas import DeltaAccumulator, accumulate_delta
+        expected = {}
+        for d in copy.deepcopy(deltas):
+            accumulate_delta(expected, d)
+        acc = DeltaAccumulator()
+        for d in copy.deepcopy(deltas):
+            acc.add(d)
+        return expected, acc.snapshot()
+
+    def test_tool_call_stream_matches(self):
+        deltas = [{"role": "assistant", "content": None, "tool_calls": []}]
+        for i, name in enumerate(("apply_document_content", "get_document_outline")):
+            deltas.append({"tool_calls": [{"index": i, "id": "call_%d" % i, "type": "function",
+                                           "function": {"name": name, "arguments": ""}}]})
+            for frag in ('{"content', '": "', "<p>x</p>" * 5, '", "target": ', '"end"}'):
+                deltas.append({"tool_calls": [{"index": i, "function": {"arguments": frag}}]})
+        deltas.append({"content": "Done", "usage": {"total_tokens": 3}})
+        deltas.append({"content": ".", "usage": {"total_tokens": 4}, "reasoning_details": [{"index": 0, "text": "a"}]})
+        deltas.append({"reasoning_details": [{"index": 0, "text": "b"}], "refusal": None, "annotations": ["x"]})
+        deltas.append({"annotations": ["y"], "type": "t1"})
+        expected, actual = self._both(deltas)
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual["tool_calls"][1]["function"]["arguments"],
+                         '{"content": "' + "<p>x</p>" * 5 + '", "target": "end"}')
+
+    def test_snapshot_can_be_taken_mid_stream(self):
+        from core.streaming_deltas import DeltaAccumulator
+        acc = DeltaAccumulator()
+        acc.add({"content": "a"})
+        self.assertEqual(acc.snapshot(), {"content": "a"})
+        acc.add({"content": "b"})
+        self.assertEqual(acc.snapshot(), {"content": "ab"})
+
+    def test_bad_list_entry_raises(self):
+        from core.streaming_deltas import DeltaAccumulator
+        acc = DeltaAccumulator()
+        acc.add({"tool_calls": [{"index": 0, "id": "a"}]})
+        with self.assertRaises(RuntimeError):
+            acc.add({"tool_calls": [{"id": "no index"}]})
+
+
+class TestSSEDecoder(unittest.TestCase):
+    """core.sse.SSEDecoder: block splitting, multi-line data, comments, line endings."""
+
+    def _decode(self, raw, block_size):
+        from core.sse import SSEDecoder
+        decoder = SSEDecoder()
+        events = []
+        for i in range(0, len(raw), block_size):
+            events.extend(decoder.feed(raw[i:i + block_size]))
+        events.extend(decoder.close())
+        return events
+
+    def test_any_block_split_gives_same_events(self):
+        raw = (b": OPENROUTER PROCESSING\r\n\r\n"
+               b"event: message\r\nid: 1\r\ndata: {\"a\": 1}\r\n\r\n"
+               b"data:{\"b\": 2}\n\n"
+               b"data: line one\rdata: line two\r\r"
+               b"data: [DONE]")
+        expected = [b'{"a": 1}', b'{"b": 2}', b"line one\nline two", b"[DONE]"]
+        for block_size in (1, 2, 3, 7, 64, len(raw)):
+            self.assertEqual(self._decode(raw, block_size), expected, block_size)
+
+    def test_empty_data_is_not_dispatched(self):
+        self.assertEqual(self._decode(b"data:\n\n: ping\n\n", 4), [])
+
+    def test_data_lines_without_blank_lines_stream_incrementally(self):
+        from core.sse import SSEDecoder
+        decoder = SSEDecoder()
+        received = []
+        for line in _make_sse_lines({"n": 1}, {"n": 2}):
+            received.append(decoder.feed(line))
+        # Each complete JSON line is dispatched when the next data line arrives
+        self.assertEqual(received, [[], [b'{"n": 1}'], [b'{"n": 2}']])
+        self.assertEqual(decoder.close(), [b"[DONE]"])
+
+    @patch("core.api.debug_log")
+    def test_events_without_blank_lines_fall_back_to_lines(self, mock_debug_log):
+        from core.api import _iter_sse_chunks, _SSE_DONE
+        lines = _make_sse_lines({"n": 1}, {"n": 2})
+        self.assertEqual(list(_iter_sse_chunks(lines)), [{"n": 1}, {"n": 2}, _SSE_DONE])
+
+
+class TestCompletionBatch(unittest.TestCase):
+    """run_completion_batch_async: bounded concurrency, results on the calling thread."""
+
+    def _ctx(self):
+        ctx = MagicMock()
+        ctx.getServiceManager.return_value.createInstanceWithContext.return_value = MagicMock()
+        return ctx
+
+    def test_results_and_concurrency_bound(self):
+        import threading
+        import time
+        from core.async_stream import run_completion_batch_async
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        class FakeClient:
+            def stream_completion(self, prompt, system_prompt, max_tokens, api_type,
+                                  append_callback, append_thinking_callback=None):
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.01)
+                append_callback(prompt.upper())
+                append_callback("!")
+                with lock:
+                    active[0] -= 1
+
+        jobs = [("cell%d" % i, "", 10) for i in range(12)]
+        results = {}
+        progress = []
+        main_thread = threading.current_thread()
+
+        def on_result(i, text):
+            self.assertIs(threading.current_thread(), main_thread)
+            results[i] = text
+
+        skipped = run_completion_batch_async(
+            self._ctx(), FakeClient, jobs, 3, "chat", on_result,
+            lambda i, e: self.fail("unexpected error %s" % e),
+            lambda done, total, elapsed: progress.append((done, total)))
+        self.assertEqual(skipped, 0)
+        self.assertEqual(results, {i: "CELL%d!" % i for i in range(12)})
+        self.assertLessEqual(peak[0], 3)
+        self.assertEqual(progress[-1], (12, 12))
+
+    def test_error_stops_new_jobs(self):
+        from core.async_stream import run_completion_batch_async
+
+        class FailingClient:
+            def stream_completion(self, prompt, *args, **kwargs):
+                raise RuntimeError("boom " + prompt)
+
+        errors = []
+        skipped = run_completion_batch_async(
+            self._ctx(), FailingClient, [("a", "", 1), ("b", "", 1), ("c", "", 1)], 1, "chat",
+            lambda i, text: self.fail("unexpected result"), lambda i, e: errors.append((i, str(e))))
+        self.assertEqual(errors, [(0, "boom a")])
+        self.assertEqual(skipped, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
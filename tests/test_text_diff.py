@@ -0,0 +1,160 @@
+"""Tests for core.text_diff and diff-based _replace_text_preserving_format (fake XText, no LibreOffice)."""
+import os
+import sys
+import types
+import random
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    sys.modules['uno'] = types.ModuleType('uno')
+
+from core.text_diff import text_edit_ops
+from core.format_support import _replace_text_preserving_format
+
+
+def _apply(old, new, ops):
+    out = old
+    for tag, i1, i2, j1, j2 in reversed(ops):
+        out = out[:i1] + new[j1:j2] + out[i2:]
+    return out
+
+
+class TestTextEditOps(unittest.TestCase):
+    def test_ops_rebuild_new_text(self):
+        rng = random.Random(7)
+        words = ["alpha", "beta", "gamma", "delta", ",", ".", "\n", "naïve", "x"]
+        for _ in range(200):
+            old = " ".join(rng.choice(words) for _ in range(rng.randint(0, 30)))
+            new = " ".join(rng.choice(words) for _ in range(rng.randint(0, 30)))
+            ops = text_edit_ops(old, new)
+            self.assertEqual(_apply(old, new, ops), new)
+            self.assertEqual(ops, sorted(ops, key=lambda op: op[1]))
+
+    def test_few_changed_words_give_few_ops(self):
+        old = " ".join("word%d" % i for i in range(3000))
+        new = old.replace("word10 ", "term10 ").replace("word2000", "word2000 extra")
+        ops = text_edit_ops(old, new)
+        self.assertEqual(_apply(old, new, ops), new)
+        self.assertLessEqual(len(ops), 3)
+        self.assertLessEqual(sum(i2 - i1 for _, i1, i2, _, _ in ops), 8)
+
+    def test_identical_and_empty(self):
+        self.assertEqual(text_edit_ops("same", "same"), [])
+        self.assertEqual(text_edit_ops("", "abc"), [("insert", 0, 0, 0, 3)])
+        self.assertEqual(text_edit_ops("abc", ""), [("delete", 0, 3, 0, 0)])
+
+
+class _FakeText:
+    """XText over a list of [char, format]; inserted text takes the format of the
+    char before it. Cursors are [pos, anchor] lists that shift with edits after them."""
+
+    def __init__(self, chars, formats):
+        self.cells = [[c, f] for c, f in zip(chars, formats)]
+        self.cursors = []
+        self.calls = 0
+
+    def string(self):
+        return "".join(c for c, _ in self.cells)
+
+    def formats(self):
+        return [f for _, f in self.cells]
+
+    def createTextCursorByRange(self, other):
+        cur = _FakeCursor(self, other.pos if isinstance(other, _FakeCursor) else other)
+        self.cursors.append(cur)
+        return cur
+
+    def _shift(self, at, delta, skip):
+        for cur in self.cursors:
+            if cur is skip:
+                continue
+            for attr in ("pos", "anchor"):
+                if getattr(cur, attr) > at:
+                    setattr(cur, attr, max(at, getattr(cur, attr) + delta))
+
+    def insertString(self, cursor, s, absorb):
+        self.calls += 1
+        at = cursor.pos
+        fmt = self.cells[at - 1][1] if at > 0 else (self.cells[0][1] if self.cells else None)
+        self.cells[at:at] = [[c, fmt] for c in s]
+        self._shift(at, len(s), cursor)
+        cursor.pos = cursor.anchor = at + len(s)
+
+
+class _FakeCursor:
+    def __init__(self, text, pos):
+        self.text = text
+        self.pos = self.anchor = pos
+
+    def goRight(self, n, expand):
+        if n > 32767:
+            raise OverflowError("goRight count must fit in a short")
+        self.text.calls += 1
+        self.pos += n
+        if not expand:
+            self.anchor = self.pos
+
+    def setString(self, s):
+        self.text.calls += 1
+        a, b = sorted((self.anchor, self.pos))
+        del self.text.cells[a:b]
+        self.text._shift(a, -(b - a), self)
+        self.pos = self.anchor = a
+
+
+class _Range:
+    def __init__(self, text, start, end):
+        self.text, self.start, self.end = text, start, end
+
+    def getString(self):
+        return self.text.string()[self.start:self.end]
+
+    def getStart(self):
+        return self.start
+
+    def getText(self):
+        return self.text
+
+
+class TestReplacePreservingFormat(unittest.TestCase):
+    def _replace(self, text, rng, new):
+        model = types.SimpleNamespace(getText=lambda: text)
+        with patch("core.document.get_position_offset", return_value=rng.start):
+            _replace_text_preserving_format(model, rng, new)
+
+    def test_changed_word_keeps_formatting_of_unchanged_runs(self):
+        old = "The quick brown fox jumps over the lazy dog. " * 400
+        formats = [i // 7 for i in range(len(old))]
+        text = _FakeText(old, formats)
+        new = old.replace("lazy dog. The quick", "sleepy dog. The quick", 1)
+        self._replace(text, _Range(text, 0, len(old)), new)
+        self.assertEqual(text.string(), new)
+        cut = old.index("lazy")
+        self.assertEqual(text.formats()[:cut], formats[:cut])
+        # Text after the edit keeps its own formatting (shifted by the 2 extra chars)
+        self.assertEqual(text.formats()[cut + 8:], formats[cut + 6:])
+        self.assertLess(text.calls, 40)
+
+    def test_edits_beyond_short_range(self):
+        old = "a" * 40000 + "tail" + "b" * 40000
+        text = _FakeText(old, [0] * len(old))
+        new = "a" * 40000 + "TAIL"
+        self._replace(text, _Range(text, 0, len(old)), new)
+        self.assertEqual(text.string(), new)
+
+    def test_positional_formats_for_full_replacement(self):
+        text = _FakeText("xxABCyy", list("0012344"))
+        self._replace(text, _Range(text, 2, 5), "MNOPQ")
+        self.assertEqual(text.string(), "xxMNOPQyy")
+        self.assertEqual(text.formats(), list("001233344"))
+
+        text = _FakeText("ABCDE", list("12345"))
+        self._replace(text, _Range(text, 0, 5), "UV")
+        self.assertEqual((text.string(), text.formats()), ("UV", list("12")))
+
+
+if __name__ == '__main__':
+    unittest.main()
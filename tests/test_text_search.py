@@ -0,0 +1,113 @@
+"""Tests for core.text_search and mirror-based search in format_support (no LibreOffice)."""
+import os
+import json
+import sys
+import types
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if 'uno' not in sys.modules:
+    sys.modules['uno'] = types.ModuleType('uno')
+
+from core import format_support
+from core.text_search import TextMirror
+
+
+class TestTextMirror(unittest.TestCase):
+    def test_break_variants_map_to_exact_spans(self):
+        doc = "Intro\r\n\r\nFirst line\nsecond line Tail first line"
+        mirror = TextMirror(doc)
+        for needle in ("First line\nsecond", "First line\n\nsecond", "First line\r\nsecond"):
+            (start, end), = mirror.find(needle)
+            self.assertEqual(doc[start:end], "First line\nsecond")
+        (start, end), = mirror.find("Intro\nFirst")
+        self.assertEqual(doc[start:end], "Intro\r\n\r\nFirst")
+        self.assertEqual([doc[s:e] for s, e in mirror.find("line\n")], ["line\n", "line "])
+
+    def test_options(self):
+        doc = "alpha  beta\n\tgamma. Alpha beta gamma"
+        mirror = TextMirror(doc)
+        self.assertEqual(mirror.find("alpha beta"), [])
+        spans = mirror.find(" alpha beta gamma ", ignore_whitespace=True, case_sensitive=False)
+        self.assertEqual([doc[s:e] for s, e in spans], ["alpha  beta\n\tgamma", "Alpha beta gamma"])
+        spans = mirror.find(r"[Aa]lpha\s+beta", regex=True)
+        self.assertEqual([doc[s:e] for s, e in spans], ["alpha  beta", "Alpha beta"])
+        self.assertEqual(len(mirror.find("alpha", case_sensitive=False, start=1)), 1)
+        self.assertEqual(len(mirror.find("a", limit=3)), 3)
+
+    def test_offsets_agree_with_original_text(self):
+        doc = "a\r\n\r\nb c\n\n\nd e  f"
+        for name in ("breaks", "whitespace"):
+            view = TextMirror(doc).view(name)
+            for k in range(len(view.text)):
+                start, end = view.to_original(k, k + 1)
+                self.assertEqual(view.to_normalized(start), k)
+                if view.text[k] not in "\n ":
+                    self.assertEqual(doc[start:end], view.text[k])
+
+
+class TestMirrorSearch(unittest.TestCase):
+    def setUp(self):
+        self.mirror = TextMirror("# not markup\nSummary\nold word, old word and old word")
+        self.patchers = [
+            patch("core.document.get_text_mirror", return_value=self.mirror),
+            patch.object(format_support, "DOCUMENT_FORMAT", "markdown"),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def test_find_text_ranges_retries_rendered_plain(self):
+        ranges = format_support._find_text_ranges(None, None, "## Summary")
+        self.assertEqual(ranges, [{"start": 13, "end": 20, "text": "Summary"}])
+        self.assertEqual(format_support._find_text_ranges(None, None, "old word", start=32, limit=5),
+                         [{"start": 44, "end": 52, "text": "old word"}])
+
+    def test_all_matches_replaced_back_to_front_in_one_pass(self):
+        replaced = []
+        with patch("core.document.get_text_cursors_at_ranges", side_effect=lambda model, spans: list(spans)), \
+                patch.object(format_support, "_replace_text_preserving_format",
+                             side_effect=lambda model, rng, new, ctx=None: replaced.append(rng)):
+            count = format_support._apply_preserving_format_at_search(None, None, "old word old word", "old word",
+                                                                      all_matches=True)
+        self.assertEqual(count, 3)
+        self.assertEqual(replaced, [(44, 52), (31, 39), (21, 29)])
+
+    def test_text_outside_body_falls_back_to_find_first(self):
+        class Found:
+            def __init__(self, text): self.text = text
+            def getString(self): return self.text
+            def getEnd(self): return self
+        class Model:
+            """Document whose only match for the needle is in a table cell."""
+            def __init__(self): self.searched = []
+            def createSearchDescriptor(self): return types.SimpleNamespace()
+            def findFirst(self, sd):
+                self.searched.append(sd.SearchString)
+                return Found("cell text") if sd.SearchString == "cell\ntext" else None
+            def findNext(self, start, sd): return None
+        model = Model()
+        replaced = []
+        with patch.object(format_support, "_replace_text_preserving_format",
+                          side_effect=lambda model, rng, new, ctx=None: replaced.append(rng.getString())):
+            count = format_support._apply_preserving_format_at_search(model, None, "new", "cell\r\ntext")
+        self.assertEqual((count, replaced), (1, ["cell text"]))
+        self.assertEqual(model.searched, ["cell\ntext"])
+
+        result = json.loads(format_support.tool_find_text(model, None, {"search": "cell\ntext"}))
+        self.assertEqual(result["ranges"], [])
+        self.assertEqual(result["outside_body"], ["cell text"])
+        self.assertIn("tables or frames", result["message"])
+
+    def test_invalid_regex_is_a_tool_error(self):
+        result = format_support.tool_find_text(None, None, {"search": "(", "regex": True})
+        self.assertIn("invalid regex", result)
+
+
+if __name__ == '__main__':
+    unittest.main()
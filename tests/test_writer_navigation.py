@@ -1,10 +1,18 @@
+import itertools
 import unittest
 import json
+from unittest.mock import patch
 from core.document import (
     DocumentCache,
     build_heading_tree,
     resolve_locator,
-    get_paragraph_ranges
+    get_paragraph_ranges,
+    get_paragraph_offsets,
+    get_position_offset,
+    find_paragraph_for_range,
+    find_paragraphs_for_ranges,
+    TextRangeAppender,
+    undo_group,
 )
 
 class ElementStub:
@@ -22,9 +30,12 @@ class ElementStub:
     def getText(self): return self
 
 class WriterDocStub:
+    _uids = itertools.count()
+
     def __init__(self, elements):
         self.elements = elements
         self.url = "test://writer"
+        self.RuntimeUID = "writer-stub-%d" % next(self._uids)
     def getText(self): 
         class TextStub:
             def __init__(self, el): self.el = el
@@ -42,7 +53,75 @@ class WriterDocStub:
         return TextStub(self.elements)
     def supportsService(self, s): return s == "com.sun.star.text.TextDocument"
 
+class PosStub:
+    """Collapsed text position: absolute offset into the flat document string."""
+    def __init__(self, off): self.off = off
+    def getStart(self): return self
+    def getEnd(self): return self
+
+class OffsetCursorStub:
+    def __init__(self, doc, off=0):
+        self.doc = doc
+        self.a = self.b = off
+    def gotoStart(self, expand):
+        self.b = 0
+        if not expand: self.a = 0
+    def gotoRange(self, pos, expand):
+        self.b = pos.off
+        if not expand: self.a = pos.off
+    def getString(self):
+        lo, hi = sorted((self.a, self.b))
+        self.doc.chars_read += hi - lo
+        return self.doc.flat[lo:hi]
+
+class OffsetParaStub(ElementStub):
+    def __init__(self, text, start):
+        super().__init__(text)
+        self.start = start
+    def getStart(self): return PosStub(self.start)
+    def getEnd(self): return PosStub(self.start + len(self.text))
+
+class TableStub(ElementStub):
+    """Text tables are text contents, not text ranges: no getStart/getEnd."""
+    def __init__(self, text):
+        super().__init__(text, services=["com.sun.star.text.TextTable"])
+    def getStart(self): raise AttributeError("getStart")
+    def getEnd(self): raise AttributeError("getEnd")
+
+class OffsetDocStub(WriterDocStub):
+    """Flat-string Writer stub: paragraphs joined by \n; tables contribute their cell text."""
+    def __init__(self, blocks):
+        elements, parts, off = [], [], 0
+        for kind, value in blocks:
+            if kind == "table":
+                elements.append(TableStub(""))
+            else:
+                elements.append(OffsetParaStub(value, off))
+            parts.append(value)
+            off += len(value) + 1
+        super().__init__(elements)
+        self.flat = "\n".join(parts)
+        self.chars_read = 0
+        self.compares = 0
+        doc = self
+        class TextStub:
+            def createEnumeration(self_):
+                return WriterDocStub.getText(doc).createEnumeration()
+            def createTextCursor(self_): return OffsetCursorStub(doc)
+            def createTextCursorByRange(self_, pos): return OffsetCursorStub(doc, pos.off)
+            def compareRegionStarts(self_, a, b):
+                doc.compares += 1
+                return (a.off < b.off) - (a.off > b.off)
+        self._text = TextStub()
+    def getText(self): return self._text
+
 class TestWriterNavigation(unittest.TestCase):
+    def setUp(self):
+        # Stub documents behave like tracked ones: cached until invalidated
+        patcher = patch("core.document._attach_cache_listener", lambda model, key: object())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_document_cache(self):
         model = WriterDocStub([])
         cache1 = DocumentCache.get(model)
@@ -53,6 +132,34 @@ class TestWriterNavigation(unittest.TestCase):
         cache3 = DocumentCache.get(model)
         self.assertIsNot(cache1, cache3)
 
+    def test_document_cache_identity_across_proxies(self):
+        class Proxy:
+            """Stands in for a PyUNO proxy: a distinct Python object per fetch."""
+            def __init__(self, uid=None):
+                if uid:
+                    self.RuntimeUID = uid
+
+        listeners = []
+        attach = lambda model, key: listeners.append(key) or object()
+        with patch("core.document._attach_cache_listener", attach):
+            cache_a = DocumentCache.get(Proxy("7"))
+            self.assertIs(DocumentCache.get(Proxy("7")), cache_a)
+            self.assertIsNot(DocumentCache.get(Proxy("8")), cache_a)
+            self.assertEqual(len(listeners), 2)
+            # Without a RuntimeUID nothing is shared or kept
+            count = len(DocumentCache._instances)
+            model = Proxy()
+            self.assertIsNot(DocumentCache.get(model), DocumentCache.get(model))
+            self.assertEqual(len(DocumentCache._instances), count)
+            self.assertEqual(len(listeners), 2)
+        # Nor when the document cannot take a modify listener
+        with patch("core.document._attach_cache_listener", lambda model, key: None):
+            model = Proxy("9")
+            self.assertIsNot(DocumentCache.get(model), DocumentCache.get(model))
+            self.assertFalse(DocumentCache.is_tracked(model))
+        for uid in ("7", "8"):
+            DocumentCache._instances.pop(("uid", uid))
+
     def test_build_heading_tree(self):
         elements = [
             ElementStub("H1", outline_level=1),
@@ -107,5 +214,164 @@ class TestWriterNavigation(unittest.TestCase):
         res = resolve_locator(doc, "heading:2.1")
         self.assertEqual(res["para_index"], 3) # H2.1 is at index 3
 
+    def test_paragraph_offsets_match_prefix(self):
+        doc = OffsetDocStub([
+            ("para", "Title"),
+            ("para", "First paragraph."),
+            ("table", "a\nb"),
+            ("para", "After table"),
+            ("para", ""),
+            ("para", "Last"),
+        ])
+        index = get_paragraph_offsets(doc)
+        self.assertEqual(index.para_indices, [0, 1, 3, 4, 5])
+        for el, start in zip(index.paragraphs, index.starts):
+            self.assertEqual(start, el.start)
+        self.assertIs(get_paragraph_offsets(doc), index)
+
+    def test_position_offset_uses_paragraph_prefix_only(self):
+        paras = [("para", "x" * 50) for _ in range(40)]
+        doc = OffsetDocStub(paras)
+        get_paragraph_offsets(doc)
+        doc.chars_read = 0
+        target = 39 * 51 + 7
+        self.assertEqual(get_position_offset(doc, PosStub(target)), target)
+        # Only the intra-paragraph prefix is materialised, not the document prefix
+        self.assertEqual(doc.chars_read, 7)
+
+    def test_note_modified_keeps_offset_prefix(self):
+        doc = OffsetDocStub([("para", "x" * 10) for _ in range(6)])
+        cache = DocumentCache.get(doc)
+        index = get_paragraph_offsets(doc)
+        rev = cache.revision
+        rebuilds = DocumentCache.stats["rebuilds"]
+
+        # Edit inside paragraph 3 (starts at 33): paragraphs 0..2 stay valid
+        DocumentCache.note_modified(doc, from_offset=35)
+        self.assertEqual(cache.revision, rev + 1)
+        self.assertIsNone(cache.para_offsets)
+        self.assertEqual(cache.para_offsets_prefix.starts, [0, 11, 22])
+
+        doc.chars_read = 0
+        rebuilt = get_paragraph_offsets(doc)
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(rebuilt.starts, index.starts)
+        # Prefix offsets are reused: no prefix measurement from document start
+        self.assertEqual(doc.chars_read, 0)
+        self.assertGreater(DocumentCache.stats["rebuilds"], rebuilds)
+
+        DocumentCache.note_modified(doc)
+        self.assertIsNone(cache.para_offsets_prefix)
+
+    def test_find_paragraph_for_range_bisect(self):
+        blocks = [("para", "p%03d" % i) for i in range(200)]
+        blocks[50] = ("table", "cell")
+        doc = OffsetDocStub(blocks)
+        ranges = get_paragraph_ranges(doc)
+        text = doc.getText()
+        self.assertEqual(find_paragraph_for_range(PosStub(0), ranges, text), 0)
+        self.assertEqual(find_paragraph_for_range(PosStub(51 * 5 + 2), ranges, text), 51)
+        self.assertEqual(find_paragraph_for_range(PosStub(199 * 5 + 4), ranges, text), 199)
+        doc.compares = 0
+        find_paragraph_for_range(PosStub(120 * 5 + 1), ranges, text)
+        self.assertLess(doc.compares, 20)
+
+    def test_find_paragraphs_for_ranges_batch(self):
+        doc = OffsetDocStub([("para", "abcd") for _ in range(100)])
+        ranges = get_paragraph_ranges(doc)
+        anchors = [PosStub(90 * 5), PosStub(3), PosStub(42 * 5 + 2), PosStub(3 * 5 + 4)]
+        self.assertEqual(find_paragraphs_for_ranges(anchors, ranges, doc.getText()), [90, 0, 42, 3])
+        self.assertEqual(find_paragraphs_for_ranges([], ranges, doc.getText()), [])
+
+
+class FlatTextStub:
+    """XText over one string; cursors are offsets that move past inserted text."""
+    def __init__(self, content):
+        self.content = content
+        self.inserts = 0
+    def getText(self): return self
+    def getEnd(self): return len(self.content)
+    def createTextCursorByRange(self, pos):
+        return FlatCursorStub(self, pos[0] if isinstance(pos, list) else pos)
+    def insertString(self, cursor, s, absorb):
+        self.inserts += 1
+        self.content = self.content[:cursor[0]] + s + self.content[cursor[0]:]
+        cursor[0] += len(s)
+
+
+class FlatCursorStub(list):
+    """Offset cursor: [position]; goLeft with expand selects back to the anchor."""
+    def __init__(self, text, pos):
+        super().__init__([pos])
+        self.text = text
+        self.anchor = pos
+    def goLeft(self, n, expand):
+        self[0] -= n
+        if not expand:
+            self.anchor = self[0]
+    def setString(self, s):
+        lo, hi = sorted((self[0], self.anchor))
+        self.text.content = self.text.content[:lo] + s + self.text.content[hi:]
+
+
+class UndoManagerStub:
+    def __init__(self, fail_leave=False):
+        self.log = []
+        self.fail_leave = fail_leave
+    def enterUndoContext(self, title): self.log.append(("enter", title))
+    def leaveUndoContext(self):
+        if self.fail_leave:
+            raise RuntimeError("leave failed")
+        self.log.append(("leave",))
+
+
+class TestStreamingEdits(unittest.TestCase):
+    def test_appender_inserts_buffered_chunks_at_end(self):
+        text = FlatTextStub("Once upon a time")
+        appender = TextRangeAppender(text)
+        for chunk in (" there", " was", " a fox"):
+            appender.append(chunk)
+        appender.append("hmm", is_thinking=True)
+        self.assertEqual(text.inserts, 0)
+        appender.flush()
+        appender.append(".")
+        appender.flush()
+        appender.flush()
+        self.assertEqual(text.content, "Once upon a time there was a fox.")
+        self.assertEqual(text.inserts, 2)
+        self.assertEqual(appender.inserted, len(" there was a fox."))
+
+    def test_undo_group_wraps_block(self):
+        manager = UndoManagerStub()
+        doc = type("Doc", (), {"getUndoManager": lambda self: manager})()
+        with undo_group(doc, "LocalWriter: Extend Selection") as grouped:
+            self.assertTrue(grouped)
+        self.assertEqual(manager.log, [("enter", "LocalWriter: Extend Selection"), ("leave",)])
+
+    def test_appender_undo_actions_and_restore(self):
+        manager = UndoManagerStub()
+        doc = type("Doc", (), {"getUndoManager": lambda self: manager})()
+        text = FlatTextStub("Before ")
+        appender = TextRangeAppender(text, doc, "LocalWriter: Edit Selection")
+        appender.flush()
+        self.assertEqual(manager.log, [])
+        for chunk in ("new", " text"):
+            appender.append(chunk)
+            appender.flush()
+        # One short undo action per flush, none left open between flushes
+        self.assertEqual(manager.log, [("enter", "LocalWriter: Edit Selection"), ("leave",)] * 2)
+        text.content += " typed by the user"
+        appender.replace_written("original")
+        self.assertEqual(text.content, "Before original typed by the user")
+
+    def test_undo_group_tolerates_failures(self):
+        with undo_group(object(), "x") as grouped:
+            self.assertFalse(grouped)
+        manager = UndoManagerStub(fail_leave=True)
+        doc = type("Doc", (), {"getUndoManager": lambda self: manager})()
+        with undo_group(doc, "x"):
+            pass
+
+
 if __name__ == "__main__":
     unittest.main()